@@ -0,0 +1,6 @@
+"""
+Benchmarks of the OTI package
+
+Every benchmark is a module that can be executed with `python -m benchmarks.<name>`,
+and prints its results as JSON to the standard output.
+"""
@@ -0,0 +1,205 @@
+"""
+Local stand-in collectors and scraper for the benchmarks
+
+The collectors accept the requests of the exporters and count them, and the scraper polls the Prometheus endpoint,
+so the benchmarks can run offline, without a real OpenTelemetry collector and Prometheus server.
+"""
+
+import threading
+import time
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import URLError
+from urllib.request import urlopen
+import grpc
+from opentelemetry.proto.collector.metrics.v1 import (  # pylint: disable=no-name-in-module
+    metrics_service_pb2,
+    metrics_service_pb2_grpc,
+)
+from opentelemetry.proto.collector.trace.v1 import (  # pylint: disable=no-name-in-module
+    trace_service_pb2,
+    trace_service_pb2_grpc,
+)
+
+
+class StandInHTTPCollector:
+    """
+    OTLP/HTTP stand-in collector that keeps the HTTP/1.1 connections alive
+
+    Every request is answered with an empty `200 OK` response after the optional `latency_sec` delay,
+    that simulates the processing time of a real collector.
+    """
+
+    def __init__(self, latency_sec=0.0, addr="127.0.0.1", port=0):
+        """Constructor of the stand-in collector. The port is chosen by the OS by default"""
+        self.latency_sec = latency_sec
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.received_bytes = 0
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Request handler of the stand-in collector"""
+
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):  # pylint: disable=invalid-name
+                """Accept an export request"""
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if collector.latency_sec:
+                    time.sleep(collector.latency_sec)
+                with collector.lock:
+                    collector.requests += 1
+                    collector.received_bytes += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-protobuf")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                """Do not log the requests"""
+
+        self.server = ThreadingHTTPServer((addr, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        """The base URL of the collector"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+class StandInGRPCCollector:
+    """
+    OTLP/gRPC stand-in collector
+
+    It implements the trace and metrics services, and answers every request with an empty response
+    after the optional `latency_sec` delay.
+    """
+
+    def __init__(self, latency_sec=0.0, addr="127.0.0.1", port=0, max_workers=8):
+        """Constructor of the stand-in collector. The port is chosen by the OS by default"""
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.latency_sec = latency_sec
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.received_bytes = 0
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+        trace_service_pb2_grpc.add_TraceServiceServicer_to_server(
+            TraceService(self), self.server
+        )
+        metrics_service_pb2_grpc.add_MetricsServiceServicer_to_server(
+            MetricsService(self), self.server
+        )
+        self.port = self.server.add_insecure_port(f"{addr}:{port}")
+        self.addr = addr
+
+    def accept(self, request):
+        """Count the request after the simulated processing time"""
+        if self.latency_sec:
+            time.sleep(self.latency_sec)
+        with self.lock:
+            self.requests += 1
+            self.received_bytes += request.ByteSize()
+
+    @property
+    def url(self):
+        """The URL of the collector"""
+        return f"http://{self.addr}:{self.port}"
+
+    def __enter__(self):
+        self.server.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.stop(None)
+
+
+class TraceService(
+    trace_service_pb2_grpc.TraceServiceServicer
+):  # pylint: disable=too-few-public-methods
+    """The trace service of the stand-in gRPC collector"""
+
+    def __init__(self, collector):
+        """Constructor of the trace service"""
+        self.collector = collector
+
+    def Export(self, request, context):  # pylint: disable=invalid-name
+        """Accept a trace export request"""
+        self.collector.accept(request)
+        return (
+            trace_service_pb2.ExportTraceServiceResponse()  # pylint: disable=no-member
+        )
+
+
+class MetricsService(
+    metrics_service_pb2_grpc.MetricsServiceServicer
+):  # pylint: disable=too-few-public-methods
+    """The metrics service of the stand-in gRPC collector"""
+
+    def __init__(self, collector):
+        """Constructor of the metrics service"""
+        self.collector = collector
+
+    def Export(self, request, context):  # pylint: disable=invalid-name
+        """Accept a metrics export request"""
+        self.collector.accept(request)
+        return (
+            metrics_service_pb2.ExportMetricsServiceResponse()  # pylint: disable=no-member
+        )
+
+
+class PrometheusScraper:
+    """
+    Scrapes a Prometheus metrics endpoint periodically in a background thread, like a Prometheus server does
+
+    The scrapes that fail (e.g. before the endpoint is up) are counted separately.
+    """
+
+    def __init__(self, url, interval_sec=1.0, timeout_sec=5.0):
+        """Constructor of the scraper"""
+        self.url = url
+        self.interval_sec = interval_sec
+        self.timeout_sec = timeout_sec
+        self.scrapes = 0
+        self.failed_scrapes = 0
+        self.received_bytes = 0
+        self.scrape_durations_ms = []
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def scrape(self):
+        """Scrape the endpoint once"""
+        start = time.perf_counter()
+        try:
+            with urlopen(self.url, timeout=self.timeout_sec) as response:
+                body = response.read()
+        except (URLError, OSError):
+            self.failed_scrapes += 1
+            return
+        self.scrape_durations_ms.append((time.perf_counter() - start) * 1e3)
+        self.scrapes += 1
+        self.received_bytes += len(body)
+
+    def run(self):
+        """The loop of the scraper thread"""
+        while not self.done.wait(self.interval_sec):
+            self.scrape()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.done.set()
+        self.thread.join()
@@ -0,0 +1,93 @@
+"""
+Cost of the console exporters per span
+
+It measures the cost of starting and ending a span in the calling thread with the `SIMPLE` span processor,
+that exports every span right away, with the console exporters of the `STDOUT` exporter type:
+
+- `NONE`: a span exporter that drops the spans, the baseline of the others,
+- `PRETTY`: the console exporter of the OTEL SDK, that writes indented JSON and flushes on every export,
+- `NDJSON`: the compact console exporter, that encodes one JSON line per span into the buffer of a background writer.
+
+The output is written into `/dev/null`, so the results do not depend on the terminal.
+The `export_ns_per_span` is the cost of the exporter over the baseline.
+
+Usage:
+
+```bash
+python -m benchmarks.console [--iterations 100000] [--output results.json]
+```
+"""
+
+import argparse
+import json
+import os
+import time
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from oti.console import NDJSONConsoleSpanExporter, get_shared_writer
+
+ATTRIBUTES = {"http.method": "GET", "http.route": "/benchmark"}
+
+
+class NoOpSpanExporter(SpanExporter):
+    """Span exporter that drops the spans"""
+
+    def export(self, spans):
+        """Drop the spans"""
+        return SpanExportResult.SUCCESS
+
+
+def measure(span_exporter, iterations):
+    """Measure the nanoseconds per span exported by the span exporter"""
+    tracer_provider = TracerProvider(ALWAYS_ON)
+    tracer_provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+    tracer = tracer_provider.get_tracer(__name__)
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        tracer.start_span("benchmark", attributes=ATTRIBUTES).end()
+    ns_per_span = (time.perf_counter_ns() - start) / iterations
+    tracer_provider.shutdown()
+    return ns_per_span
+
+
+def main():
+    """Parse the command line arguments, run the benchmark and write the results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--output", help="Write the results into this file")
+    args = parser.parse_args()
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        span_exporters = {
+            "NONE": NoOpSpanExporter(),
+            "PRETTY": ConsoleSpanExporter(out=devnull),
+            "NDJSON": NDJSONConsoleSpanExporter(
+                get_shared_writer(devnull.fileno(), 200, 8 * 1024 * 1024)
+            ),
+        }
+        results = [
+            {
+                "benchmark": "console",
+                "format": output_format,
+                "ns_per_span": measure(span_exporter, args.iterations),
+            }
+            for output_format, span_exporter in span_exporters.items()
+        ]
+    for result in results:
+        result["export_ns_per_span"] = result["ns_per_span"] - results[0]["ns_per_span"]
+    results = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(results)
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
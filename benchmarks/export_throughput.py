@@ -0,0 +1,87 @@
+"""
+Export throughput benchmark of the OTLP/HTTP exporters
+
+Exports the same batches of spans to a local stand-in collector with the synchronous `OTLPHTTP`
+and the asyncio-based `OTLPHTTP_ASYNC` exporters, and reports the number of spans exported per second.
+The `--latency-ms` option simulates the processing time of the collector.
+
+Usage:
+
+```bash
+python -m benchmarks.export_throughput [--batches 200] [--batch-size 512] [--latency-ms 5]
+```
+"""
+
+import argparse
+import json
+import time
+from oti import OTIConfig, ExporterConfig
+from oti.registry import SPAN_EXPORTERS
+from .collector import StandInHTTPCollector
+from .spans import create_spans
+
+
+def measure(exporter_type, spans, batches, latency_sec, encoding, max_in_flight):
+    """Export the batches with the exporter type, and return the measured results"""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    with StandInHTTPCollector(latency_sec) as collector:
+        config = OTIConfig(
+            exporter_config=ExporterConfig(
+                exporter_type=exporter_type,
+                exporter_url=f"{collector.url}/v1/traces",
+                exporter_encoding=encoding,
+                exporter_max_in_flight=max_in_flight,
+            )
+        )
+        exporter = SPAN_EXPORTERS.create(exporter_type, config)
+        start = time.perf_counter()
+        for _ in range(batches):
+            exporter.export(spans)
+        exporter.force_flush()
+        duration = time.perf_counter() - start
+        exporter.shutdown()
+        return {
+            "benchmark": "export_throughput",
+            "exporter_type": exporter_type,
+            "encoding": encoding if exporter_type == "OTLPHTTP_ASYNC" else "PROTOBUF",
+            "batches": batches,
+            "batch_size": len(spans),
+            "collector_latency_ms": latency_sec * 1e3,
+            "duration_sec": duration,
+            "spans_per_sec": batches * len(spans) / duration,
+            "requests": collector.requests,
+            "received_bytes": collector.received_bytes,
+        }
+
+
+def main():
+    """Parse the command line arguments, run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    spans = create_spans(args.batch_size)
+    scenarios = [
+        ("OTLPHTTP", "PROTOBUF"),
+        ("OTLPHTTP_ASYNC", "PROTOBUF"),
+        ("OTLPHTTP_ASYNC", "JSON"),
+    ]
+    results = [
+        measure(
+            exporter_type,
+            spans,
+            args.batches,
+            args.latency_ms / 1e3,
+            encoding,
+            args.max_in_flight,
+        )
+        for exporter_type, encoding in scenarios
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
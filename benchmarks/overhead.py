@@ -0,0 +1,304 @@
+"""
+Instrumentation overhead benchmark across the OTIConfig combinations
+
+For every combination of the span processor types, the sampling types and the metric exporter modes it measures:
+
+- the cost of starting and ending a span,
+- the throughput of `counter.add()` and `histogram.record()`,
+- the memory a span takes while it waits in the queue of the batching span processors.
+
+The operations run in one or more threads at the same time. The spans and metrics are exported
+to a local stand-in OTLP collector, and the Prometheus endpoint of the `ENDPOINT` and `BOTH` modes
+is scraped by a local scraper, so the benchmark runs offline.
+Every scenario runs in a fresh interpreter, because the OTEL SDK allows setting the global providers only once.
+
+Usage:
+
+```bash
+python -m benchmarks.overhead [--iterations 10000] [--threads 1 4] [--span-processor-types SIMPLE BATCH] \\
+    [--sampling-types ALWAYS_ON TRACEIDRATIO] [--metric-exporter-modes PERIODIC ENDPOINT BOTH] \\
+    [--exporter-type OTLPGRPC] [--output results.json]
+```
+"""
+
+import argparse
+import contextlib
+import copy
+import gc
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from .collector import PrometheusScraper, StandInGRPCCollector, StandInHTTPCollector
+
+SPAN_PROCESSOR_TYPES = ["SIMPLE", "BATCH"]
+# The sampling types supported by `OTI.setup_sampler()`, with the `OTEL_TRACES_SAMPLER_ARG` used for them
+SAMPLING_ARGS = {
+    "ALWAYS_OFF": 1.0,
+    "ALWAYS_ON": 1.0,
+    "PARENTBASED_ALWAYS_ON": 1.0,
+    "PARENTBASED_ALWAYS_OFF": 1.0,
+    "TRACEIDRATIO": 0.5,
+    "PARENTBASED_TRACEID_RATIO": 0.5,
+    "RATELIMITED": 1000.0,
+    "PARENTBASED_RATELIMITED": 1000.0,
+    "ADAPTIVE_RATELIMITED": 1000.0,
+    "PARENTBASED_ADAPTIVE_RATELIMITED": 1000.0,
+}
+METRIC_EXPORTER_MODES = ["PERIODIC", "ENDPOINT", "BOTH"]
+COLLECTORS = {
+    "OTLPGRPC": StandInGRPCCollector,
+    "OTLPHTTP": StandInHTTPCollector,
+    "OTLPHTTP_ASYNC": StandInHTTPCollector,
+}
+ATTRIBUTES = {"http.method": "GET", "http.route": "/benchmark"}
+# The periodic metric reader exports this often during the benchmark
+EXPORT_INTERVAL_MILLIS = 1000
+SCRAPE_INTERVAL_SEC = 0.25
+
+
+def run_threads(threads, iterations, operation):
+    """Run the `operation(iterations)` in `threads` threads at the same time, and return the measured results"""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        operation(iterations)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    duration = time.perf_counter() - start
+    return {
+        "ops_per_sec": threads * iterations / duration,
+        "ns_per_op": duration * 1e9 / iterations,
+    }
+
+
+def measure_queued_span_memory(instance, config, count):
+    """Measure the memory a span takes in the queue of the span processor, or return `None` if it has no queue"""
+    # pylint: disable=import-outside-toplevel
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+    from oti import BatchSpanProcessorConfig
+
+    class NoOpSpanExporter(SpanExporter):
+        """Span exporter that drops the spans"""
+
+        def export(self, spans):
+            return SpanExportResult.SUCCESS
+
+    # The queue is not drained until the processor is shut down
+    queue_config = copy.copy(config)
+    queue_config.batch_span_processor_config = BatchSpanProcessorConfig(
+        max_queue_size=count + 1,
+        schedule_delay_millis=3_600_000,
+        max_export_batch_size=count + 1,
+    )
+    span_processor = instance.setup_span_processor(queue_config, NoOpSpanExporter())
+    if not hasattr(span_processor, "queue"):
+        span_processor.shutdown()
+        return None
+    tracer_provider = TracerProvider(
+        instance.setup_sampler(config.sampling_config),
+        resource=instance.tracer_provider.resource,
+    )
+    tracer_provider.add_span_processor(span_processor)
+    tracer = tracer_provider.get_tracer(__name__)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(count):
+        tracer.start_span("benchmark", attributes=ATTRIBUTES).end()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    queued = len(span_processor.queue)
+    tracer_provider.shutdown()
+    return (after - before) / queued if queued else None
+
+
+def run_scenario(scenario):
+    """Run the measurements of a scenario in the current process, and return the results"""
+    # pylint: disable=import-outside-toplevel
+    from oti import (
+        OTI,
+        OTIConfig,
+        ExporterConfig,
+        SamplingConfig,
+        MetricReaderEndpointConfig,
+        PeriodicMetricReaderConfig,
+    )
+
+    config = OTIConfig(
+        service_name="oti-benchmark",
+        span_processor_type=scenario["span_processor_type"],
+        exporter_config=ExporterConfig(
+            exporter_type=scenario["exporter_type"],
+            exporter_url=scenario["exporter_url"],
+        ),
+        sampling_config=SamplingConfig(
+            trace_sampling_type=scenario["sampling_type"],
+            trace_sampling_ratio=SAMPLING_ARGS.get(scenario["sampling_type"], 1.0),
+        ),
+        metric_exporter_mode_config=scenario["metric_exporter_mode"],
+        metric_exporter_endpoint_config=MetricReaderEndpointConfig(
+            endpoint_addr="127.0.0.1", endpoint_port=scenario["endpoint_port"]
+        ),
+        periodic_metric_reader_config=PeriodicMetricReaderConfig(
+            export_interval_millis=EXPORT_INTERVAL_MILLIS
+        ),
+    )
+    instance = OTI(config)
+    counter = instance.meter.create_counter("benchmark_counter")
+    histogram = instance.meter.create_histogram("benchmark_histogram")
+    tracer = instance.tracer
+
+    def start_end_spans(iterations):
+        for _ in range(iterations):
+            tracer.start_span("benchmark", attributes=ATTRIBUTES).end()
+
+    def add_to_counter(iterations):
+        for _ in range(iterations):
+            counter.add(1, ATTRIBUTES)
+
+    def record_histogram(iterations):
+        for index in range(iterations):
+            histogram.record(index % 1000, ATTRIBUTES)
+
+    threads, iterations = scenario["threads"], scenario["iterations"]
+    results = {
+        "span_start_end": run_threads(threads, iterations, start_end_spans),
+        "counter_add": run_threads(threads, iterations, add_to_counter),
+        "histogram_record": run_threads(threads, iterations, record_histogram),
+    }
+    results["queued_span_bytes"] = measure_queued_span_memory(
+        instance, config, scenario["queued_spans"]
+    )
+    start = time.perf_counter()
+    instance.shutdown()
+    results["shutdown_ms"] = (time.perf_counter() - start) * 1e3
+    return results
+
+
+def get_free_port():
+    """Get a TCP port that is free at the moment"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure(scenario, collector):
+    """Run the scenario in a fresh interpreter, and return its results with the collector and scraper statistics"""
+    scenario = {**scenario, "endpoint_port": get_free_port()}
+    requests, received_bytes = collector.requests, collector.received_bytes
+    scraper = None
+    if scenario["metric_exporter_mode"] in ("ENDPOINT", "BOTH"):
+        scraper = PrometheusScraper(
+            f"http://127.0.0.1:{scenario['endpoint_port']}/metrics",
+            SCRAPE_INTERVAL_SEC,
+        )
+    with scraper or contextlib.nullcontext():
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.overhead",
+                "--run-scenario",
+                json.dumps(scenario),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout
+    result = {
+        "benchmark": "overhead",
+        **{key: value for key, value in scenario.items() if key != "endpoint_port"},
+        **json.loads(output.strip().splitlines()[-1]),
+        "collector_requests": collector.requests - requests,
+        "collector_received_bytes": collector.received_bytes - received_bytes,
+    }
+    if scraper is not None:
+        result["scrapes"] = scraper.scrapes
+        result["scrape_ms"] = (
+            sum(scraper.scrape_durations_ms) / scraper.scrapes
+            if scraper.scrapes
+            else None
+        )
+    return result
+
+
+def run(args):
+    """Run every scenario of the command line arguments, and return the results"""
+    results = []
+    with COLLECTORS[args.exporter_type]() as collector:
+        exporter_url = collector.url
+        if args.exporter_type == "OTLPHTTP":
+            exporter_url = f"{exporter_url}/v1/traces"
+        for span_processor_type, sampling_type, mode, threads in itertools.product(
+            args.span_processor_types,
+            args.sampling_types,
+            args.metric_exporter_modes,
+            args.threads,
+        ):
+            scenario = {
+                "span_processor_type": span_processor_type,
+                "sampling_type": sampling_type,
+                "metric_exporter_mode": mode,
+                "exporter_type": args.exporter_type,
+                "exporter_url": exporter_url,
+                "threads": threads,
+                "iterations": args.iterations,
+                "queued_spans": args.queued_spans,
+            }
+            print(
+                f"Running {span_processor_type} / {sampling_type} / {mode} / {threads} thread(s)",
+                file=sys.stderr,
+            )
+            results.append(measure(scenario, collector))
+    return results
+
+
+def main():
+    """Parse the command line arguments, run the benchmark and write the results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--queued-spans", type=int, default=2000)
+    parser.add_argument(
+        "--span-processor-types", nargs="+", default=SPAN_PROCESSOR_TYPES
+    )
+    parser.add_argument("--sampling-types", nargs="+", default=list(SAMPLING_ARGS))
+    parser.add_argument(
+        "--metric-exporter-modes", nargs="+", default=METRIC_EXPORTER_MODES
+    )
+    parser.add_argument("--exporter-type", choices=COLLECTORS, default="OTLPGRPC")
+    parser.add_argument("--output", help="Write the results into this file")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        print(json.dumps(run_scenario(json.loads(args.run_scenario))))
+        return
+
+    results = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(results)
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
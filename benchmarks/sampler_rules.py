@@ -0,0 +1,87 @@
+"""
+Per-span cost of the rule based sampler by the number of rules
+
+For every number of rules it measures the cost of a sampling decision of the `RuleBasedSampler`:
+
+- `named`: the rules match exact span names, the span matches none of them,
+- `regex`: the rules match span name regexes, the span matches none of them,
+- `attributes`: the rules match attribute values, the span matches the last one.
+
+The rules are compiled into the steps of the decision of the span name and kind on the first span,
+and the exact attribute values of the `attributes` scenario into one dict lookup,
+so the cost should not depend on the number of rules.
+
+Usage:
+
+```bash
+python -m benchmarks.sampler_rules [--iterations 100000] [--rule-counts 1 100 500] [--output results.json]
+```
+"""
+
+import argparse
+import json
+import random
+import time
+from opentelemetry.trace import SpanKind
+from oti.samplers import RuleBasedSampler
+
+ATTRIBUTES = {"http.method": "GET", "http.route": "/benchmark"}
+
+
+def create_rules(scenario, count):
+    """Create the rules of the scenario"""
+    if scenario == "named":
+        return [{"name": f"GET /route/{index}", "ratio": 0.5} for index in range(count)]
+    if scenario == "regex":
+        return [
+            {"name_regex": f"GET /route/{index}/.*", "ratio": 0.5}
+            for index in range(count)
+        ]
+    rules = [
+        {"attributes": {"http.route": f"/route/{index}"}, "ratio": 0.5}
+        for index in range(count - 1)
+    ]
+    return rules + [{"attributes": {"http.route": "/benchmark"}, "ratio": 0.5}]
+
+
+def measure(sampler, iterations):
+    """Measure the nanoseconds per sampling decision"""
+    trace_ids = [random.getrandbits(128) for _ in range(1000)]
+    start = time.perf_counter_ns()
+    for index in range(iterations):
+        sampler.should_sample(
+            None, trace_ids[index % 1000], "GET /benchmark", SpanKind.SERVER, ATTRIBUTES
+        )
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def main():
+    """Parse the command line arguments, run the benchmark and write the results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--rule-counts", type=int, nargs="+", default=[1, 100, 500])
+    parser.add_argument("--output", help="Write the results into this file")
+    args = parser.parse_args()
+
+    results = [
+        {
+            "benchmark": "sampler_rules",
+            "scenario": scenario,
+            "rules": count,
+            "ns_per_decision": measure(
+                RuleBasedSampler(create_rules(scenario, count), 0.05), args.iterations
+            ),
+        }
+        for scenario in ("named", "regex", "attributes")
+        for count in args.rule_counts
+    ]
+    results = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(results)
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Span memory benchmark of the span limits
+
+It measures the memory a heavy span (many attributes with long values, many events) takes while it waits
+in the queue of the batch span processor, and the size of its OTLP export payload,
+with the default span limits of the OTEL SDK and with the limits of the command line arguments.
+Use the results to size the `OTEL_BSP_MAX_QUEUE_SIZE` to the memory the process can spend on the queue.
+
+Usage:
+
+```bash
+python -m benchmarks.span_memory [--spans 500] [--attributes 200] [--attribute-length 16384] [--events 500] \\
+    [--max-attributes 32] [--max-events 32] [--max-attribute-length 1024] [--output results.json]
+```
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.trace import SpanLimits, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+
+
+class NoOpSpanExporter(SpanExporter):
+    """Span exporter that drops the spans"""
+
+    def export(self, spans):
+        return SpanExportResult.SUCCESS
+
+
+def start_heavy_span(tracer, args):
+    """Start and end a span with the attributes and events of the command line arguments"""
+    # Every attribute value is a separate string object, like the values of the real spans
+    with tracer.start_as_current_span(
+        "SELECT",
+        attributes={
+            f"db.attribute.{index}": f"{index}:".ljust(args.attribute_length, "x")
+            for index in range(args.attributes)
+        },
+    ) as span:
+        for index in range(args.events):
+            span.add_event(f"row.{index}", {"db.row": f"{index}:".ljust(256, "x")})
+
+
+def measure(span_limits, args):
+    """Measure the memory per queued span and the payload size per span with the span limits"""
+    span_processor = BatchSpanProcessor(
+        NoOpSpanExporter(),
+        max_queue_size=args.spans + 1,
+        schedule_delay_millis=3_600_000,
+        max_export_batch_size=args.spans + 1,
+    )
+    tracer_provider = TracerProvider(ALWAYS_ON, span_limits=span_limits)
+    tracer_provider.add_span_processor(span_processor)
+    tracer = tracer_provider.get_tracer(__name__)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(args.spans):
+        start_heavy_span(tracer, args)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    spans = list(span_processor.queue)
+    payload_bytes = len(encode_spans(spans[:1]).SerializeToString())
+    tracer_provider.shutdown()
+    return {
+        "queued_span_bytes": (after - before) / len(spans),
+        "payload_bytes_per_span": payload_bytes,
+        "attributes_per_span": len(spans[0].attributes),
+        "events_per_span": len(spans[0].events),
+    }
+
+
+def main():
+    """Parse the command line arguments, run the benchmark and write the results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--spans", type=int, default=500)
+    parser.add_argument("--attributes", type=int, default=200)
+    parser.add_argument("--attribute-length", type=int, default=16384)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--max-attributes", type=int, default=32)
+    parser.add_argument("--max-events", type=int, default=32)
+    parser.add_argument("--max-attribute-length", type=int, default=1024)
+    parser.add_argument("--output", help="Write the results into this file")
+    args = parser.parse_args()
+
+    scenarios = {
+        # The `OTEL_SPAN_*` and `OTEL_ATTRIBUTE_*` environment variables apply to these limits too
+        "sdk_defaults": SpanLimits(),
+        "limited": SpanLimits(
+            max_attributes=args.max_attributes,
+            max_events=args.max_events,
+            max_attribute_length=args.max_attribute_length,
+        ),
+    }
+    results = json.dumps(
+        [
+            {
+                "benchmark": "span_memory",
+                "scenario": name,
+                "span_limits": str(span_limits),
+                **measure(span_limits, args),
+            }
+            for name, span_limits in scenarios.items()
+        ],
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(results)
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Test data generators for the benchmarks"""
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+
+
+def create_spans(count, attributes=None):
+    """Create `count` finished spans with the given attributes"""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(ALWAYS_ON)
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer(__name__)
+    attributes = attributes or {"http.method": "GET", "http.route": "/benchmark"}
+    for index in range(count):
+        tracer.start_span(f"span-{index % 10}", attributes=attributes).end()
+    spans = exporter.get_finished_spans()
+    provider.shutdown()
+    return spans
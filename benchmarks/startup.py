@@ -0,0 +1,116 @@
+"""
+Startup-time benchmark
+
+Measures the time of `import oti` and the construction of the `OTI()` object for each exporter type,
+as well as the peak RSS of the process. Every measurement runs in a fresh interpreter,
+so the results are not distorted by the modules that are already imported.
+
+Usage:
+
+```bash
+python -m benchmarks.startup [--repeat 5] [--exporter-types STDOUT OTLPGRPC OTLPHTTP] \\
+    [--span-processor-type SIMPLE] [--metric-exporter-mode PERIODIC]
+```
+
+Use `--span-processor-type DISABLED --metric-exporter-mode DISABLED` to measure the startup of the disabled instrumentation.
+
+```bash
+```
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFAULT_EXPORTER_TYPES = ["STDOUT", "OTLPGRPC", "OTLPHTTP"]
+
+MEASUREMENT_SCRIPT = """
+import json, resource, time
+start = time.perf_counter()
+import oti
+imported = time.perf_counter()
+instance = oti.OTI(
+    oti.OTIConfig(
+        span_processor_type="{span_processor_type}",
+        exporter_config=oti.ExporterConfig(exporter_type="{exporter_type}"),
+        metric_exporter_mode_config="{metric_exporter_mode}",
+    )
+)
+constructed = time.perf_counter()
+instance.shutdown()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1e3,
+    "construct_ms": (constructed - imported) * 1e3,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+
+def measure(exporter_type, span_processor_type, metric_exporter_mode):
+    """Measure the startup of a single fresh interpreter"""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            MEASUREMENT_SCRIPT.format(
+                exporter_type=exporter_type,
+                span_processor_type=span_processor_type,
+                metric_exporter_mode=metric_exporter_mode,
+            ),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(exporter_types, repeat, span_processor_type, metric_exporter_mode):
+    """Run the benchmark for every exporter type, and return the median of the measurements"""
+    results = []
+    for exporter_type in exporter_types:
+        samples = [
+            measure(exporter_type, span_processor_type, metric_exporter_mode)
+            for _ in range(repeat)
+        ]
+        results.append(
+            {
+                "benchmark": "startup",
+                "exporter_type": exporter_type,
+                "span_processor_type": span_processor_type,
+                "metric_exporter_mode": metric_exporter_mode,
+                "repeat": repeat,
+                **{
+                    key: statistics.median(sample[key] for sample in samples)
+                    for key in ("import_ms", "construct_ms", "max_rss_kb")
+                },
+            }
+        )
+    return results
+
+
+def main():
+    """Parse the command line arguments, run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--exporter-types", nargs="+", default=DEFAULT_EXPORTER_TYPES)
+    parser.add_argument("--span-processor-type", default="SIMPLE")
+    parser.add_argument("--metric-exporter-mode", default="PERIODIC")
+    args = parser.parse_args()
+    print(
+        json.dumps(
+            run(
+                args.exporter_types,
+                args.repeat,
+                args.span_processor_type,
+                args.metric_exporter_mode,
+            ),
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Per-call overhead benchmark of the traced decorator
+
+It measures the cost of a call of a trivial function:
+
+- called directly,
+- decorated with `traced()`, and with an attribute factory, with the `ALWAYS_OFF` and the `ALWAYS_ON` samplers,
+- wrapped by hand into `tracer.start_as_current_span()` with an attribute dict, with both samplers,
+- with the no-op tracer provider of the OTEL API, that is installed when the tracing is disabled.
+
+The sampled spans are ended into a span processor that drops them, so the results are the overhead
+of the instrumentation in the calling thread, without the export.
+
+Usage:
+
+```bash
+python -m benchmarks.traced [--iterations 100000] [--output results.json]
+```
+"""
+
+import argparse
+import json
+import time
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+from opentelemetry.trace import NoOpTracerProvider
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON
+from oti.tracing import traced
+
+ATTRIBUTES = {"http.method": "GET", "http.route": "/benchmark"}
+
+
+def get_attributes(value):
+    """Get the span attributes of a call"""
+    return {**ATTRIBUTES, "benchmark.value": value}
+
+
+def function(value):
+    """The function of the benchmark"""
+    return value + 1
+
+
+def measure(call, iterations):
+    """Measure the nanoseconds per call"""
+    start = time.perf_counter_ns()
+    for index in range(iterations):
+        call(index)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def create_calls(tracer_provider):
+    """Create the instrumented calls of the function with the tracer provider"""
+    tracer = tracer_provider.get_tracer(__name__)
+
+    def start_as_current_span(value):
+        # pylint: disable-next=not-context-manager
+        with tracer.start_as_current_span(
+            "function", attributes={**ATTRIBUTES, "benchmark.value": value}
+        ):
+            return function(value)
+
+    return {
+        "traced": traced(tracer_provider.get_tracer, "function")(function),
+        "traced_attribute_factory": traced(
+            tracer_provider.get_tracer, "function", attributes=get_attributes
+        )(function),
+        "start_as_current_span": start_as_current_span,
+    }
+
+
+def main():
+    """Parse the command line arguments, run the benchmark and write the results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--output", help="Write the results into this file")
+    args = parser.parse_args()
+
+    plain_ns = measure(function, args.iterations)
+    results = [
+        {"benchmark": "traced", "scenario": "plain_call", "ns_per_call": plain_ns}
+    ]
+    for sampler_name, sampler in (
+        ("ALWAYS_OFF", ALWAYS_OFF),
+        ("ALWAYS_ON", ALWAYS_ON),
+        ("DISABLED", None),
+    ):
+        if sampler is None:
+            tracer_provider = NoOpTracerProvider()
+        else:
+            tracer_provider = TracerProvider(sampler)
+            # A span processor that drops the ended spans
+            tracer_provider.add_span_processor(SpanProcessor())
+        for name, call in create_calls(tracer_provider).items():
+            ns_per_call = measure(call, args.iterations)
+            results.append(
+                {
+                    "benchmark": "traced",
+                    "scenario": name,
+                    "sampler": sampler_name,
+                    "ns_per_call": ns_per_call,
+                    "overhead_ns_per_call": ns_per_call - plain_ns,
+                }
+            )
+    results = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(results)
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
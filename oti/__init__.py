@@ -11,6 +11,18 @@ from .config import (
     SamplingConfig,
     PeriodicMetricReaderConfig,
     MetricReaderEndpointConfig,
+    BatchSpanProcessorConfig,
+    MultiprocessConfig,
+    TailSamplingConfig,
+    SpoolConfig,
+    FileExporterConfig,
+    ConsoleExporterConfig,
+    MetricViewsConfig,
+    MetricAggregationConfig,
+    ReloadConfig,
+    SpanLimitsConfig,
+    FlushConfig,
+    SpanMetricsConfig,
 )
 
 __all__ = ["oti", "config"]
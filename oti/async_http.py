@@ -0,0 +1,350 @@
+"""
+Asyncio-based OTLP/HTTP exporters
+
+The exporters of the `OTLPHTTP_ASYNC` exporter type do not block the thread of the span processor or metric reader
+while the payload is sent. They encode the payload, hand it over to a shared transport, and return immediately.
+The transport runs an asyncio event loop in a background thread, and sends the requests of both the trace and
+the metric exporters through the same pool of keep-alive HTTP/1.1 connections,
+keeping at most `exporter_max_in_flight` requests in flight at the same time.
+
+The `export()` of the exporters returns as soon as the request is queued, so its result only tells whether
+the request could be queued: `FAILURE` if the exporter or the transport is shut down, `SUCCESS` otherwise.
+The response arrives later, and it is reported to the `completion_callback(succeeded, request, batch)` of the exporter
+with the OTLP request message and the exported spans or metrics data. The circuit breaker, the spool and the
+self-telemetry wrappers of `OTI` register themselves as the completion callback, so they see the failed responses:
+the circuit opens, the failed requests are spooled, and the failures are counted.
+The span processors and metric readers of the OTEL SDK (and any other caller of `export()`) only see the `SUCCESS`.
+The failed requests are not retried by the exporters.
+
+This module requires the `httpx` package, that is installed with the `async` extra of the `otel-inst-py` package.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import gzip
+import logging
+import os
+import threading
+import zlib
+from opentelemetry.exporter.otlp.proto.common.metrics_encoder import encode_metrics
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.proto.collector.metrics.v1.metrics_service_pb2 import (  # pylint: disable=no-name-in-module
+    ExportMetricsServiceRequest,
+)
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (  # pylint: disable=no-name-in-module
+    ExportTraceServiceRequest,
+)
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from .encoding import encode_message
+
+try:
+    import httpx
+except ImportError as import_error:  # pragma: no cover
+    raise ImportError(
+        "The OTLPHTTP_ASYNC exporter type requires the httpx package. "
+        "Install it with: pip install otel-inst-py[async]"
+    ) from import_error
+
+logger = logging.getLogger(__name__)
+
+TRACES_PATH = "/v1/traces"
+METRICS_PATH = "/v1/metrics"
+CONTENT_TYPES = {
+    "PROTOBUF": "application/x-protobuf",
+    "JSON": "application/json",
+}
+COMPRESSORS = {
+    "GZIP": ("gzip", gzip.compress),
+    "DEFLATE": ("deflate", zlib.compress),
+}
+DEFAULT_TIMEOUT_SEC = 10.0
+
+
+def get_base_url(exporter_url):
+    """Get the base URL of the collector from an URL that may already end with a signal specific path"""
+    for path in (TRACES_PATH, METRICS_PATH):
+        if exporter_url.endswith(path):
+            return exporter_url[: -len(path)]
+    return exporter_url.rstrip("/")
+
+
+class AsyncOTLPHTTPTransport:
+    """
+    Sends the OTLP requests from an asyncio event loop running in a background thread
+
+    The callers of `submit()` are blocked only while the number of requests in flight is at the limit.
+    """
+
+    def __init__(
+        self, base_url, max_in_flight, timeout_sec=DEFAULT_TIMEOUT_SEC, headers=None
+    ):  # pylint: disable=too-many-positional-arguments
+        """Constructor of the transport"""
+        self.base_url = base_url
+        self.max_in_flight = max_in_flight
+        self.timeout_sec = timeout_sec
+        self.headers = headers or {}
+        self.key = (base_url, max_in_flight, timeout_sec, tuple(self.headers.items()))
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        # It is notified when a request and its completion callback are done
+        self.lock = threading.Condition()
+        self.pending = set()
+        self.references = 0
+        self.closed = False
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            name="OTIAsyncOTLPHTTP", target=self.loop.run_forever, daemon=True
+        )
+        self.thread.start()
+        self.client = asyncio.run_coroutine_threadsafe(
+            self.create_client(), self.loop
+        ).result()
+
+    async def create_client(self):
+        """Create the HTTP client within the event loop"""
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=self.timeout_sec,
+            limits=httpx.Limits(
+                max_connections=self.max_in_flight,
+                max_keepalive_connections=self.max_in_flight,
+            ),
+        )
+
+    def submit(self, path, body, headers, callback=None):
+        """
+        Send the request asynchronously, and call the `callback(succeeded)` in the event loop thread
+        when the request is done. It returns `False` if the transport is already closed
+        """
+        if self.closed:
+            return False
+        self.slots.acquire()  # pylint: disable=consider-using-with
+        future = asyncio.run_coroutine_threadsafe(
+            self.post(path, body, headers), self.loop
+        )
+        with self.lock:
+            self.pending.add(future)
+        future.add_done_callback(functools.partial(self.request_done, callback))
+        return True
+
+    def send(self, path, body, headers):
+        """Send the request, and wait for the response. It returns `True` if the collector accepted it"""
+        if self.closed:
+            return False
+        future = asyncio.run_coroutine_threadsafe(
+            self.post(path, body, headers), self.loop
+        )
+        try:
+            return future.result(self.timeout_sec)
+        except (httpx.HTTPError, concurrent.futures.TimeoutError) as error:
+            future.cancel()
+            logger.warning("Failed to export to %s%s: %s", self.base_url, path, error)
+            return False
+
+    async def post(self, path, body, headers):
+        """Post the request body to the collector"""
+        response = await self.client.post(path, content=body, headers=headers)
+        if not response.is_success:
+            logger.warning(
+                "Failed to export to %s%s, status code: %s",
+                self.base_url,
+                path,
+                response.status_code,
+            )
+        return response.is_success
+
+    def request_done(self, callback, future):
+        """Release the slot of the finished request, and report its result to the callback"""
+        self.slots.release()
+        succeeded = False
+        if not future.cancelled():
+            if future.exception() is not None:
+                logger.warning(
+                    "Failed to export to %s: %s", self.base_url, future.exception()
+                )
+            else:
+                succeeded = future.result()
+        try:
+            if callback is not None:
+                callback(succeeded)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("The completion callback of the export failed")
+        finally:
+            with self.lock:
+                self.pending.discard(future)
+                self.lock.notify_all()
+
+    def flush(self, timeout_sec=None):
+        """
+        Wait for the requests in flight and their completion callbacks to finish.
+        It returns `True` if all of them finished in time
+        """
+        with self.lock:
+            pending = set(self.pending)
+            return self.lock.wait_for(
+                lambda: self.pending.isdisjoint(pending), timeout_sec
+            )
+
+    def acquire(self):
+        """Register a new user of the shared transport"""
+        with self.lock:
+            self.references += 1
+        return self
+
+    def release(self, timeout_sec=None):
+        """Unregister a user of the shared transport, and close it when the last user is gone"""
+        with self.lock:
+            self.references -= 1
+            if self.references > 0:
+                return
+        self.close(timeout_sec)
+
+    def close(self, timeout_sec=None):
+        """Wait for the requests in flight, then close the connections and stop the event loop"""
+        if self.closed:
+            return
+        self.closed = True
+        self.flush(timeout_sec)
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result(
+            timeout_sec
+        )
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout_sec)
+        with SHARED_TRANSPORTS_LOCK:
+            if SHARED_TRANSPORTS.get(self.key) is self:
+                del SHARED_TRANSPORTS[self.key]
+
+
+SHARED_TRANSPORTS = {}
+SHARED_TRANSPORTS_LOCK = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    # The event loop threads of the parent process do not exist in the forked child
+    os.register_at_fork(after_in_child=SHARED_TRANSPORTS.clear)
+
+
+def get_shared_transport(
+    base_url, max_in_flight, timeout_sec=DEFAULT_TIMEOUT_SEC, headers=None
+):
+    """Get the transport that is shared by the exporters sending to the same collector"""
+    key = (base_url, max_in_flight, timeout_sec, tuple((headers or {}).items()))
+    with SHARED_TRANSPORTS_LOCK:
+        transport = SHARED_TRANSPORTS.get(key)
+        if transport is None or transport.closed:
+            transport = AsyncOTLPHTTPTransport(
+                base_url, max_in_flight, timeout_sec, headers
+            )
+            SHARED_TRANSPORTS[key] = transport
+        return transport.acquire()
+
+
+def get_request_callback(exporter, request, batch):
+    """Get the transport callback, that reports the result of the request to the completion callback of the exporter"""
+    completion_callback = exporter.completion_callback
+    if completion_callback is None:
+        return None
+    return lambda succeeded: completion_callback(succeeded, request, batch)
+
+
+def create_request(message, encoding, compression):
+    """Create the body and the headers of an export request"""
+    body = encode_message(message, encoding)
+    headers = {"Content-Type": CONTENT_TYPES[encoding]}
+    if compression in COMPRESSORS:
+        content_encoding, compress = COMPRESSORS[compression]
+        body = compress(body)
+        headers["Content-Encoding"] = content_encoding
+    return body, headers
+
+
+class AsyncOTLPHTTPSpanExporter(SpanExporter):
+    """Span exporter that sends the spans via the shared asyncio OTLP/HTTP transport"""
+
+    # The result of the requests is reported to the `completion_callback`, not returned by `export()`
+    deferred_results = True
+
+    def __init__(self, transport, encoding="PROTOBUF", compression="NONE"):
+        """Constructor of the span exporter"""
+        self.transport = transport
+        self.encoding = encoding.upper()
+        self.compression = compression.upper()
+        self.is_shutdown = False
+        self.completion_callback = None
+
+    def export(self, spans):
+        """Encode the spans and pass them to the transport. `SUCCESS` means that the request is queued"""
+        if self.is_shutdown:
+            return SpanExportResult.FAILURE
+        request = encode_spans(spans)
+        body, headers = create_request(request, self.encoding, self.compression)
+        callback = get_request_callback(self, request, spans)
+        if self.transport.submit(TRACES_PATH, body, headers, callback):
+            return SpanExportResult.SUCCESS
+        return SpanExportResult.FAILURE
+
+    def export_serialized(self, body):
+        """Send an already serialized trace export request, and wait for the response"""
+        body, headers = create_request(
+            ExportTraceServiceRequest.FromString(body), self.encoding, self.compression
+        )
+        return self.transport.send(TRACES_PATH, body, headers)
+
+    def force_flush(self, timeout_millis=30000):
+        """Wait for the requests in flight"""
+        return self.transport.flush(timeout_millis / 1e3)
+
+    def shutdown(self):
+        """Wait for the requests in flight, then release the shared transport"""
+        if not self.is_shutdown:
+            self.is_shutdown = True
+            self.transport.flush(self.transport.timeout_sec)
+            self.transport.release()
+
+
+class AsyncOTLPHTTPMetricExporter(MetricExporter):
+    """Metric exporter that sends the metrics via the shared asyncio OTLP/HTTP transport"""
+
+    # The result of the requests is reported to the `completion_callback`, not returned by `export()`
+    deferred_results = True
+
+    def __init__(self, transport, encoding="PROTOBUF", compression="NONE"):
+        """Constructor of the metric exporter"""
+        super().__init__()
+        self.transport = transport
+        self.encoding = encoding.upper()
+        self.compression = compression.upper()
+        self.is_shutdown = False
+        self.completion_callback = None
+
+    def export(self, metrics_data, timeout_millis=10_000, **kwargs):
+        """Encode the metrics and pass them to the transport. `SUCCESS` means that the request is queued"""
+        if self.is_shutdown:
+            return MetricExportResult.FAILURE
+        request = encode_metrics(metrics_data)
+        body, headers = create_request(request, self.encoding, self.compression)
+        callback = get_request_callback(self, request, metrics_data)
+        if self.transport.submit(METRICS_PATH, body, headers, callback):
+            return MetricExportResult.SUCCESS
+        return MetricExportResult.FAILURE
+
+    def export_serialized(self, body):
+        """Send an already serialized metric export request, and wait for the response"""
+        body, headers = create_request(
+            ExportMetricsServiceRequest.FromString(body),
+            self.encoding,
+            self.compression,
+        )
+        return self.transport.send(METRICS_PATH, body, headers)
+
+    def force_flush(self, timeout_millis=10_000):
+        """Wait for the requests in flight"""
+        return self.transport.flush(timeout_millis / 1e3)
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        """Wait for the requests in flight, then release the shared transport"""
+        if not self.is_shutdown:
+            self.is_shutdown = True
+            self.transport.flush(timeout_millis / 1e3)
+            self.transport.release(timeout_millis / 1e3)
@@ -1,5 +1,6 @@
 """The OTI configuration class"""
 
+import copy
 import dataclasses
 import uuid
 import os
@@ -7,15 +8,70 @@ import os
 DEFAULT_SERVICE_NAME = "UNDEFINED_SERVICE"
 DEFAULT_SERVICE_NAMESPACE = "UNDEFINED_SERVICE_NS"
 DEFAULT_SERVICE_VERSION = "UNDEFINED_SERVICE_VERSION"
-DEFAULT_OTEL_EXPORTER_TYPE = "STDOUT"  # STDOUT | OTLPGRPC | OTLPHTTP
+DEFAULT_OTEL_EXPORTER_TYPE = "STDOUT"  # STDOUT | OTLPGRPC | OTLPHTTP | OTLPHTTP_ASYNC
 DEFAULT_OTEL_EXPORTER_URL = "http://localhost:4317"  # "http://localhost:4318/v1/traces"
-DEFAULT_SPAN_PROCESSOR_TYPE = "SIMPLE"  # SIMPLE | BATCH
+DEFAULT_OTEL_EXPORTER_ENCODING = "PROTOBUF"  # PROTOBUF | JSON
+DEFAULT_OTEL_EXPORTER_MAX_IN_FLIGHT = "4"
+DEFAULT_OTEL_EXPORTER_COMPRESSION = "NONE"  # NONE | GZIP | DEFLATE
+DEFAULT_OTEL_EXPORTER_TIMEOUT_MILLIS = "10000"
+DEFAULT_OTEL_EXPORTER_CIRCUIT_BREAKER_ENABLED = "false"
+DEFAULT_OTEL_EXPORTER_CIRCUIT_BREAKER_FAILURE_THRESHOLD = "3"
+DEFAULT_OTEL_EXPORTER_BACKOFF_INITIAL_MILLIS = "500"
+DEFAULT_OTEL_EXPORTER_BACKOFF_MAX_MILLIS = "10000"
+DEFAULT_SPAN_PROCESSOR_TYPE = "SIMPLE"  # SIMPLE | BATCH | ADAPTIVE | TAIL | DISABLED
+DEFAULT_OTEL_TAIL_SAMPLING_DECISION_WAIT_MILLIS = "30000"
+DEFAULT_OTEL_TAIL_SAMPLING_MAX_BUFFERED_SPANS = "100000"
+DEFAULT_OTEL_TAIL_SAMPLING_LATENCY_THRESHOLD_MILLIS = "1000"
+DEFAULT_OTEL_TAIL_SAMPLING_RATIO = "0.1"
 # ALWAYS_OFF | ALWAYS_ON | TRACEIDRATIO | PARENTBASED | PARENTBASED_ALWAYS_OFF | PARENTBASED_ALWAYS_ON | PARENTBASED_TRACEIDRATIO
+# | RATELIMITED | PARENTBASED_RATELIMITED | ADAPTIVE_RATELIMITED | PARENTBASED_ADAPTIVE_RATELIMITED
 DEFAULT_OTEL_SAMPLING_TYPE = "PARENTBASED_ALWAYS_ON"
 DEFAULT_OTEL_SAMPLING_RATIO = "1.0"
-DEFAULT_OTEL_METRIC_EXPORTER_MODE = "ENDPOINT"  # ENDPOINT | PERIODIC | BOTH
+DEFAULT_OTEL_METRIC_EXPORTER_MODE = "ENDPOINT"  # ENDPOINT | PERIODIC | BOTH | DISABLED
 DEFAULT_OTEL_METRIC_EXPORTER_ENDPOINT_ADDR = "localhost"
 DEFAULT_OTEL_METRIC_EXPORTER_ENDPOINT_PORT = "9464"
+DEFAULT_OTEL_METRIC_EXPORTER_ENDPOINT_CACHE_TTL_MILLIS = "1000"
+DEFAULT_OTEL_METRIC_EXPORTER_ENDPOINT_SERVER_ENABLED = "true"
+DEFAULT_OTEL_MULTIPROCESS_ENABLED = "false"
+DEFAULT_OTEL_MULTIPROCESS_SYNC_INTERVAL_MILLIS = "1000"
+DEFAULT_OTEL_SELF_TELEMETRY_ENABLED = "false"
+DEFAULT_OTEL_SDK_DISABLED = "false"
+DEFAULT_OTEL_SPOOL_ENABLED = "false"
+DEFAULT_OTEL_SPOOL_MAX_BYTES = "67108864"
+DEFAULT_OTEL_SPOOL_SEGMENT_BYTES = "4194304"
+DEFAULT_OTEL_SPOOL_REPLAY_INTERVAL_MILLIS = "5000"
+DEFAULT_OTEL_SPOOL_REPLAY_BATCH_BYTES = "1048576"
+DEFAULT_OTEL_METRIC_MAX_SERIES_PER_INSTRUMENT = "2000"
+DEFAULT_OTEL_CONFIG_RELOAD_INTERVAL_MILLIS = "5000"
+DEFAULT_OTEL_FLUSH_TIMEOUT_MILLIS = "5000"
+DEFAULT_OTEL_SPAN_METRICS_ENABLED = "false"
+DEFAULT_OTEL_EXPORTER_FILE_MAX_BYTES = "67108864"
+DEFAULT_OTEL_EXPORTER_FILE_MAX_FILES = "16"
+DEFAULT_OTEL_EXPORTER_FILE_ROTATE_INTERVAL_MILLIS = "600000"
+DEFAULT_OTEL_EXPORTER_FILE_BUFFER_BYTES = "1048576"
+DEFAULT_OTEL_EXPORTER_CONSOLE_FORMAT = "PRETTY"  # PRETTY | NDJSON
+DEFAULT_OTEL_EXPORTER_CONSOLE_FD = "1"
+DEFAULT_OTEL_EXPORTER_CONSOLE_FLUSH_INTERVAL_MILLIS = "200"
+DEFAULT_OTEL_EXPORTER_CONSOLE_MAX_BUFFER_BYTES = "8388608"
+DEFAULT_OTEL_METRIC_TEMPORALITY = (
+    ""  # CUMULATIVE | DELTA | LOWMEMORY, and/or <instrument kind>=<temporality> pairs
+)
+DEFAULT_OTEL_METRIC_HISTOGRAM_AGGREGATION = "EXPLICIT"  # EXPLICIT | EXPONENTIAL
+DEFAULT_OTEL_METRIC_EXPONENTIAL_HISTOGRAM_MAX_SCALE = "20"
+DEFAULT_OTEL_METRIC_EXPONENTIAL_HISTOGRAM_MAX_SIZE = "160"
+# The temporalities of the instrument kinds by the presets of the OTEL_METRIC_TEMPORALITY
+TEMPORALITY_PRESETS = {
+    "CUMULATIVE": {},
+    "DELTA": {
+        "COUNTER": "DELTA",
+        "HISTOGRAM": "DELTA",
+        "OBSERVABLE_COUNTER": "DELTA",
+    },
+    "LOWMEMORY": {
+        "COUNTER": "DELTA",
+        "HISTOGRAM": "DELTA",
+    },
+}
 
 
 @dataclasses.dataclass
@@ -46,17 +102,179 @@ class PeriodicMetricReaderConfig:
         )
 
 
+@dataclasses.dataclass
+class BatchSpanProcessorConfig:
+    """The configuration parameters of the batch (and adaptive batch) span processor
+
+    The parameters that are left undefined will get the default values of the OTEL SDK.
+    """
+
+    max_queue_size: int
+    schedule_delay_millis: int
+    max_export_batch_size: int
+    export_timeout_millis: int
+
+    def __init__(
+        self,
+        max_queue_size=None,
+        schedule_delay_millis=None,
+        max_export_batch_size=None,
+        export_timeout_millis=None,
+    ):
+        """The Constructor of batch span processor configuration class"""
+        self.max_queue_size = get_init_int_value(
+            max_queue_size, None, "OTEL_BSP_MAX_QUEUE_SIZE"
+        )
+        self.schedule_delay_millis = get_init_int_value(
+            schedule_delay_millis, None, "OTEL_BSP_SCHEDULE_DELAY"
+        )
+        self.max_export_batch_size = get_init_int_value(
+            max_export_batch_size, None, "OTEL_BSP_MAX_EXPORT_BATCH_SIZE"
+        )
+        self.export_timeout_millis = get_init_int_value(
+            export_timeout_millis, None, "OTEL_BSP_EXPORT_TIMEOUT"
+        )
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f"BatchSpanProcessorConfig(max_queue_size={self.max_queue_size},"
+            f" schedule_delay_millis={self.schedule_delay_millis},"
+            f" max_export_batch_size={self.max_export_batch_size},"
+            f" export_timeout_millis={self.export_timeout_millis})"
+        )
+
+
+@dataclasses.dataclass
+class SpanLimitsConfig:
+    """The configuration parameters of the span limits
+
+    The parameters that are left undefined will get the default values of the OTEL SDK.
+    """
+
+    max_attributes: int
+    max_span_attributes: int
+    max_event_attributes: int
+    max_link_attributes: int
+    max_events: int
+    max_links: int
+    max_attribute_length: int
+    max_span_attribute_length: int
+
+    def __init__(
+        self,
+        max_attributes=None,
+        max_span_attributes=None,
+        max_event_attributes=None,
+        max_link_attributes=None,
+        max_events=None,
+        max_links=None,
+        max_attribute_length=None,
+        max_span_attribute_length=None,
+    ):  # pylint: disable=too-many-positional-arguments
+        """The Constructor of span limits configuration class"""
+        self.max_attributes = get_init_int_value(
+            max_attributes, None, "OTEL_ATTRIBUTE_COUNT_LIMIT"
+        )
+        self.max_span_attributes = get_init_int_value(
+            max_span_attributes, None, "OTEL_SPAN_ATTRIBUTE_COUNT_LIMIT"
+        )
+        self.max_event_attributes = get_init_int_value(
+            max_event_attributes, None, "OTEL_EVENT_ATTRIBUTE_COUNT_LIMIT"
+        )
+        self.max_link_attributes = get_init_int_value(
+            max_link_attributes, None, "OTEL_LINK_ATTRIBUTE_COUNT_LIMIT"
+        )
+        self.max_events = get_init_int_value(
+            max_events, None, "OTEL_SPAN_EVENT_COUNT_LIMIT"
+        )
+        self.max_links = get_init_int_value(
+            max_links, None, "OTEL_SPAN_LINK_COUNT_LIMIT"
+        )
+        self.max_attribute_length = get_init_int_value(
+            max_attribute_length, None, "OTEL_ATTRIBUTE_VALUE_LENGTH_LIMIT"
+        )
+        self.max_span_attribute_length = get_init_int_value(
+            max_span_attribute_length, None, "OTEL_SPAN_ATTRIBUTE_VALUE_LENGTH_LIMIT"
+        )
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f"SpanLimitsConfig(max_attributes={self.max_attributes},"
+            f" max_span_attributes={self.max_span_attributes},"
+            f" max_event_attributes={self.max_event_attributes},"
+            f" max_link_attributes={self.max_link_attributes},"
+            f" max_events={self.max_events},"
+            f" max_links={self.max_links},"
+            f" max_attribute_length={self.max_attribute_length},"
+            f" max_span_attribute_length={self.max_span_attribute_length})"
+        )
+
+
+@dataclasses.dataclass
+class TailSamplingConfig:
+    """The configuration parameters of the tail-based sampling span processor"""
+
+    decision_wait_millis: int
+    max_buffered_spans: int
+    latency_threshold_millis: float
+    sampling_ratio: float
+
+    def __init__(
+        self,
+        decision_wait_millis=None,
+        max_buffered_spans=None,
+        latency_threshold_millis=None,
+        sampling_ratio=None,
+    ):
+        """The Constructor of tail sampling configuration class"""
+        self.decision_wait_millis = get_init_int_value(
+            decision_wait_millis,
+            DEFAULT_OTEL_TAIL_SAMPLING_DECISION_WAIT_MILLIS,
+            "OTEL_TAIL_SAMPLING_DECISION_WAIT_MILLIS",
+        )
+        self.max_buffered_spans = get_init_int_value(
+            max_buffered_spans,
+            DEFAULT_OTEL_TAIL_SAMPLING_MAX_BUFFERED_SPANS,
+            "OTEL_TAIL_SAMPLING_MAX_BUFFERED_SPANS",
+        )
+        self.latency_threshold_millis = get_init_float_value(
+            latency_threshold_millis,
+            DEFAULT_OTEL_TAIL_SAMPLING_LATENCY_THRESHOLD_MILLIS,
+            "OTEL_TAIL_SAMPLING_LATENCY_THRESHOLD_MILLIS",
+        )
+        self.sampling_ratio = get_init_float_value(
+            sampling_ratio,
+            DEFAULT_OTEL_TAIL_SAMPLING_RATIO,
+            "OTEL_TAIL_SAMPLING_RATIO",
+        )
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f"TailSamplingConfig(decision_wait_millis={self.decision_wait_millis},"
+            f" max_buffered_spans={self.max_buffered_spans},"
+            f" latency_threshold_millis={self.latency_threshold_millis},"
+            f" sampling_ratio={self.sampling_ratio})"
+        )
+
+
 @dataclasses.dataclass
 class MetricReaderEndpointConfig:
     """The Constructor of exporter configuration class"""
 
     endpoint_addr: str
     endpoint_port: str
+    cache_ttl_millis: int
+    server_enabled: bool
 
     def __init__(
         self,
         endpoint_addr=None,
         endpoint_port=None,
+        cache_ttl_millis=None,
+        server_enabled=None,
     ):
         """The Constructor of exporter configuration class"""
         self.endpoint_addr = get_init_value(
@@ -69,12 +287,449 @@ class MetricReaderEndpointConfig:
             DEFAULT_OTEL_METRIC_EXPORTER_ENDPOINT_PORT,
             "OTEL_METRIC_EXPORTER_ENDPOINT_PORT",
         )
+        self.cache_ttl_millis = get_init_int_value(
+            cache_ttl_millis,
+            DEFAULT_OTEL_METRIC_EXPORTER_ENDPOINT_CACHE_TTL_MILLIS,
+            "OTEL_METRIC_EXPORTER_ENDPOINT_CACHE_TTL_MILLIS",
+        )
+        self.server_enabled = get_init_bool_value(
+            server_enabled,
+            DEFAULT_OTEL_METRIC_EXPORTER_ENDPOINT_SERVER_ENABLED,
+            "OTEL_METRIC_EXPORTER_ENDPOINT_SERVER_ENABLED",
+        )
 
     def __str__(self):
         """Serialize the object to string"""
         return (
             f'MetricReaderEndpointConfig(endpoint_addr="{self.endpoint_addr}",'
-            f" endpoint_port={self.endpoint_port})"
+            f" endpoint_port={self.endpoint_port},"
+            f" cache_ttl_millis={self.cache_ttl_millis},"
+            f" server_enabled={self.server_enabled})"
+        )
+
+
+@dataclasses.dataclass
+class MultiprocessConfig:
+    """The configuration parameters of the multi-process (pre-fork server) mode"""
+
+    enabled: bool
+    multiprocess_dir: str
+    sync_interval_millis: int
+
+    def __init__(
+        self,
+        enabled=None,
+        multiprocess_dir=None,
+        sync_interval_millis=None,
+    ):
+        """The Constructor of multi-process configuration class"""
+        self.enabled = get_init_bool_value(
+            enabled, DEFAULT_OTEL_MULTIPROCESS_ENABLED, "OTEL_MULTIPROCESS_ENABLED"
+        )
+        self.multiprocess_dir = get_init_value(
+            multiprocess_dir, None, "PROMETHEUS_MULTIPROC_DIR"
+        )
+        self.sync_interval_millis = get_init_int_value(
+            sync_interval_millis,
+            DEFAULT_OTEL_MULTIPROCESS_SYNC_INTERVAL_MILLIS,
+            "OTEL_MULTIPROCESS_SYNC_INTERVAL_MILLIS",
+        )
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f"MultiprocessConfig(enabled={self.enabled},"
+            f' multiprocess_dir="{self.multiprocess_dir}",'
+            f" sync_interval_millis={self.sync_interval_millis})"
+        )
+
+
+@dataclasses.dataclass
+class SpoolConfig:
+    """The configuration parameters of the disk-backed spool of the failed exports"""
+
+    enabled: bool
+    spool_dir: str
+    max_bytes: int
+    segment_bytes: int
+    replay_interval_millis: int
+    replay_batch_bytes: int
+
+    def __init__(
+        self,
+        enabled=None,
+        spool_dir=None,
+        max_bytes=None,
+        segment_bytes=None,
+        replay_interval_millis=None,
+        replay_batch_bytes=None,
+    ):  # pylint: disable=too-many-positional-arguments
+        """The Constructor of spool configuration class"""
+        self.enabled = get_init_bool_value(
+            enabled, DEFAULT_OTEL_SPOOL_ENABLED, "OTEL_SPOOL_ENABLED"
+        )
+        self.spool_dir = get_init_value(spool_dir, None, "OTEL_SPOOL_DIR")
+        self.max_bytes = get_init_int_value(
+            max_bytes, DEFAULT_OTEL_SPOOL_MAX_BYTES, "OTEL_SPOOL_MAX_BYTES"
+        )
+        self.segment_bytes = get_init_int_value(
+            segment_bytes, DEFAULT_OTEL_SPOOL_SEGMENT_BYTES, "OTEL_SPOOL_SEGMENT_BYTES"
+        )
+        self.replay_interval_millis = get_init_int_value(
+            replay_interval_millis,
+            DEFAULT_OTEL_SPOOL_REPLAY_INTERVAL_MILLIS,
+            "OTEL_SPOOL_REPLAY_INTERVAL_MILLIS",
+        )
+        self.replay_batch_bytes = get_init_int_value(
+            replay_batch_bytes,
+            DEFAULT_OTEL_SPOOL_REPLAY_BATCH_BYTES,
+            "OTEL_SPOOL_REPLAY_BATCH_BYTES",
+        )
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f"SpoolConfig(enabled={self.enabled},"
+            f' spool_dir="{self.spool_dir}",'
+            f" max_bytes={self.max_bytes},"
+            f" segment_bytes={self.segment_bytes},"
+            f" replay_interval_millis={self.replay_interval_millis},"
+            f" replay_batch_bytes={self.replay_batch_bytes})"
+        )
+
+
+@dataclasses.dataclass
+class FileExporterConfig:
+    """
+    The configuration parameters of the files of the OTLPFILE exporter
+
+    A file is rotated when it reaches `max_file_bytes`, or it is older than `rotate_interval_millis` (`0` disables it).
+    At most `max_files` files are kept per signal (`0` keeps all of them), the oldest ones are deleted.
+    """
+
+    file_dir: str
+    max_file_bytes: int
+    max_files: int
+    rotate_interval_millis: int
+    buffer_bytes: int
+
+    def __init__(
+        self,
+        file_dir=None,
+        max_file_bytes=None,
+        max_files=None,
+        rotate_interval_millis=None,
+        buffer_bytes=None,
+    ):  # pylint: disable=too-many-positional-arguments
+        """The Constructor of file exporter configuration class"""
+        self.file_dir = get_init_value(file_dir, None, "OTEL_EXPORTER_FILE_DIR")
+        self.max_file_bytes = get_init_int_value(
+            max_file_bytes,
+            DEFAULT_OTEL_EXPORTER_FILE_MAX_BYTES,
+            "OTEL_EXPORTER_FILE_MAX_BYTES",
+        )
+        self.max_files = get_init_int_value(
+            max_files,
+            DEFAULT_OTEL_EXPORTER_FILE_MAX_FILES,
+            "OTEL_EXPORTER_FILE_MAX_FILES",
+        )
+        self.rotate_interval_millis = get_init_int_value(
+            rotate_interval_millis,
+            DEFAULT_OTEL_EXPORTER_FILE_ROTATE_INTERVAL_MILLIS,
+            "OTEL_EXPORTER_FILE_ROTATE_INTERVAL_MILLIS",
+        )
+        self.buffer_bytes = get_init_int_value(
+            buffer_bytes,
+            DEFAULT_OTEL_EXPORTER_FILE_BUFFER_BYTES,
+            "OTEL_EXPORTER_FILE_BUFFER_BYTES",
+        )
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f'FileExporterConfig(file_dir="{self.file_dir}",'
+            f" max_file_bytes={self.max_file_bytes},"
+            f" max_files={self.max_files},"
+            f" rotate_interval_millis={self.rotate_interval_millis},"
+            f" buffer_bytes={self.buffer_bytes})"
+        )
+
+
+@dataclasses.dataclass
+class ConsoleExporterConfig:
+    """
+    The configuration parameters of the console exporters of the STDOUT exporter type
+
+    The `"PRETTY"` output format is the indented JSON of the console exporters of the OTEL SDK.
+    The `"NDJSON"` one is a compact JSON line per span and metric data point, that is written into the `fd`
+    file descriptor by a background thread every `flush_interval_millis`, buffering at most `max_buffer_bytes`.
+    """
+
+    output_format: str
+    fd: int
+    flush_interval_millis: int
+    max_buffer_bytes: int
+
+    def __init__(
+        self,
+        output_format=None,
+        fd=None,
+        flush_interval_millis=None,
+        max_buffer_bytes=None,
+    ):
+        """The Constructor of console exporter configuration class"""
+        self.output_format = get_init_value(
+            output_format,
+            DEFAULT_OTEL_EXPORTER_CONSOLE_FORMAT,
+            "OTEL_EXPORTER_CONSOLE_FORMAT",
+        )
+        self.fd = get_init_int_value(
+            fd, DEFAULT_OTEL_EXPORTER_CONSOLE_FD, "OTEL_EXPORTER_CONSOLE_FD"
+        )
+        self.flush_interval_millis = get_init_int_value(
+            flush_interval_millis,
+            DEFAULT_OTEL_EXPORTER_CONSOLE_FLUSH_INTERVAL_MILLIS,
+            "OTEL_EXPORTER_CONSOLE_FLUSH_INTERVAL_MILLIS",
+        )
+        self.max_buffer_bytes = get_init_int_value(
+            max_buffer_bytes,
+            DEFAULT_OTEL_EXPORTER_CONSOLE_MAX_BUFFER_BYTES,
+            "OTEL_EXPORTER_CONSOLE_MAX_BUFFER_BYTES",
+        )
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f'ConsoleExporterConfig(output_format="{self.output_format}",'
+            f" fd={self.fd},"
+            f" flush_interval_millis={self.flush_interval_millis},"
+            f" max_buffer_bytes={self.max_buffer_bytes})"
+        )
+
+
+@dataclasses.dataclass
+class ReloadConfig:
+    """
+    The configuration parameters of the reloading of the sampling and span processor settings
+
+    The `reload_file` holds `NAME=VALUE` lines with the names of the environment variables of the reloadable settings.
+    It is checked every `reload_interval_millis` (`0` disables the polling), and reloaded when the `reload_signal`
+    (e.g. `"SIGHUP"`) is received.
+    """
+
+    reload_file: str
+    reload_interval_millis: int
+    reload_signal: str
+
+    def __init__(
+        self,
+        reload_file=None,
+        reload_interval_millis=None,
+        reload_signal=None,
+    ):
+        """The Constructor of reload configuration class"""
+        self.reload_file = get_init_value(reload_file, None, "OTEL_CONFIG_RELOAD_FILE")
+        self.reload_interval_millis = get_init_int_value(
+            reload_interval_millis,
+            DEFAULT_OTEL_CONFIG_RELOAD_INTERVAL_MILLIS,
+            "OTEL_CONFIG_RELOAD_INTERVAL_MILLIS",
+        )
+        self.reload_signal = get_init_value(
+            reload_signal, None, "OTEL_CONFIG_RELOAD_SIGNAL"
+        )
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f'ReloadConfig(reload_file="{self.reload_file}",'
+            f" reload_interval_millis={self.reload_interval_millis},"
+            f' reload_signal="{self.reload_signal}")'
+        )
+
+
+@dataclasses.dataclass
+class SpanMetricsConfig:
+    """
+    The configuration parameters of the span metrics (calls, errors and duration per operation)
+
+    The `attribute_keys` list (or comma separated string) holds the span attributes the metrics are keyed by,
+    in addition to the span name, kind and status code, e.g. `"http.route,http.request.method"`.
+    """
+
+    enabled: bool
+    attribute_keys: list
+
+    def __init__(self, enabled=None, attribute_keys=None):
+        """The Constructor of span metrics configuration class"""
+        self.enabled = get_init_bool_value(
+            enabled, DEFAULT_OTEL_SPAN_METRICS_ENABLED, "OTEL_SPAN_METRICS_ENABLED"
+        )
+        attribute_keys = get_init_value(
+            attribute_keys, "", "OTEL_SPAN_METRICS_ATTRIBUTES"
+        )
+        if isinstance(attribute_keys, str):
+            attribute_keys = attribute_keys.split(",")
+        self.attribute_keys = [key.strip() for key in attribute_keys if key.strip()]
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f"SpanMetricsConfig(enabled={self.enabled},"
+            f" attribute_keys={self.attribute_keys})"
+        )
+
+
+@dataclasses.dataclass
+class FlushConfig:
+    """
+    The configuration parameters of the flush and the shutdown of the instrumentation
+
+    The `timeout_millis` is the default deadline of `OTI.force_flush()` and `OTI.shutdown()`.
+    The `flush_signals` list (or comma separated string) holds the signals that trigger a flush, e.g. `"SIGUSR1,SIGTERM"`.
+    """
+
+    timeout_millis: int
+    flush_signals: list
+
+    def __init__(self, timeout_millis=None, flush_signals=None):
+        """The Constructor of flush configuration class"""
+        self.timeout_millis = get_init_int_value(
+            timeout_millis,
+            DEFAULT_OTEL_FLUSH_TIMEOUT_MILLIS,
+            "OTEL_FLUSH_TIMEOUT_MILLIS",
+        )
+        flush_signals = get_init_value(flush_signals, "", "OTEL_FLUSH_SIGNALS")
+        if isinstance(flush_signals, str):
+            flush_signals = flush_signals.split(",")
+        self.flush_signals = [name.strip() for name in flush_signals if name.strip()]
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f"FlushConfig(timeout_millis={self.timeout_millis},"
+            f" flush_signals={self.flush_signals})"
+        )
+
+
+@dataclasses.dataclass
+class MetricAggregationConfig:
+    """
+    The configuration parameters of the aggregation and the temporality of the periodically exported metrics
+
+    The `temporality` is a preset (`"CUMULATIVE"`, `"DELTA"` or `"LOWMEMORY"`) and/or comma separated
+    `<instrument kind>=<temporality>` pairs, e.g. `"DELTA,UP_DOWN_COUNTER=CUMULATIVE"`, where the instrument kinds are
+    `COUNTER`, `UP_DOWN_COUNTER`, `HISTOGRAM`, `GAUGE`, `OBSERVABLE_COUNTER`, `OBSERVABLE_UP_DOWN_COUNTER`
+    and `OBSERVABLE_GAUGE`. It is resolved to a dict of the instrument kinds that differ from the exporter defaults.
+    """
+
+    temporality: dict
+    histogram_aggregation: str
+    exponential_histogram_max_scale: int
+    exponential_histogram_max_size: int
+
+    def __init__(
+        self,
+        temporality=None,
+        histogram_aggregation=None,
+        exponential_histogram_max_scale=None,
+        exponential_histogram_max_size=None,
+    ):
+        """The Constructor of metric aggregation configuration class"""
+        temporality = get_init_value(
+            temporality, DEFAULT_OTEL_METRIC_TEMPORALITY, "OTEL_METRIC_TEMPORALITY"
+        )
+        if isinstance(temporality, str):
+            self.temporality = {}
+            for item in temporality.split(","):
+                item = item.strip().upper()
+                if "=" in item:
+                    self.temporality.update(parse_key_value_pairs(item))
+                elif item in TEMPORALITY_PRESETS:
+                    self.temporality.update(TEMPORALITY_PRESETS[item])
+                elif item:
+                    raise OTIConfigError(f'Unknown OTEL metric temporality: "{item}"')
+        else:
+            self.temporality = dict(temporality)
+        self.histogram_aggregation = get_init_value(
+            histogram_aggregation,
+            DEFAULT_OTEL_METRIC_HISTOGRAM_AGGREGATION,
+            "OTEL_METRIC_HISTOGRAM_AGGREGATION",
+        )
+        self.exponential_histogram_max_scale = get_init_int_value(
+            exponential_histogram_max_scale,
+            DEFAULT_OTEL_METRIC_EXPONENTIAL_HISTOGRAM_MAX_SCALE,
+            "OTEL_METRIC_EXPONENTIAL_HISTOGRAM_MAX_SCALE",
+        )
+        self.exponential_histogram_max_size = get_init_int_value(
+            exponential_histogram_max_size,
+            DEFAULT_OTEL_METRIC_EXPONENTIAL_HISTOGRAM_MAX_SIZE,
+            "OTEL_METRIC_EXPONENTIAL_HISTOGRAM_MAX_SIZE",
+        )
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f"MetricAggregationConfig(temporality={self.temporality},"
+            f' histogram_aggregation="{self.histogram_aggregation}",'
+            f" exponential_histogram_max_scale={self.exponential_histogram_max_scale},"
+            f" exponential_histogram_max_size={self.exponential_histogram_max_size})"
+        )
+
+
+@dataclasses.dataclass
+class MetricViewsConfig:
+    """
+    The configuration parameters of the metric views and the cardinality limits
+
+    The `attribute_allowlist` maps instrument names to the attribute keys that are kept, e.g.
+    `{"http.server.duration": ["http.method", "http.route"]}`, or as a string
+    `"http.server.duration=http.method|http.route,rpc.*=rpc.method"`.
+    The `drop_instruments` list (or comma separated string) holds the names of the instruments that are not exported.
+    The instrument names may contain `*` and `?` wildcards.
+    """
+
+    attribute_allowlist: dict
+    max_series_per_instrument: int
+    drop_instruments: list
+
+    def __init__(
+        self,
+        attribute_allowlist=None,
+        max_series_per_instrument=None,
+        drop_instruments=None,
+    ):
+        """The Constructor of metric views configuration class"""
+        attribute_allowlist = parse_key_value_pairs(
+            get_init_value(attribute_allowlist, "", "OTEL_METRIC_ATTRIBUTE_ALLOWLIST")
+        )
+        self.attribute_allowlist = {
+            instrument_name: (
+                [key.strip() for key in keys.split("|") if key.strip()]
+                if isinstance(keys, str)
+                else list(keys)
+            )
+            for instrument_name, keys in attribute_allowlist.items()
+        }
+        self.max_series_per_instrument = get_init_int_value(
+            max_series_per_instrument,
+            DEFAULT_OTEL_METRIC_MAX_SERIES_PER_INSTRUMENT,
+            "OTEL_METRIC_MAX_SERIES_PER_INSTRUMENT",
+        )
+        drop_instruments = get_init_value(
+            drop_instruments, "", "OTEL_METRIC_DROP_INSTRUMENTS"
+        )
+        if isinstance(drop_instruments, str):
+            drop_instruments = drop_instruments.split(",")
+        self.drop_instruments = [
+            name.strip() for name in drop_instruments if name.strip()
+        ]
+
+    def __str__(self):
+        """Serialize the object to string"""
+        return (
+            f"MetricViewsConfig(attribute_allowlist={self.attribute_allowlist},"
+            f" max_series_per_instrument={self.max_series_per_instrument},"
+            f" drop_instruments={self.drop_instruments})"
         )
 
 
@@ -84,23 +739,106 @@ class ExporterConfig:
 
     exporter_type: str
     exporter_url: str
+    exporter_encoding: str
+    exporter_max_in_flight: int
+    exporter_compression: str
+    exporter_timeout_millis: int
+    exporter_headers: dict
+    exporter_channel_options: dict
+    exporter_circuit_breaker_enabled: bool
+    exporter_circuit_breaker_failure_threshold: int
+    exporter_backoff_initial_millis: int
+    exporter_backoff_max_millis: int
 
     def __init__(
         self,
         exporter_type=None,
         exporter_url=None,
-    ):
-        """The Constructor of exporter configuration class"""
+        exporter_encoding=None,
+        exporter_max_in_flight=None,
+        exporter_compression=None,
+        exporter_timeout_millis=None,
+        exporter_headers=None,
+        exporter_channel_options=None,
+        exporter_circuit_breaker_enabled=None,
+        exporter_circuit_breaker_failure_threshold=None,
+        exporter_backoff_initial_millis=None,
+        exporter_backoff_max_millis=None,
+    ):  # pylint: disable=too-many-positional-arguments
+        """
+        The Constructor of exporter configuration class
+
+        The `exporter_headers` are sent with every export request. The `exporter_channel_options` are
+        applied to the gRPC channel of the OTLPGRPC exporters, e.g. `{"grpc.keepalive_time_ms": 30000}`.
+        Both of them can be given as a dict, or as a string of comma separated `key=value` pairs.
+
+        If the `exporter_circuit_breaker_enabled` is set, the exports fail right away for a jittered exponential
+        backoff (from `exporter_backoff_initial_millis` up to `exporter_backoff_max_millis`)
+        after `exporter_circuit_breaker_failure_threshold` consecutive failed exports.
+        """
         self.exporter_type = get_init_value(
             exporter_type, DEFAULT_OTEL_EXPORTER_TYPE, "OTEL_EXPORTER_TYPE"
         )
         self.exporter_url = get_init_value(
             exporter_url, DEFAULT_OTEL_EXPORTER_URL, "OTEL_EXPORTER_URL"
         )
+        self.exporter_encoding = get_init_value(
+            exporter_encoding, DEFAULT_OTEL_EXPORTER_ENCODING, "OTEL_EXPORTER_ENCODING"
+        )
+        self.exporter_max_in_flight = get_init_int_value(
+            exporter_max_in_flight,
+            DEFAULT_OTEL_EXPORTER_MAX_IN_FLIGHT,
+            "OTEL_EXPORTER_MAX_IN_FLIGHT",
+        )
+        self.exporter_compression = get_init_value(
+            exporter_compression,
+            DEFAULT_OTEL_EXPORTER_COMPRESSION,
+            "OTEL_EXPORTER_COMPRESSION",
+        )
+        self.exporter_timeout_millis = get_init_int_value(
+            exporter_timeout_millis,
+            DEFAULT_OTEL_EXPORTER_TIMEOUT_MILLIS,
+            "OTEL_EXPORTER_TIMEOUT_MILLIS",
+        )
+        self.exporter_headers = parse_key_value_pairs(
+            get_init_value(exporter_headers, "", "OTEL_EXPORTER_HEADERS")
+        )
+        self.exporter_channel_options = parse_key_value_pairs(
+            get_init_value(
+                exporter_channel_options, "", "OTEL_EXPORTER_GRPC_CHANNEL_OPTIONS"
+            ),
+            convert_numbers=True,
+        )
+        self.exporter_circuit_breaker_enabled = get_init_bool_value(
+            exporter_circuit_breaker_enabled,
+            DEFAULT_OTEL_EXPORTER_CIRCUIT_BREAKER_ENABLED,
+            "OTEL_EXPORTER_CIRCUIT_BREAKER_ENABLED",
+        )
+        self.exporter_circuit_breaker_failure_threshold = get_init_int_value(
+            exporter_circuit_breaker_failure_threshold,
+            DEFAULT_OTEL_EXPORTER_CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            "OTEL_EXPORTER_CIRCUIT_BREAKER_FAILURE_THRESHOLD",
+        )
+        self.exporter_backoff_initial_millis = get_init_int_value(
+            exporter_backoff_initial_millis,
+            DEFAULT_OTEL_EXPORTER_BACKOFF_INITIAL_MILLIS,
+            "OTEL_EXPORTER_BACKOFF_INITIAL_MILLIS",
+        )
+        self.exporter_backoff_max_millis = get_init_int_value(
+            exporter_backoff_max_millis,
+            DEFAULT_OTEL_EXPORTER_BACKOFF_MAX_MILLIS,
+            "OTEL_EXPORTER_BACKOFF_MAX_MILLIS",
+        )
 
     def __str__(self):
-        """Serialize the object to string"""
-        return f'ExporterConfig(exporter_type="{self.exporter_type}", exporter_url={self.exporter_url})'
+        """Serialize the object to string. The values of the headers are left out, they may hold secrets"""
+        return (
+            f'ExporterConfig(exporter_type="{self.exporter_type}", exporter_url={self.exporter_url},'
+            f' exporter_encoding="{self.exporter_encoding}", exporter_max_in_flight={self.exporter_max_in_flight},'
+            f' exporter_compression="{self.exporter_compression}", exporter_timeout_millis={self.exporter_timeout_millis},'
+            f" exporter_headers={list(self.exporter_headers)}, exporter_channel_options={self.exporter_channel_options},"
+            f" exporter_circuit_breaker_enabled={self.exporter_circuit_breaker_enabled})"
+        )
 
 
 @dataclasses.dataclass
@@ -111,8 +849,16 @@ class SamplingConfig:
         self,
         trace_sampling_type=None,
         trace_sampling_ratio=None,
+        trace_sampling_rules=None,
+        trace_sampling_rules_file=None,
     ):
-        """The Constructor of trace sampling configuration class"""
+        """
+        The Constructor of trace sampling configuration class
+
+        The `trace_sampling_rules` (a list of rule dicts, or its JSON string) or the `trace_sampling_rules_file`
+        (a JSON file of the list) configure the `"RULES"` and `"PARENTBASED_RULES"` sampling types,
+        the file takes precedence. The spans that match no rule are sampled by the `trace_sampling_ratio`.
+        """
         self.trace_sampling_type = get_init_value(
             trace_sampling_type, DEFAULT_OTEL_SAMPLING_TYPE, "OTEL_TRACES_SAMPLER"
         )
@@ -123,16 +869,40 @@ class SamplingConfig:
                 "OTEL_TRACES_SAMPLER_ARG",
             )
         )
+        self.trace_sampling_rules = get_init_value(
+            trace_sampling_rules, "", "OTEL_TRACES_SAMPLER_RULES"
+        )
+        self.trace_sampling_rules_file = get_init_value(
+            trace_sampling_rules_file, None, "OTEL_TRACES_SAMPLER_RULES_FILE"
+        )
 
     def __str__(self):
         """Serialize the object to string"""
         return (
             f"SamplingConfig("
             f'trace_sampling_type="{self.trace_sampling_type}", '
-            f"trace_sampling_ratio={self.trace_sampling_ratio})"
+            f"trace_sampling_ratio={self.trace_sampling_ratio}, "
+            f'trace_sampling_rules_file="{self.trace_sampling_rules_file}")'
         )
 
 
+class OTIConfigError(Exception):
+    """Inappropriate argument value (of correct type)."""
+
+    def __init__(self, *args, **kwargs):  # real signature unknown
+        pass
+
+
+def split_exporter_config(exporter_config):
+    """Split the exporter config with comma separated exporter types into one exporter config per type"""
+    exporter_configs = []
+    for exporter_type in exporter_config.exporter_type.split(","):
+        config = copy.copy(exporter_config)
+        config.exporter_type = exporter_type.strip()
+        exporter_configs.append(config)
+    return exporter_configs
+
+
 def get_init_value(param_value, default_value, env_var_name=None):
     """
     Get the initial value of a config parameter.
@@ -145,6 +915,58 @@ def get_init_value(param_value, default_value, env_var_name=None):
     return default_value
 
 
+def get_init_int_value(param_value, default_value, env_var_name=None):
+    """
+    Get the initial value of an integer config parameter the same way as `get_init_value()` does.
+    The value is converted to `int` unless it is `None`.
+    """
+    value = get_init_value(param_value, default_value, env_var_name)
+    if value is None:
+        return None
+    return int(value)
+
+
+def get_init_float_value(param_value, default_value, env_var_name=None):
+    """
+    Get the initial value of a float config parameter the same way as `get_init_value()` does.
+    The value is converted to `float` unless it is `None`.
+    """
+    value = get_init_value(param_value, default_value, env_var_name)
+    if value is None:
+        return None
+    return float(value)
+
+
+def parse_key_value_pairs(value, convert_numbers=False):
+    """
+    Parse a string of comma separated `key=value` pairs to a dict. A dict value is returned as it is.
+    If `convert_numbers` is `True`, the integer values are converted to `int`.
+    """
+    if isinstance(value, dict):
+        return value
+    pairs = {}
+    for pair in value.split(","):
+        if "=" not in pair:
+            continue
+        key, item = (part.strip() for part in pair.split("=", 1))
+        if convert_numbers and item.lstrip("-").isdigit():
+            item = int(item)
+        pairs[key] = item
+    return pairs
+
+
+def get_init_bool_value(param_value, default_value, env_var_name=None):
+    """
+    Get the initial value of a boolean config parameter the same way as `get_init_value()` does.
+    The `"true"`, `"yes"`, `"on"` and `"1"` string values are converted to `True` (case-insensitively),
+    any other string value is converted to `False`.
+    """
+    value = get_init_value(param_value, default_value, env_var_name)
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "yes", "on", "1")
+    return bool(value)
+
+
 @dataclasses.dataclass
 class OTIConfig:
     """
@@ -165,8 +987,32 @@ class OTIConfig:
         metric_exporter_mode_config=None,
         metric_exporter_endpoint_config=None,
         periodic_metric_reader_config=None,
+        batch_span_processor_config=None,
+        multiprocess_config=None,
+        tail_sampling_config=None,
+        spool_config=None,
+        self_telemetry_enabled=None,
+        exporter_configs=None,
+        metric_views_config=None,
+        metric_aggregation_config=None,
+        reload_config=None,
+        span_limits_config=None,
+        sdk_disabled=None,
+        flush_config=None,
+        span_metrics_config=None,
+        file_exporter_config=None,
+        console_exporter_config=None,
     ):  # pylint: disable=too-many-positional-arguments
-        """The Constructor of Open Telemetry Instrumentation configuration class"""
+        """
+        The Constructor of Open Telemetry Instrumentation configuration class
+
+        The spans and metrics are sent to every exporter of the `exporter_configs` list.
+        If it is not set, the `exporter_type` of the `exporter_config` may list several comma separated
+        exporter types (e.g. `"OTLPGRPC,STDOUT"`), that share the other exporter parameters.
+
+        If the `sdk_disabled` is set, both the `span_processor_type` and the `metric_exporter_mode_config`
+        are `"DISABLED"`, whatever they are set to.
+        """
         self.service_name = get_init_value(
             service_name, DEFAULT_SERVICE_NAME, "OTEL_SERVICE_NAME"
         )
@@ -180,10 +1026,27 @@ class OTIConfig:
         self.service_version = get_init_value(
             service_version, DEFAULT_SERVICE_VERSION, "OTEL_SERVICE_VERSION"
         )
-        self.span_processor_type = get_init_value(
-            span_processor_type, DEFAULT_SPAN_PROCESSOR_TYPE, "OTEL_SPAN_PROCESSOR_TYPE"
+        self.sdk_disabled = get_init_bool_value(
+            sdk_disabled, DEFAULT_OTEL_SDK_DISABLED, "OTEL_SDK_DISABLED"
+        )
+        self.span_processor_type = (
+            "DISABLED"
+            if self.sdk_disabled
+            else get_init_value(
+                span_processor_type,
+                DEFAULT_SPAN_PROCESSOR_TYPE,
+                "OTEL_SPAN_PROCESSOR_TYPE",
+            )
         )
 
+        self.batch_span_processor_config = BatchSpanProcessorConfig()
+        if batch_span_processor_config is not None:
+            self.batch_span_processor_config = batch_span_processor_config
+
+        self.tail_sampling_config = TailSamplingConfig()
+        if tail_sampling_config is not None:
+            self.tail_sampling_config = tail_sampling_config
+
         self.sampling_config = SamplingConfig()
         if sampling_config is not None:
             self.sampling_config = sampling_config
@@ -192,10 +1055,22 @@ class OTIConfig:
         if exporter_config is not None:
             self.exporter_config = exporter_config
 
-        self.metric_exporter_mode_config = get_init_value(
-            metric_exporter_mode_config,
-            DEFAULT_OTEL_METRIC_EXPORTER_MODE,
-            "OTEL_METRIC_EXPORTER_MODE",
+        if exporter_configs is None:
+            exporter_configs = split_exporter_config(self.exporter_config)
+        if not exporter_configs:
+            raise OTIConfigError("At least one exporter config is required")
+        self.exporter_configs = list(exporter_configs)
+        # The exporter factories get the config of their own exporter as the `exporter_config`
+        self.exporter_config = self.exporter_configs[0]
+
+        self.metric_exporter_mode_config = (
+            "DISABLED"
+            if self.sdk_disabled
+            else get_init_value(
+                metric_exporter_mode_config,
+                DEFAULT_OTEL_METRIC_EXPORTER_MODE,
+                "OTEL_METRIC_EXPORTER_MODE",
+            )
         )
 
         self.periodic_metric_reader_config = PeriodicMetricReaderConfig()
@@ -206,6 +1081,54 @@ class OTIConfig:
         if metric_exporter_endpoint_config is not None:
             self.metric_exporter_endpoint_config = metric_exporter_endpoint_config
 
+        self.multiprocess_config = MultiprocessConfig()
+        if multiprocess_config is not None:
+            self.multiprocess_config = multiprocess_config
+
+        self.spool_config = SpoolConfig()
+        if spool_config is not None:
+            self.spool_config = spool_config
+
+        self.file_exporter_config = (
+            FileExporterConfig()
+            if file_exporter_config is None
+            else file_exporter_config
+        )
+        self.console_exporter_config = (
+            ConsoleExporterConfig()
+            if console_exporter_config is None
+            else console_exporter_config
+        )
+
+        self.metric_views_config = (
+            MetricViewsConfig() if metric_views_config is None else metric_views_config
+        )
+        self.metric_aggregation_config = (
+            MetricAggregationConfig()
+            if metric_aggregation_config is None
+            else metric_aggregation_config
+        )
+        self.reload_config = ReloadConfig() if reload_config is None else reload_config
+        self.span_limits_config = (
+            SpanLimitsConfig() if span_limits_config is None else span_limits_config
+        )
+        self.flush_config = FlushConfig() if flush_config is None else flush_config
+        self.span_metrics_config = (
+            SpanMetricsConfig() if span_metrics_config is None else span_metrics_config
+        )
+
+        self.self_telemetry_enabled = get_init_bool_value(
+            self_telemetry_enabled,
+            DEFAULT_OTEL_SELF_TELEMETRY_ENABLED,
+            "OTEL_SELF_TELEMETRY_ENABLED",
+        )
+
+    def with_exporter_config(self, exporter_config):
+        """Get a copy of the config with the `exporter_config` as its exporter config"""
+        config = copy.copy(self)
+        config.exporter_config = exporter_config
+        return config
+
     def __str__(self):
         """Serialize the object to string"""
         return (
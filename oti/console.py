@@ -0,0 +1,315 @@
+"""
+Compact NDJSON console exporters
+
+The console exporters of the OTEL SDK pretty-print every span and metric as indented JSON,
+and write and flush the output on every export, in the thread of the caller.
+The exporters of this module write one compact JSON line per span and per metric data point,
+so the log pipelines of the containers can parse the records without reassembling multi-line ones.
+
+The exporters encode a batch of records into one UTF-8 string, and append it to the buffer of a background writer thread,
+that writes it into the file descriptor (`1` is the standard output) in large batches every `flush_interval_millis`,
+or when the buffer fills up.
+The writer has two buffers that it swaps, so the exporters keep appending while the other one is written.
+If the output can not keep up, and the buffer reaches `max_buffer_bytes`, the new records are dropped.
+The trace and metric exporters share the writer of the file descriptor, so their lines do not interleave.
+The writer bypasses `sys.stdout`, so its lines are not ordered with the ones the application prints.
+The writers restart their threads in the forked child processes, and drop the lines buffered by the parent process.
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import threading
+import weakref
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanKind, StatusCode
+
+logger = logging.getLogger(__name__)
+
+
+def encode_default(value):
+    """Encode the values the JSON encoder does not know, e.g. the buckets of the exponential histograms"""
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, (tuple, frozenset, set)):
+        return list(value)
+    return str(value)
+
+
+encode = json.JSONEncoder(
+    separators=(",", ":"), ensure_ascii=False, default=encode_default
+).encode
+SPAN_KIND_NAMES = {kind: kind.name for kind in SpanKind}
+STATUS_CODE_NAMES = {status_code: status_code.name for status_code in StatusCode}
+
+
+class ConsoleWriter:
+    """Writes the lines appended by the exporters into a file descriptor in a background thread"""
+
+    def __init__(self, key, fd, flush_interval_millis, max_buffer_bytes):
+        """Constructor of the writer. It starts the writer thread"""
+        self.key = key
+        self.fd = fd
+        self.flush_interval_sec = flush_interval_millis / 1e3
+        self.max_buffer_bytes = max_buffer_bytes
+        self.buffer = bytearray()
+        self.spare = bytearray()
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.dropped = 0
+        self.references = 0
+        self.done = False
+        self.start_thread()
+        if hasattr(os, "register_at_fork"):
+            weak_reinit = weakref.WeakMethod(self.reinit_after_fork)
+
+            def after_in_child():
+                reinit = weak_reinit()
+                if reinit is not None:
+                    reinit()
+
+            os.register_at_fork(after_in_child=after_in_child)
+
+    def start_thread(self):
+        """Start the writer thread"""
+        self.thread = threading.Thread(
+            name="OTIConsoleWriter", target=self.run, daemon=True
+        )
+        self.thread.start()
+
+    def reinit_after_fork(self):
+        """Drop the lines of the parent process, and restart the writer thread in the forked child process"""
+        self.buffer.clear()
+        self.spare.clear()
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.dropped = 0
+        if not self.done:
+            self.start_thread()
+
+    def acquire(self):
+        """Register a new user of the writer"""
+        with SHARED_WRITERS_LOCK:
+            self.references += 1
+        return self
+
+    def release(self):
+        """Unregister a user of the writer, and stop it when the last user is gone"""
+        with SHARED_WRITERS_LOCK:
+            self.references -= 1
+            if self.references > 0:
+                return
+            if SHARED_WRITERS.get(self.key) is self:
+                del SHARED_WRITERS[self.key]
+        self.shutdown()
+
+    def append(self, lines):
+        """Append the encoded lines to the buffer. It returns `False` if they are dropped, because the buffer is full"""
+        with self.lock:
+            if len(self.buffer) + len(lines) > self.max_buffer_bytes:
+                self.dropped += 1
+                if self.dropped == 1:
+                    logger.warning(
+                        "The console output is too slow, dropping the records"
+                    )
+                return False
+            self.buffer += lines
+            full = len(self.buffer) * 2 >= self.max_buffer_bytes
+        if full:
+            self.wakeup.set()
+        return True
+
+    def write_pending(self):
+        """Swap the buffers, and write the lines of the previous one"""
+        with self.write_lock:
+            with self.lock:
+                if not self.buffer:
+                    return
+                self.buffer, self.spare = self.spare, self.buffer
+                self.dropped = 0
+            view = memoryview(self.spare)
+            try:
+                while view:
+                    view = view[os.write(self.fd, view) :]
+            except OSError as error:
+                logger.warning("Failed to write the console output: %s", error)
+            finally:
+                view.release()
+                self.spare.clear()
+
+    def run(self):
+        """The loop of the writer thread"""
+        while not self.done:
+            self.wakeup.wait(self.flush_interval_sec)
+            self.wakeup.clear()
+            self.write_pending()
+
+    def shutdown(self):
+        """Stop the writer thread, and write the remaining lines"""
+        self.done = True
+        self.wakeup.set()
+        self.thread.join()
+        self.write_pending()
+
+
+SHARED_WRITERS = {}
+SHARED_WRITERS_LOCK = threading.Lock()
+
+
+def reinit_shared_writers_lock():
+    """Replace the lock of the shared writers in the forked child process, it may have been held by another thread"""
+    global SHARED_WRITERS_LOCK  # pylint: disable=global-statement
+    SHARED_WRITERS_LOCK = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    # The shared writers restart their own threads in the child processes
+    os.register_at_fork(after_in_child=reinit_shared_writers_lock)
+
+
+def get_shared_writer(fd, flush_interval_millis, max_buffer_bytes):
+    """Get the writer shared by the exporters with the same file descriptor"""
+    key = fd
+    with SHARED_WRITERS_LOCK:
+        writer = SHARED_WRITERS.get(key)
+        if writer is None:
+            writer = SHARED_WRITERS[key] = ConsoleWriter(
+                key, fd, flush_interval_millis, max_buffer_bytes
+            )
+    return writer.acquire()
+
+
+def encode_span(span):
+    """
+    Encode a span into a JSON line.
+    The fields of fixed format are formatted directly, only the strings and the attributes go through the JSON encoder.
+    """
+    context = span.context
+    status = span.status
+    line = (
+        f'{{"name":{encode(span.name)},"trace_id":"{context.trace_id:032x}","span_id":"{context.span_id:016x}"'
+        f',"kind":"{SPAN_KIND_NAMES[span.kind]}","start_time_unix_nano":{span.start_time}'
+        f',"end_time_unix_nano":{span.end_time},"status":"{STATUS_CODE_NAMES[status.status_code]}"'
+        f',"service.name":{encode(span.resource.attributes.get("service.name"))}'
+    )
+    if span.parent is not None:
+        line += f',"parent_span_id":"{span.parent.span_id:016x}"'
+    if status.description:
+        line += f',"status_message":{encode(status.description)}'
+    if span.attributes:
+        line += f',"attributes":{encode(dict(span.attributes))}'
+    if span.events:
+        events = [
+            {
+                "name": event.name,
+                "time_unix_nano": event.timestamp,
+                "attributes": dict(event.attributes or {}),
+            }
+            for event in span.events
+        ]
+        line += f',"events":{encode(events)}'
+    if span.links:
+        links = [
+            {
+                "trace_id": f"{link.context.trace_id:032x}",
+                "span_id": f"{link.context.span_id:016x}",
+            }
+            for link in span.links
+        ]
+        line += f',"links":{encode(links)}'
+    return line + "}"
+
+
+def encode_metrics(metrics_data):
+    """Encode the data points of the metrics into JSON lines"""
+    lines = []
+    for resource_metrics in metrics_data.resource_metrics:
+        service_name = resource_metrics.resource.attributes.get("service.name")
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                metric_type = type(metric.data).__name__
+                for point in metric.data.data_points:
+                    record = {
+                        "name": metric.name,
+                        "unit": metric.unit,
+                        "type": metric_type,
+                        "scope": scope_metrics.scope.name,
+                        "service.name": service_name,
+                        **vars(point),
+                    }
+                    record["attributes"] = dict(point.attributes or {})
+                    if not point.exemplars:
+                        del record["exemplars"]
+                    lines.append(encode(record))
+    return lines
+
+
+class NDJSONConsoleSpanExporter(SpanExporter):
+    """Span exporter that writes one compact JSON line per span"""
+
+    def __init__(self, writer):
+        """Constructor of the NDJSON console span exporter"""
+        self.writer = writer
+        self.shut_down = False
+
+    def export(self, spans):
+        """Encode the spans, and append them to the buffer of the writer"""
+        lines = "".join([encode_span(span) + "\n" for span in spans])
+        if self.writer.append(lines.encode()):
+            return SpanExportResult.SUCCESS
+        return SpanExportResult.FAILURE
+
+    def force_flush(self, timeout_millis=30000):
+        """Write the buffered lines"""
+        self.writer.write_pending()
+        return True
+
+    def shutdown(self):
+        """Write the buffered lines, and release the writer"""
+        if not self.shut_down:
+            self.shut_down = True
+            self.writer.write_pending()
+            self.writer.release()
+
+
+class NDJSONConsoleMetricExporter(MetricExporter):
+    """Metric exporter that writes one compact JSON line per metric data point"""
+
+    def __init__(self, writer):
+        """Constructor of the NDJSON console metric exporter"""
+        super().__init__()
+        self.writer = writer
+        self.shut_down = False
+
+    def export(self, metrics_data, timeout_millis=10_000, **kwargs):
+        """Encode the data points, and append them to the buffer of the writer"""
+        lines = "".join([line + "\n" for line in encode_metrics(metrics_data)])
+        if self.writer.append(lines.encode()):
+            return MetricExportResult.SUCCESS
+        return MetricExportResult.FAILURE
+
+    def force_flush(self, timeout_millis=10_000):
+        """Write the buffered lines"""
+        self.writer.write_pending()
+        return True
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        """Write the buffered lines, and release the writer"""
+        if not self.shut_down:
+            self.shut_down = True
+            self.writer.write_pending()
+            self.writer.release()
+
+
+def create_shared_writer(config):
+    """Get the shared writer of the console exporters according to the config parameters"""
+    console_exporter_config = config.console_exporter_config
+    return get_shared_writer(
+        console_exporter_config.fd,
+        console_exporter_config.flush_interval_millis,
+        console_exporter_config.max_buffer_bytes,
+    )
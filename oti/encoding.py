@@ -0,0 +1,60 @@
+"""
+Encoding of the OTLP protobuf messages
+
+The OTLP/JSON encoding is the JSON mapping of the protobuf messages, except that the trace and span IDs
+are hex strings instead of base64 ones. It is shared by the `OTLPHTTP_ASYNC` and the `OTLPFILE` exporters.
+"""
+
+import base64
+import json
+from google.protobuf.json_format import MessageToDict, ParseDict
+
+ENCODINGS = ("PROTOBUF", "JSON")
+# The OTLP/JSON encoding represents these byte fields as hex strings instead of base64
+HEX_ENCODED_FIELDS = ("traceId", "spanId", "parentSpanId")
+
+
+def encode_message(message, encoding):
+    """Encode an OTLP protobuf message to the request body according to the `encoding`"""
+    if encoding == "PROTOBUF":
+        return message.SerializeToString()
+    return json.dumps(
+        hex_encode_ids(MessageToDict(message)), separators=(",", ":")
+    ).encode()
+
+
+def decode_message(body, encoding, message_class):
+    """Decode a request body of the `encoding` into an OTLP protobuf message of the `message_class`"""
+    if encoding == "PROTOBUF":
+        return message_class.FromString(body)
+    return ParseDict(
+        recode_ids(json.loads(body), bytes.fromhex, base64_encode),
+        message_class(),
+        ignore_unknown_fields=True,
+    )
+
+
+def hex_encode_ids(value):
+    """Recode the base64 encoded trace and span ID fields of a message dictionary to hex"""
+    return recode_ids(value, base64.b64decode, bytes.hex)
+
+
+def base64_encode(data):
+    """Encode the bytes to a base64 string"""
+    return base64.b64encode(data).decode()
+
+
+def recode_ids(value, decode, encode):
+    """Recode the trace and span ID fields of a message dictionary with the `decode` and `encode` functions"""
+    if isinstance(value, dict):
+        return {
+            key: (
+                encode(decode(item))
+                if key in HEX_ENCODED_FIELDS
+                else recode_ids(item, decode, encode)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [recode_ids(item, decode, encode) for item in value]
+    return value
@@ -0,0 +1,102 @@
+"""
+Deadline-bounded flush and shutdown of the signals
+
+The flush and the shutdown of the traces, the metrics and the metric server run in parallel threads,
+that share one deadline, so the slowest exporter does not delay the others, and the whole operation
+returns within the timeout, e.g. within the termination grace period of the container.
+The parts that failed or did not finish within the deadline are returned by their names, and logged.
+
+The flush signal handler flushes in a background thread, so it does not block the signal handling of the
+application, and it calls the previous Python handler of the signal, e.g. the SIGTERM handler of the web server.
+If a termination signal (see `TERMINATION_SIGNALS`) has no Python handler, the handler flushes within the deadline
+of the flush instead, then restores the default disposition and raises the signal again, so the process stops as usual.
+"""
+
+import logging
+import signal
+import threading
+import time
+from .config import OTIConfigError
+
+logger = logging.getLogger(__name__)
+
+# The signals that stop the process by default, even though they have no Python handler
+TERMINATION_SIGNALS = {
+    getattr(signal, name)
+    for name in ("SIGTERM", "SIGINT", "SIGQUIT")
+    if hasattr(signal, name)
+}
+
+
+def run_until_deadline(tasks, timeout_millis, operation):
+    """
+    Run the callables of the `tasks` dict in parallel threads, and wait for them until the deadline.
+    Return the names of the tasks that returned `False`, raised an exception, or did not finish in time.
+    """
+    results = {}
+
+    def run_task(name, task):
+        try:
+            results[name] = task() is not False
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Failed to %s the %s", operation, name)
+            results[name] = False
+
+    deadline = time.monotonic() + timeout_millis / 1000
+    threads = [
+        threading.Thread(
+            target=run_task,
+            args=(name, task),
+            name=f"OTI{operation.title().replace(' ', '')}-{name}",
+        )
+        for name, task in tasks.items()
+    ]
+    for thread in threads:
+        # The unfinished threads must not block the exit of the process
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    failed = [name for name in tasks if not results.get(name, False)]
+    if failed:
+        logger.warning(
+            "Failed to %s the %s within %d ms",
+            operation,
+            ", ".join(failed),
+            timeout_millis,
+        )
+    return failed
+
+
+def install_flush_signal_handler(signal_name, flush):
+    """
+    Call the `flush` in a background thread when the process receives the signal, e.g. `"SIGUSR1"`,
+    then call the previous Python handler of the signal, if there is any.
+    The termination signals with the default disposition are raised again after the `flush` returns
+    """
+    try:
+        signum = getattr(signal, signal_name.strip().upper())
+    except AttributeError as error:
+        raise OTIConfigError(f'Unknown signal: "{signal_name}"') from error
+    previous_handler = signal.getsignal(signum)
+
+    def handle_signal(signum, frame):
+        if previous_handler == signal.SIG_DFL and signum in TERMINATION_SIGNALS:
+            # The flush is bounded by its deadline, then the default action stops the process
+            try:
+                flush()
+            finally:
+                signal.signal(signum, signal.SIG_DFL)
+                signal.raise_signal(signum)
+            return
+        threading.Thread(target=flush, name="OTIFlush", daemon=True).start()
+        if callable(previous_handler):
+            previous_handler(signum, frame)
+
+    try:
+        signal.signal(signum, handle_signal)
+    except ValueError as error:
+        # The signal handlers can be installed only in the main thread
+        raise OTIConfigError(
+            f"Failed to install the {signal_name} handler: {error}"
+        ) from error
@@ -0,0 +1,170 @@
+"""
+The OTLPGRPC exporters sharing one gRPC channel
+
+The OTLP gRPC exporters of the OTEL SDK open their own channel each, so the trace and metric exporters
+keep two connections to the same collector. The exporters of this module send their requests through
+a channel that is shared by all the exporters with the same endpoint, compression and channel options.
+The channel is closed when the last exporter using it is shut down.
+
+The exporters rely on the private `_stub` hook and the `_client`, `_export_lock`, `_headers` and `_timeout` attributes
+of the SDK exporters, that the tests check, so an upgrade of the SDK that changes them fails the tests.
+"""
+
+import logging
+import os
+import threading
+from urllib.parse import urlparse
+import grpc
+from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import (
+    OTLPMetricExporter,
+)
+from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+from opentelemetry.proto.collector.metrics.v1.metrics_service_pb2 import (  # pylint: disable=no-name-in-module
+    ExportMetricsServiceRequest,
+)
+from opentelemetry.proto.collector.metrics.v1.metrics_service_pb2_grpc import (
+    MetricsServiceStub,
+)
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (  # pylint: disable=no-name-in-module
+    ExportTraceServiceRequest,
+)
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2_grpc import (
+    TraceServiceStub,
+)
+
+logger = logging.getLogger(__name__)
+
+GRPC_COMPRESSIONS = {
+    "NONE": grpc.Compression.NoCompression,
+    "GZIP": grpc.Compression.Gzip,
+    "DEFLATE": grpc.Compression.Deflate,
+}
+
+
+class SharedChannel:
+    """A gRPC channel with reference counting"""
+
+    def __init__(self, key, endpoint, compression, options):
+        """Constructor of the shared channel"""
+        self.key = key
+        parsed_url = urlparse(endpoint)
+        target = parsed_url.netloc or endpoint
+        if parsed_url.scheme == "https":
+            self.channel = grpc.secure_channel(
+                target,
+                grpc.ssl_channel_credentials(),
+                options=options,
+                compression=compression,
+            )
+        else:
+            self.channel = grpc.insecure_channel(
+                target, options=options, compression=compression
+            )
+        self.references = 0
+
+    def acquire(self):
+        """Register a new user of the channel"""
+        with SHARED_CHANNELS_LOCK:
+            self.references += 1
+        return self
+
+    def release(self):
+        """Unregister a user of the channel, and close it when the last user is gone"""
+        with SHARED_CHANNELS_LOCK:
+            self.references -= 1
+            if self.references > 0:
+                return
+            if SHARED_CHANNELS.get(self.key) is self:
+                del SHARED_CHANNELS[self.key]
+        self.channel.close()
+
+
+SHARED_CHANNELS = {}
+SHARED_CHANNELS_LOCK = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    # A gRPC channel must not be used by more than one process
+    os.register_at_fork(after_in_child=SHARED_CHANNELS.clear)
+
+
+def get_shared_channel(endpoint, compression, options):
+    """Get the channel shared by the exporters with the same endpoint, compression and channel options"""
+    options = tuple(sorted(options.items()))
+    key = (endpoint, compression, options)
+    with SHARED_CHANNELS_LOCK:
+        shared_channel = SHARED_CHANNELS.get(key)
+        if shared_channel is None:
+            shared_channel = SHARED_CHANNELS[key] = SharedChannel(
+                key, endpoint, compression, list(options)
+            )
+    return shared_channel.acquire()
+
+
+def export_serialized(exporter, request):
+    """Send an already serialized export request via the exporter. It returns `True` if the collector accepted it"""
+    # pylint: disable=protected-access
+    try:
+        with exporter._export_lock:
+            exporter._client.Export(
+                request=request,
+                metadata=exporter._headers,
+                timeout=exporter._timeout,
+            )
+        return True
+    except grpc.RpcError as error:
+        logger.warning("Failed to export the serialized request: %s", error)
+        return False
+
+
+class SharedChannelOTLPSpanExporter(OTLPSpanExporter):
+    """OTLP gRPC span exporter that sends the spans through a shared channel"""
+
+    def __init__(self, shared_channel, **kwargs):
+        """Constructor of the span exporter. The `kwargs` are passed to the `OTLPSpanExporter`"""
+        self.shared_channel = shared_channel
+        super().__init__(**kwargs)
+
+    def _stub(self, channel):
+        """
+        Create the client stub of the SDK exporter on the shared channel.
+        The channel created by the SDK exporter has not connected yet, it is closed right away
+        """
+        channel.close()
+        return TraceServiceStub(self.shared_channel.channel)
+
+    def export_serialized(self, body):
+        """Send an already serialized trace export request. It returns `True` if the collector accepted it"""
+        return export_serialized(self, ExportTraceServiceRequest.FromString(body))
+
+    def shutdown(self):
+        """Shut down the exporter, and release the shared channel"""
+        if not self._shutdown:
+            super().shutdown()
+            self.shared_channel.release()
+
+
+class SharedChannelOTLPMetricExporter(OTLPMetricExporter):
+    """OTLP gRPC metric exporter that sends the metrics through a shared channel"""
+
+    def __init__(self, shared_channel, **kwargs):
+        """Constructor of the metric exporter. The `kwargs` are passed to the `OTLPMetricExporter`"""
+        self.shared_channel = shared_channel
+        super().__init__(**kwargs)
+
+    def _stub(self, channel):
+        """
+        Create the client stub of the SDK exporter on the shared channel.
+        The channel created by the SDK exporter has not connected yet, it is closed right away
+        """
+        channel.close()
+        return MetricsServiceStub(self.shared_channel.channel)
+
+    def export_serialized(self, body):
+        """Send an already serialized metric export request. It returns `True` if the collector accepted it"""
+        return export_serialized(self, ExportMetricsServiceRequest.FromString(body))
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        """Shut down the exporter, and release the shared channel"""
+        if not self._shutdown:
+            super().shutdown(timeout_millis=timeout_millis, **kwargs)
+            self.shared_channel.release()
@@ -0,0 +1,181 @@
+"""
+The Prometheus scrape endpoint of the metrics
+
+Every scrape of the `prometheus_client` HTTP server collects all the metrics again, and the collection of the
+Prometheus metric reader holds the locks of the OTEL SDK while it walks through every series.
+The `ScrapeCache` collects the metrics once, and serves every scrape that arrives during the collection
+or within the cache TTL after it from the same collection. The exposition is rendered once per format
+(text or OpenMetrics, selected by the `Accept` header) and compression, and the rendered payloads are cached
+together with the collection.
+
+Instead of starting its own HTTP server, the scrape cache can be served by the WSGI or ASGI app of this module,
+mounted at e.g. `/metrics` in the web server of the application. The ASGI app collects the metrics
+in the default executor of the event loop, so a collection does not block the other requests.
+
+The `prometheus_client` can not render the protobuf exposition format, so the scrapers that ask for it
+get the text format, that every Prometheus server accepts.
+"""
+
+import asyncio
+import gzip
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from prometheus_client.exposition import choose_encoder, gzip_accepted
+
+
+class CollectedMetrics:  # pylint: disable=too-few-public-methods
+    """The metric families of one collection, that can be rendered like a registry"""
+
+    def __init__(self, metric_families):
+        """Constructor of the collected metrics"""
+        self.metric_families = metric_families
+
+    def collect(self):
+        """Get the collected metric families"""
+        return self.metric_families
+
+
+class ScrapeCache:  # pylint: disable=too-few-public-methods
+    """Cache of the collected and rendered metrics of a registry"""
+
+    def __init__(self, registry, ttl_millis):
+        """Constructor of the scrape cache"""
+        self.registry = registry
+        self.ttl = ttl_millis / 1000
+        self.lock = threading.Lock()
+        self.collected = None
+        self.collected_at = None
+        self.payloads = {}
+
+    def scrape(self, accept_header, accept_encoding_header):
+        """Get the content type, the content encoding and the payload of a scrape"""
+        requested_at = time.monotonic()
+        encoder, content_type = choose_encoder(accept_header)
+        content_encoding = "gzip" if gzip_accepted(accept_encoding_header) else None
+        with self.lock:
+            # The scrapes that waited for a collection finished after their arrival are served from it
+            if self.collected_at is None or self.collected_at < requested_at - self.ttl:
+                self.collected = CollectedMetrics(list(self.registry.collect()))
+                self.collected_at = time.monotonic()
+                self.payloads = {}
+            key = (content_type, content_encoding)
+            payload = self.payloads.get(key)
+            if payload is None:
+                payload = self.payloads.get((content_type, None))
+                if payload is None:
+                    payload = encoder(self.collected)
+                    self.payloads[(content_type, None)] = payload
+                if content_encoding == "gzip":
+                    payload = gzip.compress(payload)
+                    self.payloads[key] = payload
+        return content_type, content_encoding, payload
+
+
+class MetricRequestHandler(BaseHTTPRequestHandler):
+    """HTTP request handler that serves the metrics of the scrape cache of its server"""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve a scrape"""
+        if self.path == "/favicon.ico":
+            self.send_error(404)
+            return
+        content_type, content_encoding, payload = self.server.scrape_cache.scrape(
+            self.headers.get("Accept"), self.headers.get("Accept-Encoding")
+        )
+        self.send_response(200)
+        for name, value in get_response_headers(content_type, content_encoding):
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Do not log the scrapes"""
+
+
+class MetricServer(ThreadingHTTPServer):
+    """Threading HTTP server of the metrics"""
+
+    daemon_threads = True
+
+    def __init__(self, server_address, scrape_cache):
+        """Constructor of the metric server"""
+        # The address family of the address, e.g. IPv6 for "::"
+        self.address_family = socket.getaddrinfo(*server_address)[0][0]
+        super().__init__(server_address, MetricRequestHandler)
+        self.scrape_cache = scrape_cache
+
+
+def start_metric_server(addr, port, scrape_cache):
+    """Start the metric server of the scrape cache in a daemon thread, and return the server and the thread"""
+    server = MetricServer((addr, port), scrape_cache)
+    thread = threading.Thread(
+        target=server.serve_forever, name="OTIMetricServer", daemon=True
+    )
+    thread.start()
+    return server, thread
+
+
+def make_wsgi_app(scrape_cache):
+    """Create a WSGI app that serves the metrics of the scrape cache"""
+
+    def metrics_app(environ, start_response):
+        """Serve a scrape"""
+        if environ.get("PATH_INFO") == "/favicon.ico":
+            start_response("404 Not Found", [("Content-Type", "text/plain")])
+            return [b"Not Found"]
+        content_type, content_encoding, payload = scrape_cache.scrape(
+            environ.get("HTTP_ACCEPT"), environ.get("HTTP_ACCEPT_ENCODING")
+        )
+        start_response("200 OK", get_response_headers(content_type, content_encoding))
+        return [payload]
+
+    return metrics_app
+
+
+def make_asgi_app(scrape_cache):
+    """Create an ASGI app that serves the metrics of the scrape cache"""
+
+    async def metrics_app(scope, _receive, send):
+        """Serve a scrape"""
+        if scope["type"] != "http":
+            return
+        headers = {
+            name.decode("latin-1").lower(): value.decode("latin-1")
+            for name, value in scope.get("headers", [])
+        }
+        (
+            content_type,
+            content_encoding,
+            payload,
+        ) = await asyncio.get_running_loop().run_in_executor(
+            None,
+            scrape_cache.scrape,
+            headers.get("accept"),
+            headers.get("accept-encoding"),
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in get_response_headers(
+                        content_type, content_encoding
+                    )
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
+
+    return metrics_app
+
+
+def get_response_headers(content_type, content_encoding):
+    """Get the HTTP headers of a scrape response"""
+    headers = [("Content-Type", content_type)]
+    if content_encoding is not None:
+        headers.append(("Content-Encoding", content_encoding))
+    return headers
@@ -0,0 +1,205 @@
+"""
+Support of the multi-process (pre-fork server) mode
+
+Pre-fork servers (e.g. gunicorn with `preload_app`, uWSGI, `multiprocessing`) create the `OTI` object in the parent
+process, then fork the worker processes. The threads of the parent do not exist in the children,
+and the network connections of the exporters must not be shared between the processes.
+
+The worker threads of the OTEL SDK batch span processor and periodic metric reader restart themselves after fork.
+The exporters are wrapped into fork-safe proxies that `OTI` rebuilds in every child process.
+
+The metrics of the Prometheus endpoint are written by every process into its own memory-mapped files
+in the `PROMETHEUS_MULTIPROC_DIR` directory, using the file format of the `prometheus_client` multi-process mode.
+The metric server, which runs in the parent process only, aggregates the files of all the processes on every scrape.
+
+When a worker exits, call `prometheus_client.multiprocess.mark_process_dead(pid)` from the server's child-exit hook
+to remove the live gauges of the worker.
+"""
+
+import os
+import threading
+import time
+from opentelemetry.exporter.prometheus import _CustomCollector
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult
+from opentelemetry.sdk.trace.export import SpanExporter
+from prometheus_client import CollectorRegistry
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+from prometheus_client.multiprocess import MultiProcessCollector
+from .registry import set_completion_callback
+
+# The multi-process file name prefix of each Prometheus metric family type
+FILE_PREFIXES = {
+    "counter": "counter",
+    "gauge": "gauge_liveall",
+    "histogram": "histogram",
+}
+
+
+class ForkSafeSpanExporter(SpanExporter):
+    """Span exporter proxy that can rebuild its delegate exporter in a forked child process"""
+
+    def __init__(self, exporter_factory):
+        """Constructor of the fork-safe span exporter"""
+        self.exporter_factory = exporter_factory
+        self.exporter = exporter_factory()
+        self.completion_callback = None
+        self.deferred_results = set_completion_callback(self.exporter, self.export_done)
+
+    def rebuild(self):
+        """Replace the delegate exporter with a new one that belongs to the current process"""
+        self.exporter = self.exporter_factory()
+        set_completion_callback(self.exporter, self.export_done)
+
+    def export_done(self, succeeded, request, batch):
+        """Pass the result of a request of a deferred delegate exporter on"""
+        if self.completion_callback is not None:
+            self.completion_callback(succeeded, request, batch)
+
+    def export(self, spans):
+        """Export the spans via the delegate exporter"""
+        return self.exporter.export(spans)
+
+    def force_flush(self, timeout_millis=30000):
+        """Force flush the delegate exporter"""
+        return self.exporter.force_flush(timeout_millis)
+
+    def shutdown(self):
+        """Shut down the delegate exporter"""
+        self.exporter.shutdown()
+
+
+class ForkSafeMetricExporter(MetricExporter):
+    """Metric exporter proxy that can rebuild its delegate exporter in a forked child process"""
+
+    def __init__(self, exporter_factory):
+        """Constructor of the fork-safe metric exporter"""
+        self.exporter_factory = exporter_factory
+        self.exporter = exporter_factory()
+        super().__init__(
+            preferred_temporality=self.exporter._preferred_temporality,  # pylint: disable=protected-access
+            preferred_aggregation=self.exporter._preferred_aggregation,  # pylint: disable=protected-access
+        )
+        self.completion_callback = None
+        self.deferred_results = set_completion_callback(self.exporter, self.export_done)
+
+    def rebuild(self):
+        """Replace the delegate exporter with a new one that belongs to the current process"""
+        self.exporter = self.exporter_factory()
+        set_completion_callback(self.exporter, self.export_done)
+
+    def export_done(self, succeeded, request, batch):
+        """Pass the result of a request of a deferred delegate exporter on"""
+        if self.completion_callback is not None:
+            self.completion_callback(succeeded, request, batch)
+
+    def export(self, metrics_data, timeout_millis=10_000, **kwargs):
+        """Export the metrics via the delegate exporter"""
+        return self.exporter.export(
+            metrics_data, timeout_millis=timeout_millis, **kwargs
+        )
+
+    def force_flush(self, timeout_millis=10_000):
+        """Force flush the delegate exporter"""
+        return self.exporter.force_flush(timeout_millis=timeout_millis)
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        """Shut down the delegate exporter"""
+        self.exporter.shutdown(timeout_millis=timeout_millis, **kwargs)
+
+
+class MultiProcessMetricExporter(MetricExporter):
+    """
+    Metric exporter that writes the metrics of the current process into memory-mapped files
+
+    The files follow the `prometheus_client` multi-process file format, so they can be aggregated by the
+    `prometheus_client.multiprocess.MultiProcessCollector`. The metric names are the same ones,
+    that the `PrometheusMetricReader` produces in single-process mode.
+    """
+
+    def __init__(self, multiprocess_dir):
+        """Constructor of the multi-process metric exporter"""
+        super().__init__()
+        self.multiprocess_dir = multiprocess_dir
+        self.lock = threading.Lock()
+        self.files = {}
+        self.pid = os.getpid()
+
+    def get_file(self, family_type):
+        """Get the memory-mapped file of the metric family type, that belongs to the current process"""
+        pid = os.getpid()
+        if pid != self.pid:
+            # The files opened by the parent process must not be written by the child
+            self.files = {}
+            self.pid = pid
+        mmaped_dict = self.files.get(family_type)
+        if mmaped_dict is None:
+            mmaped_dict = MmapedDict(
+                os.path.join(
+                    self.multiprocess_dir, f"{FILE_PREFIXES[family_type]}_{pid}.db"
+                )
+            )
+            self.files[family_type] = mmaped_dict
+        return mmaped_dict
+
+    def export(self, metrics_data, timeout_millis=10_000, **kwargs):
+        """Write the metrics into the memory-mapped files of the current process"""
+        collector = _CustomCollector(disable_target_info=True)
+        collector.add_metrics_data(metrics_data)
+        timestamp = time.time()
+        with self.lock:
+            for family in collector.collect():
+                if family.type not in FILE_PREFIXES:
+                    continue
+                mmaped_dict = self.get_file(family.type)
+                for name, labels, value in iter_multiprocess_samples(family):
+                    key = mmap_key(
+                        family.name,
+                        name,
+                        list(labels.keys()),
+                        list(labels.values()),
+                        family.documentation,
+                    )
+                    mmaped_dict.write_value(key, value, timestamp)
+        return MetricExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis=10_000):
+        """Nothing to flush, the values are written into the files immediately"""
+        return True
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        """Close the memory-mapped files"""
+        with self.lock:
+            if self.pid == os.getpid():
+                for mmaped_dict in self.files.values():
+                    mmaped_dict.close()
+            self.files = {}
+
+
+def iter_multiprocess_samples(family):
+    """
+    Yield the `(name, labels, value)` samples of a Prometheus metric family in the multi-process file format.
+
+    The multi-process collector accumulates the histogram buckets and calculates the `_count` samples itself,
+    so the buckets are converted to non-cumulative values, and the `_count` samples are left out.
+    """
+    previous_buckets = {}
+    for sample in family.samples:
+        if family.type == "histogram":
+            if sample.name.endswith("_count"):
+                continue
+            if sample.name.endswith("_bucket"):
+                series = tuple(
+                    (key, value) for key, value in sample.labels.items() if key != "le"
+                )
+                cumulative = previous_buckets.get(series, 0.0)
+                previous_buckets[series] = sample.value
+                yield sample.name, sample.labels, sample.value - cumulative
+                continue
+        yield sample.name, sample.labels, sample.value
+
+
+def create_multiprocess_registry(multiprocess_dir):
+    """Create a Prometheus collector registry, that aggregates the metrics of all the processes"""
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=multiprocess_dir)
+    return registry
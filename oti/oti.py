@@ -1,29 +1,21 @@
 """The OTI class"""
 
+import atexit
+import copy
+import os
+import threading
+import weakref
 from opentelemetry import trace
 from opentelemetry import metrics
-from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
-from opentelemetry.exporter.otlp.proto.http.metric_exporter import (
-    OTLPMetricExporter as OTLPMetricExporterHttp,
-)
+from opentelemetry.trace import SpanKind
 from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import (
-    PeriodicExportingMetricReader,
-    ConsoleMetricExporter,
-)
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import SpanLimits, TracerProvider
 from opentelemetry.sdk.trace.export import (
     SimpleSpanProcessor,
     BatchSpanProcessor,
-    ConsoleSpanExporter,
-)
-
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
-    OTLPSpanExporter as OTLPGRPCSpanExporter,
-)
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
-    OTLPSpanExporter as OTLPHTTPSpanExporter,
+    SpanExporter,
 )
 from opentelemetry.sdk.trace.sampling import (
     ALWAYS_OFF,
@@ -31,12 +23,24 @@ from opentelemetry.sdk.trace.sampling import (
     ParentBased,
     TraceIdRatioBased,
 )
-from opentelemetry.exporter.prometheus import PrometheusMetricReader
-from prometheus_client import start_http_server
-from .config import OTIConfig
+from .config import OTIConfig, OTIConfigError
+from .processors import (
+    AdaptiveBatchSpanProcessor,
+    FanOutSpanProcessor,
+    TailSamplingSpanProcessor,
+)
+from .registry import SPAN_EXPORTERS, METRIC_EXPORTERS
+from .samplers import (
+    RateLimitingSampler,
+    AdaptiveRateLimitingSampler,
+    ReconfigurableSampler,
+    RuleBasedSampler,
+    load_sampling_rules,
+)
+from .views import create_views, limit_cardinality, set_exporter_preferences
 
 
-class OTI:
+class OTI:  # pylint: disable=too-many-public-methods
     """
     Class for Open Telemetry Instrumentation
 
@@ -48,9 +52,38 @@ class OTI:
     def __init__(self, config=OTIConfig()):
         """Constructor of the Open Telemetry instrumentation object"""
 
+        if config.multiprocess_config.enabled and config.spool_config.enabled:
+            raise OTIConfigError("The spool can not be used in multi-process mode")
+        if (
+            config.spool_config.enabled
+            and config.span_processor_type.upper() == "SIMPLE"
+            and len(config.exporter_configs) == 1
+        ):
+            # The SIMPLE processor would write the spool in the threads of the application
+            raise OTIConfigError(
+                "The spool can not be used with the SIMPLE span processor, use a batching one"
+            )
+
         # Create exporter(s)
         self.config = config
         self.metric_server, self.ms_thread = None, None
+        # The apps that can be mounted into the web server of the application in the ENDPOINT and BOTH modes
+        self.metrics_wsgi_app, self.metrics_asgi_app = None, None
+        self.sampler, self.span_processor = None, None
+        self.span_metrics_processor = None
+        self.config_file_watcher = None
+        # Serializes the reconfigurations, that replace the config
+        self.reconfigure_lock = threading.RLock()
+        # The tracers of the modules of the traced functions
+        self.tracers = {}
+        # The exporters that must be rebuilt in the forked child processes in multi-process mode
+        self.fork_safe_exporters = []
+        self.pipeline_telemetry = None
+        if config.self_telemetry_enabled:
+            # pylint: disable=import-outside-toplevel
+            from .telemetry import PipelineTelemetry
+
+            self.pipeline_telemetry = PipelineTelemetry()
 
         # Create Tracer Provider and set it as global default tracer provider
         self.tracer_provider = self.create_tracer_provider(config)
@@ -66,12 +99,164 @@ class OTI:
         # Creates a meter from global Meter Provider
         self.meter = metrics.get_meter(__name__)
 
+        if self.pipeline_telemetry is not None:
+            self.pipeline_telemetry.bind(self.meter)
+        if self.span_metrics_processor is not None:
+            self.span_metrics_processor.bind(self.meter)
+
+        if config.reload_config.reload_file is not None:
+            self.start_config_file_watcher(config.reload_config)
+
+        if config.flush_config.flush_signals:
+            # pylint: disable=import-outside-toplevel
+            from .flush import install_flush_signal_handler
+
+            for signal_name in config.flush_config.flush_signals:
+                install_flush_signal_handler(signal_name, self.force_flush)
+
+        if config.multiprocess_config.enabled:
+            self.register_at_fork()
+
+    def register_at_fork(self):
+        """Register the hook that reinitializes the instrumentation in the forked child processes"""
+        weak_reinit = weakref.WeakMethod(self.reinit_after_fork)
+
+        def after_in_child():
+            reinit = weak_reinit()
+            if reinit is not None:
+                reinit()
+
+        os.register_at_fork(after_in_child=after_in_child)
+
+    def reinit_after_fork(self):
+        """
+        Reinitialize the instrumentation in a forked child process.
+
+        The worker threads of the span processors and metric readers are restarted by the OTEL SDK itself,
+        and the exporters are rebuilt here. The metric server keeps running in the parent process only.
+        """
+        self.metric_server, self.ms_thread = None, None
+        # The lock may have been held by another thread of the parent process
+        self.reconfigure_lock = threading.RLock()
+        for exporter in self.fork_safe_exporters:
+            exporter.rebuild()
+        if self.config_file_watcher is not None:
+            self.config_file_watcher.start()
+
+    def start_config_file_watcher(self, reload_config):
+        """Start watching the reload file, and install the reload signal handler if it is configured"""
+        # pylint: disable=import-outside-toplevel
+        from .reload import ConfigFileWatcher, install_reload_signal_handler
+
+        # The settings of an existing reload file override the initial ones
+        if os.path.exists(reload_config.reload_file):
+            self.reload_config_file()
+        self.config_file_watcher = ConfigFileWatcher(
+            reload_config.reload_file,
+            reload_config.reload_interval_millis,
+            self.reload_config_file,
+        )
+        if reload_config.reload_signal:
+            install_reload_signal_handler(
+                reload_config.reload_signal, self.config_file_watcher
+            )
+
+    def reload_config_file(self):
+        """Reconfigure the instrumentation with the settings of the reload file"""
+        # pylint: disable=import-outside-toplevel
+        from .reload import read_config_file, get_reloaded_configs
+
+        values = read_config_file(self.config.reload_config.reload_file)
+        # The reloaded configs are copies of the current ones, so they are not replaced in between
+        with self.reconfigure_lock:
+            self.reconfigure(**get_reloaded_configs(values, self.config))
+
+    def reconfigure(
+        self,
+        sampling_config=None,
+        batch_span_processor_config=None,
+        tail_sampling_config=None,
+    ):
+        """
+        Replace the sampler, and change the settings of the span processors without restarting them.
+
+        The schedule delay and the export timeout of the `batch_span_processor_config`, and the latency threshold
+        and the sampling ratio of the `tail_sampling_config` are applied, the other settings need a restart.
+        The SDK `BatchSpanProcessor` only uses the export timeout as the default timeout of `force_flush`,
+        the `AdaptiveBatchSpanProcessor` also adjusts its batch sizes to it.
+        The new sampler is created first, so an invalid sampling config leaves the instrumentation unchanged.
+        The concurrent reconfigurations, e.g. by the config file watcher and the application, are serialized.
+        """
+        with self.reconfigure_lock:
+            config = copy.copy(self.config)
+            sampler = None
+            if sampling_config is not None:
+                sampler = self.setup_sampler(sampling_config)
+                config.sampling_config = sampling_config
+            if batch_span_processor_config is not None:
+                config.batch_span_processor_config = batch_span_processor_config
+            if tail_sampling_config is not None:
+                config.tail_sampling_config = tail_sampling_config
+
+            # The sampler is not created if the tracing is disabled
+            if sampler is not None and self.sampler is not None:
+                self.sampler.sampler = sampler
+            self.reconfigure_span_processor(self.span_processor, config)
+            self.config = config
+
+    def reconfigure_span_processor(self, processor, config):
+        """Apply the reloadable settings of the config to the span processor and to its downstream processors"""
+        bsp_config = config.batch_span_processor_config
+        if isinstance(processor, TailSamplingSpanProcessor):
+            processor.reconfigure(
+                latency_threshold_millis=config.tail_sampling_config.latency_threshold_millis,
+                sampling_ratio=config.tail_sampling_config.sampling_ratio,
+            )
+        elif isinstance(processor, AdaptiveBatchSpanProcessor):
+            processor.reconfigure(
+                schedule_delay_millis=bsp_config.schedule_delay_millis,
+                export_timeout_millis=bsp_config.export_timeout_millis,
+            )
+        elif isinstance(processor, BatchSpanProcessor):
+            if bsp_config.schedule_delay_millis is not None:
+                processor.schedule_delay_millis = bsp_config.schedule_delay_millis
+            # The SDK processor only uses it as the default timeout of force_flush
+            if bsp_config.export_timeout_millis is not None:
+                processor.export_timeout_millis = bsp_config.export_timeout_millis
+        # The wrappers of the tail sampling, fan-out and self-telemetry processors
+        for downstream in (
+            getattr(processor, "downstream", None),
+            getattr(processor, "processor", None),
+            *getattr(processor, "pipelines", ()),
+        ):
+            if downstream is not None:
+                self.reconfigure_span_processor(downstream, config)
+
     def create_tracer_provider(self, config):
-        """Setup the global trace provider according to the config parameters"""
-        span_exporter = self.setup_span_exporter(config)
+        """
+        Setup the global trace provider according to the config parameters.
+        If the tracing is disabled, it is the no-op tracer provider of the OTEL API, and no exporter is created.
+        """
+        if config.span_processor_type.upper() == "DISABLED":
+            return trace.NoOpTracerProvider()
+
+        span_exporters = [
+            self.create_span_exporter(
+                config.with_exporter_config(exporter_config),
+                "traces" if index == 0 else f"traces-{index}",
+            )
+            for index, exporter_config in enumerate(config.exporter_configs)
+        ]
 
-        tracer_provider = TracerProvider(
+        # The tracers keep the sampler of the provider, so it is replaced inside the proxy on reconfiguration.
+        # The span metrics count the spans that are not sampled too, so those are recorded, but not exported.
+        self.sampler = ReconfigurableSampler(
             self.setup_sampler(config.sampling_config),
+            record_unsampled=config.span_metrics_config.enabled,
+        )
+        tracer_provider = TracerProvider(
+            self.sampler,
+            span_limits=self.setup_span_limits(config.span_limits_config),
             resource=Resource.create(
                 {
                     "service.name": config.service_name,
@@ -82,37 +267,112 @@ class OTI:
             ),
         )
 
-        tracer_provider.add_span_processor(
-            self.setup_span_processor(config, span_exporter)
-        )
+        if len(span_exporters) == 1:
+            span_processor = self.setup_span_processor(config, span_exporters[0])
+        else:
+            span_processor = self.setup_fan_out_span_processor(config, span_exporters)
+        if self.pipeline_telemetry is not None:
+            span_processor = self.pipeline_telemetry.instrument_span_processor(
+                span_processor
+            )
+        tracer_provider.add_span_processor(span_processor)
+        self.span_processor = span_processor
+
+        if config.span_metrics_config.enabled:
+            # pylint: disable=import-outside-toplevel
+            from .span_metrics import SpanMetricsProcessor
+
+            self.span_metrics_processor = SpanMetricsProcessor(
+                config.span_metrics_config.attribute_keys
+            )
+            tracer_provider.add_span_processor(self.span_metrics_processor)
 
         return tracer_provider
 
-    def create_meter_provider(self, config):
-        """Setup the global meter provider according to the config parameters"""
-        readers = []
-        reader_periodic = PeriodicExportingMetricReader(
-            self.setup_metric_exporter(config),
-            export_interval_millis=config.periodic_metric_reader_config.export_interval_millis,
-            export_timeout_millis=config.periodic_metric_reader_config.export_timeout_millis,
-        )
+    def create_span_exporter(self, config, spool_name):
+        """Create the span exporter of the exporter config, wrapped according to the config parameters"""
+        if config.multiprocess_config.enabled:
+            # pylint: disable=import-outside-toplevel
+            from .multiprocess import ForkSafeSpanExporter
 
-        reader_endpoint = PrometheusMetricReader()
-        if config.metric_exporter_mode_config == "PERIODIC":
-            readers = [reader_periodic]
-        elif config.metric_exporter_mode_config == "ENDPOINT":
-            readers.append(reader_endpoint)
-            self.start_metric_server(config)
-        elif config.metric_exporter_mode_config == "BOTH":
-            readers = [reader_periodic, reader_endpoint]
-            self.start_metric_server(config)
+            span_exporter = ForkSafeSpanExporter(
+                lambda: self.setup_span_exporter(config)
+            )
+            self.fork_safe_exporters.append(span_exporter)
         else:
+            span_exporter = self.setup_span_exporter(config)
+            if config.spool_config.enabled:
+                span_exporter = self.setup_spool(config, span_exporter, spool_name)
+        if self.pipeline_telemetry is not None:
+            # pylint: disable=import-outside-toplevel
+            from .telemetry import InstrumentedSpanExporter
+
+            span_exporter = InstrumentedSpanExporter(
+                span_exporter, self.pipeline_telemetry
+            )
+        return span_exporter
+
+    def create_meter_provider(self, config):
+        """
+        Setup the global meter provider according to the config parameters.
+        If the metrics are disabled, it is the no-op meter provider of the OTEL API, and no reader is created.
+        """
+        mode = config.metric_exporter_mode_config
+        if mode == "DISABLED":
+            return metrics.NoOpMeterProvider()
+        if mode not in ("PERIODIC", "ENDPOINT", "BOTH"):
             raise NotImplementedError(
-                "Only PERIODIC, ENDPOINT and BOTH modes are supported"
+                "Only PERIODIC, ENDPOINT, BOTH and DISABLED modes are supported"
             )
 
+        # The readers are created only for the selected mode, so the unused exporters are never imported
+        readers = []
+        multiprocess_config = config.multiprocess_config
+        if mode in ("PERIODIC", "BOTH"):
+            # Every exporter gets its own reader, that exports in its own thread,
+            # and that takes over the temporality and aggregation preferences of its exporter
+            for index, exporter_config in enumerate(config.exporter_configs):
+                metric_exporter = self.create_metric_exporter(
+                    config.with_exporter_config(exporter_config),
+                    "metrics" if index == 0 else f"metrics-{index}",
+                )
+                readers.append(
+                    PeriodicExportingMetricReader(
+                        set_exporter_preferences(
+                            metric_exporter, config.metric_aggregation_config
+                        ),
+                        export_interval_millis=config.periodic_metric_reader_config.export_interval_millis,
+                        export_timeout_millis=config.periodic_metric_reader_config.export_timeout_millis,
+                    )
+                )
+        if mode in ("ENDPOINT", "BOTH"):
+            if multiprocess_config.enabled:
+                # pylint: disable=import-outside-toplevel
+                from .multiprocess import MultiProcessMetricExporter
+
+                if multiprocess_config.multiprocess_dir is None:
+                    raise OTIConfigError(
+                        "The PROMETHEUS_MULTIPROC_DIR must be set in multi-process mode"
+                    )
+                # Every process writes its metrics into its own files, and the metric server aggregates them
+                readers.append(
+                    PeriodicExportingMetricReader(
+                        MultiProcessMetricExporter(
+                            multiprocess_config.multiprocess_dir
+                        ),
+                        export_interval_millis=multiprocess_config.sync_interval_millis,
+                    )
+                )
+            else:
+                # pylint: disable=import-outside-toplevel
+                from opentelemetry.exporter.prometheus import PrometheusMetricReader
+
+                readers.append(PrometheusMetricReader())
+            self.start_metric_server(config)
+
         meter_provider = MeterProvider(
             metric_readers=readers,
+            views=create_views(config.metric_views_config),
             resource=Resource.create(
                 {
                     "service.name": config.service_name,
@@ -122,28 +382,108 @@ class OTI:
                 }
             ),
         )
+        limit_cardinality(meter_provider, config.metric_views_config)
 
         return meter_provider
 
+    def create_metric_exporter(self, config, spool_name):
+        """Create the metric exporter of the exporter config, wrapped according to the config parameters"""
+        if config.multiprocess_config.enabled:
+            # pylint: disable=import-outside-toplevel
+            from .multiprocess import ForkSafeMetricExporter
+
+            metric_exporter = ForkSafeMetricExporter(
+                lambda: self.setup_metric_exporter(config)
+            )
+            self.fork_safe_exporters.append(metric_exporter)
+        else:
+            metric_exporter = self.setup_metric_exporter(config)
+            if config.spool_config.enabled:
+                metric_exporter = self.setup_spool(config, metric_exporter, spool_name)
+        if self.pipeline_telemetry is not None:
+            # pylint: disable=import-outside-toplevel
+            from .telemetry import InstrumentedMetricExporter
+
+            metric_exporter = InstrumentedMetricExporter(
+                metric_exporter, self.pipeline_telemetry
+            )
+        return metric_exporter
+
     def start_metric_server(self, config):
-        """Start the metric server. The metrics can be queried via the endpoint specified in the config"""
-        endpoint_config = config.metric_exporter_endpoint_config
-        self.metric_server, self.ms_thread = start_http_server(
-            port=int(endpoint_config.endpoint_port), addr=endpoint_config.endpoint_addr
+        """
+        Start the metric server. The metrics can be queried via the endpoint specified in the config.
+        If the server is disabled by the config, only the `metrics_wsgi_app` and `metrics_asgi_app` serve the metrics.
+        """
+        # pylint: disable=import-outside-toplevel
+        from prometheus_client import REGISTRY
+        from .metric_server import (
+            ScrapeCache,
+            make_asgi_app,
+            make_wsgi_app,
+            start_metric_server,
         )
 
+        registry = REGISTRY
+        if config.multiprocess_config.enabled:
+            # pylint: disable=import-outside-toplevel
+            from .multiprocess import create_multiprocess_registry
+
+            registry = create_multiprocess_registry(
+                config.multiprocess_config.multiprocess_dir
+            )
+
+        endpoint_config = config.metric_exporter_endpoint_config
+        scrape_cache = ScrapeCache(registry, endpoint_config.cache_ttl_millis)
+        self.metrics_wsgi_app = make_wsgi_app(scrape_cache)
+        self.metrics_asgi_app = make_asgi_app(scrape_cache)
+        if endpoint_config.server_enabled:
+            self.metric_server, self.ms_thread = start_metric_server(
+                endpoint_config.endpoint_addr,
+                int(endpoint_config.endpoint_port),
+                scrape_cache,
+            )
+
     def shutdown_metric_server(self):
-        """Shut down the metric server"""
+        """Shut down the metric server, if it was started"""
         if self.metric_server:
             self.metric_server.shutdown()
+            self.metric_server.server_close()
             self.ms_thread.join()
+            self.metric_server, self.ms_thread = None, None
 
     def setup_span_processor(self, config, span_exporter):
         """Setup the trace span processor according to the config parameters"""
         span_processor_type = config.span_processor_type.upper()
 
+        bsp_config = config.batch_span_processor_config
+
         if span_processor_type == "BATCH":
-            return BatchSpanProcessor(span_exporter)
+            return BatchSpanProcessor(
+                span_exporter,
+                max_queue_size=bsp_config.max_queue_size,
+                schedule_delay_millis=bsp_config.schedule_delay_millis,
+                max_export_batch_size=bsp_config.max_export_batch_size,
+                export_timeout_millis=bsp_config.export_timeout_millis,
+            )
+        if span_processor_type == "ADAPTIVE":
+            return AdaptiveBatchSpanProcessor(
+                span_exporter,
+                max_queue_size=bsp_config.max_queue_size,
+                schedule_delay_millis=bsp_config.schedule_delay_millis,
+                max_export_batch_size=bsp_config.max_export_batch_size,
+                export_timeout_millis=bsp_config.export_timeout_millis,
+            )
+        if span_processor_type == "TAIL":
+            return self.setup_tail_sampling_span_processor(
+                config,
+                BatchSpanProcessor(
+                    span_exporter,
+                    max_queue_size=bsp_config.max_queue_size,
+                    schedule_delay_millis=bsp_config.schedule_delay_millis,
+                    max_export_batch_size=bsp_config.max_export_batch_size,
+                    export_timeout_millis=bsp_config.export_timeout_millis,
+                ),
+            )
         if span_processor_type == "SIMPLE":
             return SimpleSpanProcessor(span_exporter)
 
@@ -151,39 +491,169 @@ class OTI:
             f'Unknown OTEL span processor type: "{config.span_processor_type}"'
         )
 
-    def setup_span_exporter(self, config):
-        """Setup the exporter according to the config parameters"""
-        exporter_type = config.exporter_config.exporter_type.upper()
-        if exporter_type == "STDOUT":
-            return ConsoleSpanExporter(service_name=config.service_name)
-        if exporter_type == "OTLPGRPC":
-            return OTLPGRPCSpanExporter(
-                endpoint=config.exporter_config.exporter_url, insecure=True
+    def setup_tail_sampling_span_processor(self, config, downstream):
+        """Setup the tail sampling span processor, that passes the kept traces to the `downstream` processor"""
+        tail_config = config.tail_sampling_config
+        return TailSamplingSpanProcessor(
+            downstream,
+            decision_wait_millis=tail_config.decision_wait_millis,
+            max_buffered_spans=tail_config.max_buffered_spans,
+            latency_threshold_millis=tail_config.latency_threshold_millis,
+            sampling_ratio=tail_config.sampling_ratio,
+        )
+
+    def setup_fan_out_span_processor(self, config, span_exporters):
+        """
+        Setup the span processor that passes the spans to an own batching pipeline of every exporter.
+        The pipelines are `"ADAPTIVE"` processors with the `"ADAPTIVE"` span processor type,
+        and `"BATCH"` ones otherwise, because a `"SIMPLE"` pipeline would block the others while exporting.
+        The `"TAIL"` processor makes the sampling decisions once, before the fan-out.
+        """
+        span_processor_type = config.span_processor_type.upper()
+        if span_processor_type not in ("SIMPLE", "BATCH", "ADAPTIVE", "TAIL"):
+            raise OTIConfigError(
+                f'Unknown OTEL span processor type: "{config.span_processor_type}"'
             )
-        if exporter_type == "OTLPHTTP":
-            return OTLPHTTPSpanExporter(endpoint=config.exporter_config.exporter_url)
+        pipeline_config = copy.copy(config)
+        pipeline_config.span_processor_type = (
+            "ADAPTIVE" if span_processor_type == "ADAPTIVE" else "BATCH"
+        )
+        pipelines = [
+            self.setup_span_processor(pipeline_config, span_exporter)
+            for span_exporter in span_exporters
+        ]
+        span_processor = FanOutSpanProcessor(
+            pipelines, max(pipeline.max_queue_size for pipeline in pipelines)
+        )
+        if span_processor_type == "TAIL":
+            return self.setup_tail_sampling_span_processor(config, span_processor)
+        return span_processor
+
+    def setup_span_exporter(self, config):
+        """Setup the exporter according to the config parameters, wrapped into a circuit breaker if it is enabled"""
+        span_exporter = SPAN_EXPORTERS.create(
+            config.exporter_config.exporter_type, config
+        )
+        if span_exporter is not None:
+            if config.exporter_config.exporter_circuit_breaker_enabled:
+                # pylint: disable=import-outside-toplevel
+                from .resilience import ResilientSpanExporter, create_circuit_breaker
+
+                span_exporter = ResilientSpanExporter(
+                    span_exporter,
+                    create_circuit_breaker(config.exporter_config, "span"),
+                )
+            return span_exporter
 
         raise OTIConfigError(
             f'Unknown OTEL span exporter type: "{config.exporter_config.exporter_type}"'
         )
 
     def setup_metric_exporter(self, config):
-        """Setup the exporter according to the config parameters"""
-        exporter_type = config.exporter_config.exporter_type.upper()
-        if exporter_type == "STDOUT":
-            return ConsoleMetricExporter()
-        if exporter_type == "OTLPGRPC":
-            return OTLPMetricExporter(
-                endpoint=config.exporter_config.exporter_url, insecure=True
-            )
-        if exporter_type == "OTLPHTTP":
-            return OTLPMetricExporterHttp(endpoint=config.exporter_config.exporter_url)
+        """Setup the exporter according to the config parameters, wrapped into a circuit breaker if it is enabled"""
+        metric_exporter = METRIC_EXPORTERS.create(
+            config.exporter_config.exporter_type, config
+        )
+        if metric_exporter is not None:
+            if config.exporter_config.exporter_circuit_breaker_enabled:
+                # pylint: disable=import-outside-toplevel
+                from .resilience import ResilientMetricExporter, create_circuit_breaker
+
+                metric_exporter = ResilientMetricExporter(
+                    metric_exporter,
+                    create_circuit_breaker(config.exporter_config, "metric"),
+                )
+            return metric_exporter
 
         raise OTIConfigError(
-            f'Unknown OTEL span exporter type: "{config.exporter_config.exporter_type}"'
+            f'Unknown OTEL metric exporter type: "{config.exporter_config.exporter_type}"'
+        )
+
+    def setup_spool(self, config, exporter, spool_name):
+        """Wrap the span or metric exporter into a spooling one, that spools into the `spool_name` subdirectory"""
+        # pylint: disable=import-outside-toplevel
+        from .spool import (
+            create_spooling_span_exporter,
+            create_spooling_metric_exporter,
+        )
+
+        if config.spool_config.spool_dir is None:
+            raise OTIConfigError("The OTEL_SPOOL_DIR must be set to use the spool")
+        if isinstance(exporter, SpanExporter):
+            return create_spooling_span_exporter(
+                exporter, config.spool_config, spool_name
+            )
+        return create_spooling_metric_exporter(
+            exporter, config.spool_config, spool_name
+        )
+
+    def get_tracer(self, module_name):
+        """Get the tracer of the module from the tracer provider of the instrumentation, that is cached per module"""
+        tracer = self.tracers.get(module_name)
+        if tracer is None:
+            tracer = self.tracers[module_name] = self.tracer_provider.get_tracer(
+                module_name
+            )
+        return tracer
+
+    def traced(
+        self,
+        name=None,
+        kind=SpanKind.INTERNAL,
+        attributes=None,
+        record_exception=True,
+    ):
+        """
+        Decorator that runs the function, coroutine function or generator function in a span.
+
+        It can be used as `@oti.traced` or `@oti.traced("span name", attributes=...)`.
+        The span is named after the qualified name of the function by default, and it is created by the tracer
+        of the module of the function. The `attributes` is either a dict, or a factory that is called
+        with the arguments of the function, only if the span is recording.
+        If `record_exception` is `True`, the exception of the function is recorded, and the span status is set to error.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .tracing import traced
+
+        if callable(name):
+            return traced(self.get_tracer)(name)
+        return traced(self.get_tracer, name, kind, attributes, record_exception)
+
+    def span(
+        self,
+        name,
+        kind=SpanKind.INTERNAL,
+        attributes=None,
+        record_exception=True,
+        tracer=None,
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Context manager (`with` or `async with`) that runs its block in a span, and returns the span.
+        The span is created by the `tracer` if it is set, or by the `OTI.tracer` otherwise.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .tracing import TracedSpan
+
+        return TracedSpan(
+            tracer or self.tracer, name, kind, attributes, record_exception
+        )
+
+    def setup_span_limits(self, span_limits_config):
+        """Setup the span limits according to the config parameters"""
+        return SpanLimits(
+            max_attributes=span_limits_config.max_attributes,
+            max_events=span_limits_config.max_events,
+            max_links=span_limits_config.max_links,
+            max_span_attributes=span_limits_config.max_span_attributes,
+            max_event_attributes=span_limits_config.max_event_attributes,
+            max_link_attributes=span_limits_config.max_link_attributes,
+            max_attribute_length=span_limits_config.max_attribute_length,
+            max_span_attribute_length=span_limits_config.max_span_attribute_length,
         )
 
-    def setup_sampler(self, sampling_config):
+    def setup_sampler(
+        self, sampling_config
+    ):  # pylint: disable=too-many-return-statements
         """Setup the trace sampler according to the config parameters"""
         sampling_type = sampling_config.trace_sampling_type.upper()
 
@@ -207,20 +677,82 @@ class OTI:
         if sampling_type == "TRACEIDRATIO":
             # "traceidratio": TraceIdRatioBased
             return TraceIdRatioBased(sampling_config.trace_sampling_ratio)
+        # The rate limiting samplers use the `OTEL_TRACES_SAMPLER_ARG` as the spans per second budget
+        if sampling_type == "RATELIMITED":
+            return RateLimitingSampler(sampling_config.trace_sampling_ratio)
+        if sampling_type == "PARENTBASED_RATELIMITED":
+            return ParentBased(
+                root=RateLimitingSampler(sampling_config.trace_sampling_ratio)
+            )
+        if sampling_type == "ADAPTIVE_RATELIMITED":
+            return AdaptiveRateLimitingSampler(sampling_config.trace_sampling_ratio)
+        if sampling_type == "PARENTBASED_ADAPTIVE_RATELIMITED":
+            return ParentBased(
+                root=AdaptiveRateLimitingSampler(sampling_config.trace_sampling_ratio)
+            )
+        # The rule based samplers use the `OTEL_TRACES_SAMPLER_ARG` as the ratio of the spans that match no rule
+        if sampling_type in ("RULES", "PARENTBASED_RULES"):
+            sampler = RuleBasedSampler(
+                load_sampling_rules(
+                    sampling_config.trace_sampling_rules,
+                    sampling_config.trace_sampling_rules_file,
+                ),
+                sampling_config.trace_sampling_ratio,
+            )
+            if sampling_type == "RULES":
+                return sampler
+            return ParentBased(root=sampler)
 
         raise OTIConfigError(
             f'Unknown OTEL trace sampling type: "{sampling_config.trace_sampling_type}"'
         )
 
-    def shutdown(self):
-        """Shut down the OTEL instrumentation"""
-        self.shutdown_metric_server()
-        self.tracer_provider.shutdown()
-        self.meter_provider.shutdown()
-
-
-class OTIConfigError(Exception):
-    """Inappropriate argument value (of correct type)."""
-
-    def __init__(self, *args, **kwargs):  # real signature unknown
-        pass
+    def force_flush(self, timeout_millis=None):
+        """
+        Export the queued spans and collect and export the metrics, in parallel, within the timeout
+        (the `OTEL_FLUSH_TIMEOUT_MILLIS` by default). The instrumentation keeps running.
+        Return the names of the signals (`"traces"`, `"metrics"`) that were not flushed within the timeout.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .flush import run_until_deadline
+
+        if timeout_millis is None:
+            timeout_millis = self.config.flush_config.timeout_millis
+        tasks = {}
+        # The no-op providers of the disabled signals have nothing to flush
+        if isinstance(self.tracer_provider, TracerProvider):
+            tasks["traces"] = lambda: self.tracer_provider.force_flush(timeout_millis)
+        if isinstance(self.meter_provider, MeterProvider):
+            tasks["metrics"] = lambda: self.meter_provider.force_flush(timeout_millis)
+        return run_until_deadline(tasks, timeout_millis, "flush")
+
+    def shutdown(self, timeout_millis=None):
+        """
+        Shut down the OTEL instrumentation. The traces, the metrics and the metric server are shut down in parallel,
+        within the timeout (the `OTEL_FLUSH_TIMEOUT_MILLIS` by default).
+        Return the names of the parts (`"traces"`, `"metrics"`, `"metric_server"`) that were not shut down within the timeout.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .flush import run_until_deadline
+
+        if timeout_millis is None:
+            timeout_millis = self.config.flush_config.timeout_millis
+        if self.config_file_watcher is not None:
+            self.config_file_watcher.stop()
+        tasks = {}
+        if self.metric_server:
+            tasks["metric_server"] = self.shutdown_metric_server
+        # The no-op providers of the disabled signals have nothing to shut down.
+        # The SDK providers would shut down again at exit without a deadline, so their exit handlers are removed.
+        # pylint: disable=protected-access
+        if isinstance(self.tracer_provider, TracerProvider):
+            if self.tracer_provider._atexit_handler is not None:
+                atexit.unregister(self.tracer_provider._atexit_handler)
+                self.tracer_provider._atexit_handler = None
+            tasks["traces"] = self.tracer_provider.shutdown
+        if isinstance(self.meter_provider, MeterProvider):
+            if self.meter_provider._atexit_handler is not None:
+                atexit.unregister(self.meter_provider._atexit_handler)
+                self.meter_provider._atexit_handler = None
+            tasks["metrics"] = lambda: self.meter_provider.shutdown(timeout_millis)
+        return run_until_deadline(tasks, timeout_millis, "shut down")
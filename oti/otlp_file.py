@@ -0,0 +1,345 @@
+"""
+Rotating OTLP file exporters
+
+The exporters of the `OTLPFILE` exporter type write the OTLP export requests into local files instead of sending them,
+so the disk absorbs the bursts on the nodes that have no collector, or no connection to it.
+The files are replayed to a collector later by the `oti-replay` command (see `oti.replay`).
+
+Every signal writes its own files into the directory, named `<signal>-<UTC time>-<pid>-<sequence><suffix>`.
+The encoding of the requests is selected by the `OTEL_EXPORTER_ENCODING`:
+
+- `PROTOBUF`: length-delimited protobuf (a varint length before every serialized request), in `.otlp` files.
+- `JSON`: one OTLP/JSON request per line (NDJSON), in `.ndjson` files.
+
+The files are compressed with gzip (with the `.gz` suffix) if the `OTEL_EXPORTER_COMPRESSION` is `GZIP`.
+The writes are buffered, so an export costs a memory copy, until the buffer fills up or the exporter is flushed.
+The file being written has the `.part` suffix, that is removed when the file is rotated, because it reached
+its maximum size or age, or the exporter is shut down. The age is checked by a background thread too,
+so the file of an idle exporter is rotated as well. Only the files without the `.part` suffix are replayed,
+and the oldest ones are deleted when there are more than the maximum number of files of the signal.
+The `.part` files left behind by the processes that crashed are finalized when a new writer of the signal starts.
+"""
+
+import contextlib
+import gzip
+import logging
+import os
+import threading
+import time
+from opentelemetry.exporter.otlp.proto.common.metrics_encoder import encode_metrics
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from .config import OTIConfigError
+from .encoding import ENCODINGS, encode_message
+
+logger = logging.getLogger(__name__)
+
+FILE_SUFFIXES = {"PROTOBUF": ".otlp", "JSON": ".ndjson"}
+GZIP_SUFFIX = ".gz"
+PARTIAL_SUFFIX = ".part"
+FILE_COMPRESSIONS = ("NONE", "GZIP")
+
+
+def encode_varint(value):
+    """Encode a non-negative integer as a protobuf varint"""
+    data = bytearray()
+    while value > 0x7F:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+def read_varint(stream):
+    """Read a protobuf varint from the stream. It returns `None` at the end of the stream"""
+    value = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise EOFError("Truncated record length")
+            return None
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
+def get_file_encoding(path):
+    """
+    Get the encoding and the compression of an OTLP file from its name, that may have the `.part` suffix.
+    It returns `None` for other files
+    """
+    name = os.path.basename(path)
+    if name.endswith(PARTIAL_SUFFIX):
+        name = name[: -len(PARTIAL_SUFFIX)]
+    compression = "NONE"
+    if name.endswith(GZIP_SUFFIX):
+        name = name[: -len(GZIP_SUFFIX)]
+        compression = "GZIP"
+    for encoding, suffix in FILE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return encoding, compression
+    return None
+
+
+def get_writer_pid(name):
+    """Get the pid of the process that wrote the OTLP file from its name. It returns `None` for other files"""
+    parts = name.split("-")
+    if len(parts) != 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def is_process_alive(pid):
+    """Check whether the process of the pid is running"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process of another user
+        return True
+    return True
+
+
+def read_records(path):
+    """
+    Read the serialized requests of an OTLP file in the encoding of the file.
+    A truncated last record, e.g. of a file that was being written when the process crashed, is skipped.
+    """
+    encoding, compression = get_file_encoding(path)
+    opener = gzip.open if compression == "GZIP" else open
+    with opener(path, "rb") as stream:
+        try:
+            if encoding == "JSON":
+                for line in stream:
+                    line = line.strip()
+                    if line:
+                        yield line
+                return
+            while (length := read_varint(stream)) is not None:
+                record = stream.read(length)
+                if len(record) < length:
+                    raise EOFError("Truncated record")
+                yield record
+        except (EOFError, gzip.BadGzipFile) as error:
+            logger.warning("Skipping the end of %s: %s", path, error)
+
+
+class RotatingFileWriter:
+    """Appends the records to buffered files, that are rotated by their size and age"""
+
+    def __init__(
+        self, directory, signal, encoding, compression, file_exporter_config
+    ):  # pylint: disable=too-many-positional-arguments
+        """Constructor of the rotating file writer"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.signal = signal
+        self.encoding = encoding
+        self.suffix = FILE_SUFFIXES[encoding] + (
+            GZIP_SUFFIX if compression == "GZIP" else ""
+        )
+        self.max_file_bytes = file_exporter_config.max_file_bytes
+        self.max_files = file_exporter_config.max_files
+        self.rotate_interval_sec = file_exporter_config.rotate_interval_millis / 1e3
+        self.buffer_bytes = file_exporter_config.buffer_bytes
+        self.lock = threading.Lock()
+        self.sequence = 0
+        self.path = None
+        self.raw = None
+        self.file = None
+        self.opened_at = 0.0
+        self.finalize_stale_files()
+        self.wakeup = threading.Event()
+        self.rotator = None
+        if self.rotate_interval_sec > 0:
+            self.rotator = threading.Thread(
+                target=self.run, name="OTIFileRotator", daemon=True
+            )
+            self.rotator.start()
+
+    def finalize_stale_files(self):
+        """Remove the `.part` suffix of the files of the signal that were left by the stopped processes"""
+        for name in os.listdir(self.directory):
+            if not (
+                name.startswith(f"{self.signal}-") and name.endswith(PARTIAL_SUFFIX)
+            ):
+                continue
+            pid = get_writer_pid(name[: -len(PARTIAL_SUFFIX)])
+            # The files of this process may be written by another writer
+            if pid is None or pid == os.getpid() or is_process_alive(pid):
+                continue
+            logger.warning("Finalizing the file of a stopped process: %s", name)
+            path = os.path.join(self.directory, name)
+            # The other new writers of the signal may finalize it at the same time
+            with contextlib.suppress(FileNotFoundError):
+                os.rename(path, path[: -len(PARTIAL_SUFFIX)])
+
+    def run(self):
+        """Rotate the active file when it gets old enough, even if nothing is written into it"""
+        timeout = self.rotate_interval_sec
+        while not self.wakeup.wait(timeout):
+            timeout = self.rotate_interval_sec
+            with self.lock:
+                if self.file is None:
+                    continue
+                age = time.monotonic() - self.opened_at
+                if age >= self.rotate_interval_sec:
+                    self.rotate()
+                else:
+                    timeout = self.rotate_interval_sec - age
+
+    def open_file(self):
+        """Open a new file. The lock must be held by the caller"""
+        name = (
+            f"{self.signal}-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}"
+            f"-{os.getpid()}-{self.sequence:06d}{self.suffix}"
+        )
+        self.sequence += 1
+        self.path = os.path.join(self.directory, name)
+        # pylint: disable-next=consider-using-with
+        self.raw = open(self.path + PARTIAL_SUFFIX, "xb", buffering=self.buffer_bytes)
+        self.file = (
+            gzip.GzipFile(fileobj=self.raw, mode="wb")
+            if self.suffix.endswith(GZIP_SUFFIX)
+            else self.raw
+        )
+        self.opened_at = time.monotonic()
+
+    def write(self, payload):
+        """Append a serialized request to the active file, and rotate it if it is full or old enough"""
+        if self.encoding == "PROTOBUF":
+            record = encode_varint(len(payload)) + payload
+        else:
+            record = payload + b"\n"
+        with self.lock:
+            if self.file is None:
+                self.open_file()
+            self.file.write(record)
+            if (
+                self.raw.tell() >= self.max_file_bytes
+                or 0 < self.rotate_interval_sec <= time.monotonic() - self.opened_at
+            ):
+                self.rotate()
+
+    def rotate(self):
+        """Close the active file, so it can be replayed, and delete the oldest files. The lock must be held by the caller"""
+        self.file.close()
+        self.raw.close()
+        os.rename(self.path + PARTIAL_SUFFIX, self.path)
+        self.file = self.raw = None
+        if self.max_files > 0:
+            # The names start with the UTC time, so they are sorted from the oldest
+            names = sorted(
+                name
+                for name in os.listdir(self.directory)
+                if name.startswith(f"{self.signal}-") and name.endswith(self.suffix)
+            )
+            for name in names[: -self.max_files]:
+                logger.warning(
+                    "Too many %s files, deleting the oldest: %s", self.signal, name
+                )
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.directory, name))
+
+    def flush(self):
+        """Write the buffered records into the active file"""
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                self.raw.flush()
+
+    def close(self):
+        """Stop the rotation thread, and close and rotate the active file"""
+        if self.rotator is not None:
+            self.wakeup.set()
+            self.rotator.join()
+        with self.lock:
+            if self.file is not None:
+                self.rotate()
+
+
+class OTLPFileSpanExporter(SpanExporter):
+    """Span exporter that writes the OTLP trace export requests into rotating files"""
+
+    def __init__(self, writer):
+        """Constructor of the file span exporter"""
+        self.writer = writer
+
+    def export(self, spans):
+        """Write the spans into the active file"""
+        try:
+            self.writer.write(encode_message(encode_spans(spans), self.writer.encoding))
+        except OSError as error:
+            logger.warning("Failed to write the spans: %s", error)
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis=30000):
+        """Write the buffered spans into the active file"""
+        self.writer.flush()
+        return True
+
+    def shutdown(self):
+        """Close the active file"""
+        self.writer.close()
+
+
+class OTLPFileMetricExporter(MetricExporter):
+    """Metric exporter that writes the OTLP metric export requests into rotating files"""
+
+    def __init__(self, writer):
+        """Constructor of the file metric exporter"""
+        super().__init__()
+        self.writer = writer
+
+    def export(self, metrics_data, timeout_millis=10_000, **kwargs):
+        """Write the metrics into the active file"""
+        try:
+            self.writer.write(
+                encode_message(encode_metrics(metrics_data), self.writer.encoding)
+            )
+        except OSError as error:
+            logger.warning("Failed to write the metrics: %s", error)
+            return MetricExportResult.FAILURE
+        return MetricExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis=10_000):
+        """Write the buffered metrics into the active file"""
+        self.writer.flush()
+        return True
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        """Close the active file"""
+        self.writer.close()
+
+
+def create_file_writer(config, signal):
+    """Create the rotating file writer of the signal according to the config parameters"""
+    exporter_config = config.exporter_config
+    file_exporter_config = config.file_exporter_config
+    if file_exporter_config.file_dir is None:
+        raise OTIConfigError(
+            "The OTEL_EXPORTER_FILE_DIR must be set to use the OTLPFILE exporter"
+        )
+    encoding = exporter_config.exporter_encoding.upper()
+    if encoding not in ENCODINGS:
+        raise OTIConfigError(
+            f'Unknown OTEL exporter encoding: "{exporter_config.exporter_encoding}"'
+        )
+    compression = exporter_config.exporter_compression.upper()
+    if compression not in FILE_COMPRESSIONS:
+        raise OTIConfigError(
+            f'Unsupported compression of the OTLPFILE exporter: "{exporter_config.exporter_compression}"'
+        )
+    return RotatingFileWriter(
+        file_exporter_config.file_dir,
+        signal,
+        encoding,
+        compression,
+        file_exporter_config,
+    )
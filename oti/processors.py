@@ -0,0 +1,448 @@
+"""Span processors provided by OTI in addition to the ones of the OTEL SDK"""
+
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict, deque
+from time import time_ns
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.trace import StatusCode
+
+logger = logging.getLogger(__name__)
+
+# The queue fill level above which the adaptive processor speeds up draining the queue
+ADAPTIVE_HIGH_WATERMARK = 0.5
+# The queue fill level below which the adaptive processor falls back toward its base settings
+ADAPTIVE_LOW_WATERMARK = 0.1
+# The upper limit of the batch size relative to the configured `max_export_batch_size`
+ADAPTIVE_MAX_BATCH_FACTOR = 8
+# The lower limit of the schedule delay relative to the configured `schedule_delay_millis`
+ADAPTIVE_MIN_DELAY_FACTOR = 0.125
+# The weight of the latest measurement in the exponentially weighted average of the export latency
+ADAPTIVE_LATENCY_SMOOTHING = 0.3
+
+
+class AdaptiveBatchSpanProcessor(BatchSpanProcessor):
+    """
+    Batch span processor that adapts its batch size and flush interval to the load
+
+    The processor measures the latency of every export and checks the fill level of the queue after each batch.
+    When the queue fills up and the exporter keeps up, it grows the batch size and shortens the flush interval
+    to drain the queue before spans are dropped.
+    When the exports get slow (the smoothed latency exceeds the half of the export timeout), it shrinks the batch size.
+    When the load is low again, it returns step by step to the configured batch size and schedule delay.
+    """
+
+    def __init__(
+        self,
+        span_exporter,
+        max_queue_size=None,
+        schedule_delay_millis=None,
+        max_export_batch_size=None,
+        export_timeout_millis=None,
+    ):  # pylint: disable=too-many-positional-arguments
+        """Constructor of the adaptive batch span processor"""
+        super().__init__(
+            span_exporter,
+            max_queue_size=max_queue_size,
+            schedule_delay_millis=schedule_delay_millis,
+            max_export_batch_size=max_export_batch_size,
+            export_timeout_millis=export_timeout_millis,
+        )
+        self.base_export_batch_size = self.max_export_batch_size
+        self.base_schedule_delay_millis = self.schedule_delay_millis
+        self.min_export_batch_size = max(
+            1, self.base_export_batch_size // ADAPTIVE_MAX_BATCH_FACTOR
+        )
+        self.max_adaptive_batch_size = min(
+            self.max_queue_size,
+            self.base_export_batch_size * ADAPTIVE_MAX_BATCH_FACTOR,
+        )
+        self.min_schedule_delay_millis = max(
+            1.0, self.base_schedule_delay_millis * ADAPTIVE_MIN_DELAY_FACTOR
+        )
+        self.latency_budget_millis = self.export_timeout_millis / 2
+        self.export_latency_millis = 0.0
+        # The batch buffer must be able to hold the largest batch the processor may grow to
+        self.spans_list = [None] * self.max_adaptive_batch_size
+
+    def reconfigure(self, schedule_delay_millis=None, export_timeout_millis=None):
+        """Change the base schedule delay and the export timeout, the processor adapts from the new base values"""
+        if schedule_delay_millis is not None:
+            self.base_schedule_delay_millis = schedule_delay_millis
+            self.min_schedule_delay_millis = max(
+                1.0, schedule_delay_millis * ADAPTIVE_MIN_DELAY_FACTOR
+            )
+            self.schedule_delay_millis = schedule_delay_millis
+        if export_timeout_millis is not None:
+            self.export_timeout_millis = export_timeout_millis
+            self.latency_budget_millis = export_timeout_millis / 2
+
+    def _export_batch(self) -> int:
+        """Exports a batch of spans, and adapts the batch size and schedule delay to the measured latency"""
+        start = time_ns()
+        exported = super()._export_batch()
+        if exported:
+            self._adapt((time_ns() - start) / 1e6)
+        return exported
+
+    def _adapt(self, latency_millis):
+        """Recalculates the batch size and the schedule delay after an export that took `latency_millis`"""
+        self.export_latency_millis += ADAPTIVE_LATENCY_SMOOTHING * (
+            latency_millis - self.export_latency_millis
+        )
+        fill_level = len(self.queue) / self.max_queue_size
+        exporter_is_slow = self.export_latency_millis > self.latency_budget_millis
+
+        if exporter_is_slow:
+            # Smaller payloads keep the exports within the timeout
+            self.max_export_batch_size = max(
+                self.min_export_batch_size, self.max_export_batch_size // 2
+            )
+        elif fill_level >= ADAPTIVE_HIGH_WATERMARK:
+            self.max_export_batch_size = min(
+                self.max_adaptive_batch_size, self.max_export_batch_size * 2
+            )
+
+        if fill_level >= ADAPTIVE_HIGH_WATERMARK:
+            self.schedule_delay_millis = max(
+                self.min_schedule_delay_millis, self.schedule_delay_millis / 2
+            )
+        elif fill_level <= ADAPTIVE_LOW_WATERMARK:
+            self.schedule_delay_millis = min(
+                self.base_schedule_delay_millis, self.schedule_delay_millis * 2
+            )
+            if not exporter_is_slow:
+                self.max_export_batch_size = max(
+                    self.base_export_batch_size, self.max_export_batch_size // 2
+                )
+
+
+# The number of the already decided trace IDs remembered to handle the spans that end after the decision
+TAIL_DECIDED_TRACES_CACHE_SIZE = 10000
+# The trace ID ratio sampling uses the lower 64 bits of the trace ID, like the `TraceIdRatioBased` sampler
+TRACE_ID_LIMIT = (1 << 64) - 1
+# The longest time between two checks of the traces that waited too long for their decision
+TAIL_MAX_EVICTION_INTERVAL_SEC = 1.0
+
+
+class TraceBuffer:
+    """
+    The finished spans of a trace waiting for the sampling decision.
+    The start of the earliest and the end of the latest of its spans bound the duration of the trace
+    """
+
+    __slots__ = ("first_seen_ns", "spans", "has_error", "start_ns", "end_ns")
+
+    def __init__(self, first_seen_ns):
+        """Constructor of the trace buffer"""
+        self.first_seen_ns = first_seen_ns
+        self.spans = []
+        self.has_error = False
+        self.start_ns = None
+        self.end_ns = None
+
+    def add(self, span):
+        """Add a finished span to the trace"""
+        self.spans.append(span)
+        if self.start_ns is None or span.start_time < self.start_ns:
+            self.start_ns = span.start_time
+        if self.end_ns is None or span.end_time > self.end_ns:
+            self.end_ns = span.end_time
+        if span.status.status_code is StatusCode.ERROR:
+            self.has_error = True
+
+    def get_duration_ns(self):
+        """Get the time from the start of the earliest span to the end of the latest one"""
+        return self.end_ns - self.start_ns
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Span processor that decides about sampling a trace after its local root span has ended
+
+    The finished spans are grouped by trace ID in a buffer. When the local root span of a trace ends,
+    the trace is kept if any of its spans has error status, if the root span took longer than the
+    `latency_threshold_millis`, or if it falls into the `sampling_ratio` of the rest of the traces.
+    The traces that are decided before their local root span ends are judged by the spans that ended so far,
+    from the start of the earliest to the end of the latest one, not by the time they waited in the buffer.
+    The spans of the kept traces are passed to the downstream span processor, the other ones are dropped.
+
+    The memory is bounded: when the number of buffered spans exceeds `max_buffered_spans`, or a trace waits for
+    its decision longer than `decision_wait_millis`, the oldest traces are decided with the spans they have.
+    The traces that waited too long are also checked by an evictor thread, so they are decided without
+    further spans ending. `force_flush()` decides about all the buffered traces.
+    The spans that end after the decision of their trace follow that decision.
+    """
+
+    def __init__(
+        self,
+        downstream,
+        decision_wait_millis,
+        max_buffered_spans,
+        latency_threshold_millis,
+        sampling_ratio,
+    ):  # pylint: disable=too-many-positional-arguments,too-many-arguments
+        """Constructor of the tail sampling span processor"""
+        self.downstream = downstream
+        self.decision_wait_ns = int(decision_wait_millis * 1e6)
+        self.max_buffered_spans = max_buffered_spans
+        self.latency_threshold_ns = int(latency_threshold_millis * 1e6)
+        self.trace_id_upper_bound = round(sampling_ratio * (TRACE_ID_LIMIT + 1))
+        self.lock = threading.Lock()
+        self.traces = OrderedDict()
+        self.decided_traces = OrderedDict()
+        self.buffered_spans = 0
+        self.eviction_interval_sec = max(
+            0.001, min(TAIL_MAX_EVICTION_INTERVAL_SEC, decision_wait_millis / 1e3)
+        )
+        self.wakeup = threading.Event()
+        self.done = False
+        self.start_evictor()
+        if hasattr(os, "register_at_fork"):
+            weak_reinit = weakref.WeakMethod(self.reinit_after_fork)
+
+            def after_in_child():
+                reinit = weak_reinit()
+                if reinit is not None:
+                    reinit()
+
+            os.register_at_fork(after_in_child=after_in_child)
+
+    def start_evictor(self):
+        """Start the evictor thread"""
+        self.evictor = threading.Thread(
+            name="OTITailSamplingEvictor", target=self.run, daemon=True
+        )
+        self.evictor.start()
+
+    def reinit_after_fork(self):
+        """Drop the traces of the parent process, and restart the evictor thread in the forked child process"""
+        self.lock = threading.Lock()
+        self.traces.clear()
+        self.buffered_spans = 0
+        self.wakeup = threading.Event()
+        if not self.done:
+            self.start_evictor()
+
+    def run(self):
+        """The loop of the evictor thread"""
+        while not self.done:
+            self.wakeup.wait(self.eviction_interval_sec)
+            if self.done:
+                return
+            with self.lock:
+                decided = self.evict(time_ns())
+            self.pass_on(decided)
+
+    def reconfigure(self, latency_threshold_millis=None, sampling_ratio=None):
+        """Change the latency threshold and the sampling ratio of the traces decided from now on"""
+        if latency_threshold_millis is not None:
+            self.latency_threshold_ns = int(latency_threshold_millis * 1e6)
+        if sampling_ratio is not None:
+            self.trace_id_upper_bound = round(sampling_ratio * (TRACE_ID_LIMIT + 1))
+
+    def on_start(self, span, parent_context=None):
+        """Pass the started span to the downstream processor"""
+        self.downstream.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span):
+        """Buffer the finished span, and decide about its trace if the local root span has ended"""
+        context = span.context
+        if not context.trace_flags.sampled:
+            return
+        trace_id = context.trace_id
+        now = time_ns()
+        decided = []
+        with self.lock:
+            keep = self.decided_traces.get(trace_id)
+            if keep is None:
+                trace_buffer = self.traces.get(trace_id)
+                if trace_buffer is None:
+                    trace_buffer = self.traces[trace_id] = TraceBuffer(now)
+                trace_buffer.add(span)
+                self.buffered_spans += 1
+                if span.parent is None or span.parent.is_remote:
+                    del self.traces[trace_id]
+                    decided.append(self.decide(trace_id, trace_buffer))
+                decided.extend(self.evict(now))
+        if keep:
+            self.downstream.on_end(span)
+        self.pass_on(decided)
+
+    def pass_on(self, decided):
+        """Pass the spans of the kept traces of the `(keep, spans)` decisions to the downstream processor"""
+        for keep, spans in decided:
+            if keep:
+                for span in spans:
+                    self.downstream.on_end(span)
+
+    def decide(self, trace_id, trace_buffer):
+        """
+        Make the sampling decision about the trace by the duration of its spans, that ended so far.
+        The lock must be held by the caller
+        """
+        keep = (
+            trace_buffer.has_error
+            or trace_buffer.get_duration_ns() > self.latency_threshold_ns
+            or (trace_id & TRACE_ID_LIMIT) < self.trace_id_upper_bound
+        )
+        self.buffered_spans -= len(trace_buffer.spans)
+        self.decided_traces[trace_id] = keep
+        if len(self.decided_traces) > TAIL_DECIDED_TRACES_CACHE_SIZE:
+            self.decided_traces.popitem(last=False)
+        return keep, trace_buffer.spans
+
+    def evict(self, now):
+        """Decide about the oldest traces that waited too long or exceed the buffer limit. The lock must be held"""
+        evicted = []
+        while self.traces:
+            trace_id, trace_buffer = next(iter(self.traces.items()))
+            if (
+                self.buffered_spans <= self.max_buffered_spans
+                and now - trace_buffer.first_seen_ns < self.decision_wait_ns
+            ):
+                break
+            del self.traces[trace_id]
+            evicted.append(self.decide(trace_id, trace_buffer))
+        return evicted
+
+    def decide_all(self):
+        """Decide about all the buffered traces, and pass the kept ones on"""
+        with self.lock:
+            decided = [
+                self.decide(trace_id, trace_buffer)
+                for trace_id, trace_buffer in self.traces.items()
+            ]
+            self.traces.clear()
+        self.pass_on(decided)
+
+    def shutdown(self):
+        """Stop the evictor thread, decide about the buffered traces, then shut down the downstream processor"""
+        self.done = True
+        self.wakeup.set()
+        self.evictor.join()
+        self.decide_all()
+        self.downstream.shutdown()
+
+    def force_flush(self, timeout_millis=30000):
+        """Decide about the buffered traces with the spans they have, then flush the downstream processor"""
+        self.decide_all()
+        return self.downstream.force_flush(timeout_millis)
+
+
+class FanOutSpanProcessor(SpanProcessor):
+    """
+    Span processor that passes the spans to several independent pipelines, one per exporter
+
+    The application threads only append the finished spans to the dispatch queue. A dispatcher thread moves them
+    into the queues of the pipelines (e.g. batch span processors), that export them in their own worker threads.
+    So the application pays for one enqueue per span whatever the number of pipelines is,
+    and a slow or unavailable backend fills and drops from its own queue only, without delaying the others.
+    If the dispatcher falls behind and the dispatch queue is full, the oldest span is dropped for every pipeline.
+    Those drops are counted in `dropped_spans`, and the first one is logged.
+    """
+
+    def __init__(self, pipelines, max_queue_size):
+        """Constructor of the fan-out span processor"""
+        self.pipelines = pipelines
+        self.queue = deque(maxlen=max_queue_size)
+        self.max_queue_size = max_queue_size
+        self.dropped_spans = 0
+        # Taken only when a span is dropped, so the concurrent drops are not lost
+        self.drop_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        # The spans popped by a dispatch are passed to the pipelines before an other dispatch returns
+        self.dispatch_lock = threading.Lock()
+        self.done = False
+        self.start_dispatcher()
+        if hasattr(os, "register_at_fork"):
+            weak_reinit = weakref.WeakMethod(self.reinit_after_fork)
+
+            def after_in_child():
+                reinit = weak_reinit()
+                if reinit is not None:
+                    reinit()
+
+            os.register_at_fork(after_in_child=after_in_child)
+
+    def start_dispatcher(self):
+        """Start the dispatcher thread"""
+        self.dispatcher = threading.Thread(
+            name="OTIFanOutDispatcher", target=self.run, daemon=True
+        )
+        self.dispatcher.start()
+
+    def reinit_after_fork(self):
+        """Drop the spans of the parent process, and restart the dispatcher thread in the forked child process"""
+        self.queue.clear()
+        self.wakeup = threading.Event()
+        self.dispatch_lock = threading.Lock()
+        self.drop_lock = threading.Lock()
+        self.start_dispatcher()
+
+    def on_start(self, span, parent_context=None):
+        """Pass the started span to the pipelines"""
+        for pipeline in self.pipelines:
+            pipeline.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span):
+        """Append the finished span to the dispatch queue"""
+        if self.done or not span.context.trace_flags.sampled:
+            return
+        if len(self.queue) >= self.max_queue_size:
+            self.drop_span()
+        self.queue.append(span)
+        # The dispatcher clears the event before it drains the queue, so no span is left behind
+        if not self.wakeup.is_set():
+            self.wakeup.set()
+
+    def drop_span(self):
+        """Count the span that the full dispatch queue drops, and log the first one"""
+        with self.drop_lock:
+            self.dropped_spans += 1
+            dropped_spans = self.dropped_spans
+        if dropped_spans == 1:
+            logger.warning(
+                "The fan-out dispatch queue is full, dropping the oldest spans"
+            )
+
+    def run(self):
+        """The loop of the dispatcher thread"""
+        while not self.done:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            self.dispatch()
+
+    def dispatch(self):
+        """Move the spans of the dispatch queue to the pipelines"""
+        queue = self.queue
+        with self.dispatch_lock:
+            while queue:
+                try:
+                    span = queue.popleft()
+                except IndexError:
+                    return
+                for pipeline in self.pipelines:
+                    pipeline.on_end(span)
+
+    def shutdown(self):
+        """Dispatch the remaining spans, then shut down the pipelines"""
+        self.done = True
+        self.wakeup.set()
+        self.dispatcher.join()
+        self.dispatch()
+        for pipeline in self.pipelines:
+            pipeline.shutdown()
+
+    def force_flush(self, timeout_millis=30000):
+        """Dispatch the queued spans, then flush the pipelines within the timeout"""
+        deadline_ns = time_ns() + timeout_millis * 1_000_000
+        self.dispatch()
+        flushed = True
+        for pipeline in self.pipelines:
+            remaining_millis = max(0, (deadline_ns - time_ns()) // 1_000_000)
+            flushed = pipeline.force_flush(remaining_millis) and flushed
+        return flushed
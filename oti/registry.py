@@ -0,0 +1,290 @@
+"""
+The registry of the span and metric exporters
+
+The exporters are registered as factory functions by their exporter type names.
+The factories import the modules of the exporters only when they are called,
+so a process pays the import cost only for the exporter type it really uses.
+
+Third-party packages can add further exporter types via the `oti.span_exporters` and `oti.metric_exporters`
+entry point groups. The name of the entry point is the exporter type, and it must refer to a factory function
+that gets the `OTIConfig` object and returns the exporter instance, for example:
+
+```python
+setup(
+    ...
+    entry_points={
+        "oti.span_exporters": ["MYEXPORTER = my_package.exporters:create_span_exporter"],
+    },
+)
+```
+"""
+
+# pylint: disable=import-outside-toplevel
+from importlib.metadata import entry_points
+from .config import OTIConfigError
+
+SPAN_EXPORTER_ENTRY_POINT_GROUP = "oti.span_exporters"
+METRIC_EXPORTER_ENTRY_POINT_GROUP = "oti.metric_exporters"
+COMPRESSIONS = ("NONE", "GZIP", "DEFLATE")
+CONSOLE_FORMATS = ("PRETTY", "NDJSON")
+
+
+class ExporterRegistry:
+    """Maps the exporter type names to the factory functions of the exporters"""
+
+    def __init__(self, entry_point_group, factories=None):
+        """Constructor of the exporter registry"""
+        self.entry_point_group = entry_point_group
+        self.factories = {}
+        for exporter_type, factory in (factories or {}).items():
+            self.register(exporter_type, factory)
+
+    def register(self, exporter_type, factory):
+        """Register the `factory(config)` function that creates the exporter of the `exporter_type`"""
+        self.factories[exporter_type.upper()] = factory
+
+    def get_factory(self, exporter_type):
+        """
+        Get the factory function of the `exporter_type`.
+        If it is not registered yet, it looks it up among the entry points. It returns `None` if it is not found.
+        """
+        exporter_type = exporter_type.upper()
+        factory = self.factories.get(exporter_type)
+        if factory is None:
+            for entry_point in entry_points(group=self.entry_point_group):
+                if entry_point.name.upper() == exporter_type:
+                    factory = entry_point.load()
+                    self.register(exporter_type, factory)
+                    break
+        return factory
+
+    def create(self, exporter_type, config):
+        """Create an exporter of the `exporter_type`. It returns `None` if the type is unknown"""
+        factory = self.get_factory(exporter_type)
+        if factory is None:
+            return None
+        return factory(config)
+
+
+def create_stdout_span_exporter(config):
+    """Create the span exporter of the STDOUT exporter type in the configured console format"""
+    if get_console_format(config) == "NDJSON":
+        from .console import NDJSONConsoleSpanExporter, create_shared_writer
+
+        return NDJSONConsoleSpanExporter(create_shared_writer(config))
+
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    return ConsoleSpanExporter(service_name=config.service_name)
+
+
+def create_otlpgrpc_span_exporter(config):
+    """Create the span exporter of the OTLPGRPC exporter type"""
+    from .grpc_channel import SharedChannelOTLPSpanExporter
+
+    return SharedChannelOTLPSpanExporter(
+        get_grpc_channel(config), **get_grpc_exporter_kwargs(config)
+    )
+
+
+def create_otlphttp_span_exporter(config):
+    """Create the span exporter of the OTLPHTTP exporter type"""
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+        OTLPSpanExporter,
+    )
+
+    return OTLPSpanExporter(**get_http_exporter_kwargs(config))
+
+
+def create_otlphttp_async_span_exporter(config):
+    """Create the span exporter of the OTLPHTTP_ASYNC exporter type"""
+    from .async_http import AsyncOTLPHTTPSpanExporter
+
+    return AsyncOTLPHTTPSpanExporter(
+        get_async_transport(config),
+        get_async_encoding(config),
+        get_compression(config),
+    )
+
+
+def create_otlpfile_span_exporter(config):
+    """Create the span exporter of the OTLPFILE exporter type"""
+    from .otlp_file import OTLPFileSpanExporter, create_file_writer
+
+    return OTLPFileSpanExporter(create_file_writer(config, "traces"))
+
+
+def create_stdout_metric_exporter(config):
+    """Create the metric exporter of the STDOUT exporter type in the configured console format"""
+    if get_console_format(config) == "NDJSON":
+        from .console import NDJSONConsoleMetricExporter, create_shared_writer
+
+        return NDJSONConsoleMetricExporter(create_shared_writer(config))
+
+    from opentelemetry.sdk.metrics.export import ConsoleMetricExporter
+
+    return ConsoleMetricExporter()
+
+
+def create_otlpgrpc_metric_exporter(config):
+    """Create the metric exporter of the OTLPGRPC exporter type"""
+    from .grpc_channel import SharedChannelOTLPMetricExporter
+
+    return SharedChannelOTLPMetricExporter(
+        get_grpc_channel(config), **get_grpc_exporter_kwargs(config)
+    )
+
+
+def create_otlphttp_metric_exporter(config):
+    """Create the metric exporter of the OTLPHTTP exporter type"""
+    from opentelemetry.exporter.otlp.proto.http.metric_exporter import (
+        OTLPMetricExporter,
+    )
+
+    return OTLPMetricExporter(**get_http_exporter_kwargs(config))
+
+
+def create_otlphttp_async_metric_exporter(config):
+    """Create the metric exporter of the OTLPHTTP_ASYNC exporter type"""
+    from .async_http import AsyncOTLPHTTPMetricExporter
+
+    return AsyncOTLPHTTPMetricExporter(
+        get_async_transport(config),
+        get_async_encoding(config),
+        get_compression(config),
+    )
+
+
+def create_otlpfile_metric_exporter(config):
+    """Create the metric exporter of the OTLPFILE exporter type"""
+    from .otlp_file import OTLPFileMetricExporter, create_file_writer
+
+    return OTLPFileMetricExporter(create_file_writer(config, "metrics"))
+
+
+def get_compression(config):
+    """Get the validated compression of the exporters"""
+    compression = config.exporter_config.exporter_compression.upper()
+    if compression not in COMPRESSIONS:
+        raise OTIConfigError(
+            f'Unknown OTEL exporter compression: "{config.exporter_config.exporter_compression}"'
+        )
+    return compression
+
+
+def get_console_format(config):
+    """Get the validated output format of the console exporters"""
+    console_format = config.console_exporter_config.output_format.upper()
+    if console_format not in CONSOLE_FORMATS:
+        raise OTIConfigError(
+            f'Unknown OTEL console exporter format: "{config.console_exporter_config.output_format}"'
+        )
+    return console_format
+
+
+def set_completion_callback(exporter, callback):
+    """
+    Register the `callback(succeeded, request, batch)` of a wrapper as the completion callback of the exporter,
+    if the exporter reports the results of its requests later (e.g. the `OTLPHTTP_ASYNC` ones).
+    It returns `True` if it does
+    """
+    if getattr(exporter, "deferred_results", False) is not True:
+        return False
+    exporter.completion_callback = callback
+    return True
+
+
+def get_grpc_channel(config):
+    """Get the gRPC channel shared by the trace and metric exporters"""
+    from .grpc_channel import get_shared_channel, GRPC_COMPRESSIONS
+
+    return get_shared_channel(
+        config.exporter_config.exporter_url,
+        GRPC_COMPRESSIONS[get_compression(config)],
+        config.exporter_config.exporter_channel_options,
+    )
+
+
+def get_grpc_exporter_kwargs(config):
+    """Get the arguments of the OTLP gRPC exporters"""
+    from .grpc_channel import GRPC_COMPRESSIONS
+
+    exporter_config = config.exporter_config
+    return {
+        "endpoint": exporter_config.exporter_url,
+        "insecure": True,
+        "headers": exporter_config.exporter_headers or None,
+        "timeout": exporter_config.exporter_timeout_millis / 1e3,
+        "compression": GRPC_COMPRESSIONS[get_compression(config)],
+    }
+
+
+def get_http_exporter_kwargs(config):
+    """Get the arguments of the OTLP HTTP exporters"""
+    from opentelemetry.exporter.otlp.proto.http import Compression
+
+    exporter_config = config.exporter_config
+    return {
+        "endpoint": exporter_config.exporter_url,
+        "headers": exporter_config.exporter_headers or None,
+        "timeout": exporter_config.exporter_timeout_millis / 1e3,
+        "compression": Compression(get_compression(config).lower()),
+    }
+
+
+def get_async_transport(config):
+    """Get the asyncio OTLP/HTTP transport shared by the trace and metric exporters"""
+    from .async_http import get_base_url, get_shared_transport
+
+    exporter_config = config.exporter_config
+    return get_shared_transport(
+        get_base_url(exporter_config.exporter_url),
+        exporter_config.exporter_max_in_flight,
+        exporter_config.exporter_timeout_millis / 1e3,
+        exporter_config.exporter_headers,
+    )
+
+
+def get_async_encoding(config):
+    """Get the validated encoding of the asyncio OTLP/HTTP exporters"""
+    from .async_http import CONTENT_TYPES
+
+    encoding = config.exporter_config.exporter_encoding.upper()
+    if encoding not in CONTENT_TYPES:
+        raise OTIConfigError(
+            f'Unknown OTEL exporter encoding: "{config.exporter_config.exporter_encoding}"'
+        )
+    return encoding
+
+
+SPAN_EXPORTERS = ExporterRegistry(
+    SPAN_EXPORTER_ENTRY_POINT_GROUP,
+    {
+        "STDOUT": create_stdout_span_exporter,
+        "OTLPGRPC": create_otlpgrpc_span_exporter,
+        "OTLPHTTP": create_otlphttp_span_exporter,
+        "OTLPHTTP_ASYNC": create_otlphttp_async_span_exporter,
+        "OTLPFILE": create_otlpfile_span_exporter,
+    },
+)
+
+METRIC_EXPORTERS = ExporterRegistry(
+    METRIC_EXPORTER_ENTRY_POINT_GROUP,
+    {
+        "STDOUT": create_stdout_metric_exporter,
+        "OTLPGRPC": create_otlpgrpc_metric_exporter,
+        "OTLPHTTP": create_otlphttp_metric_exporter,
+        "OTLPHTTP_ASYNC": create_otlphttp_async_metric_exporter,
+        "OTLPFILE": create_otlpfile_metric_exporter,
+    },
+)
+
+
+def register_span_exporter(exporter_type, factory):
+    """Register a span exporter factory function for the `exporter_type`"""
+    SPAN_EXPORTERS.register(exporter_type, factory)
+
+
+def register_metric_exporter(exporter_type, factory):
+    """Register a metric exporter factory function for the `exporter_type`"""
+    METRIC_EXPORTERS.register(exporter_type, factory)
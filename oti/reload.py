@@ -0,0 +1,157 @@
+"""
+Reloading of the sampling and span processor settings
+
+The reload file holds `NAME=VALUE` lines, e.g.:
+
+```
+# Sample every trace during the incident
+OTEL_TRACES_SAMPLER=PARENTBASED_TRACEID_RATIO
+OTEL_TRACES_SAMPLER_ARG=1.0
+```
+
+The names are the environment variables of the reloadable settings (see `RELOADABLE_SETTINGS`),
+the settings that are not in the file keep their current values.
+The `ConfigFileWatcher` thread checks the modification time and the size of the file periodically,
+and reloads it when it has changed, or when it is triggered, e.g. by a signal handler.
+"""
+
+import copy
+import logging
+import os
+import signal
+import threading
+from .config import OTIConfigError
+
+logger = logging.getLogger(__name__)
+
+# The config attribute, the field and the type of the reloadable settings by their environment variable names
+RELOADABLE_SETTINGS = {
+    "OTEL_TRACES_SAMPLER": ("sampling_config", "trace_sampling_type", str),
+    "OTEL_TRACES_SAMPLER_ARG": ("sampling_config", "trace_sampling_ratio", float),
+    "OTEL_TRACES_SAMPLER_RULES_FILE": (
+        "sampling_config",
+        "trace_sampling_rules_file",
+        str,
+    ),
+    "OTEL_BSP_SCHEDULE_DELAY": (
+        "batch_span_processor_config",
+        "schedule_delay_millis",
+        int,
+    ),
+    "OTEL_BSP_EXPORT_TIMEOUT": (
+        "batch_span_processor_config",
+        "export_timeout_millis",
+        int,
+    ),
+    "OTEL_TAIL_SAMPLING_LATENCY_THRESHOLD_MILLIS": (
+        "tail_sampling_config",
+        "latency_threshold_millis",
+        float,
+    ),
+    "OTEL_TAIL_SAMPLING_RATIO": ("tail_sampling_config", "sampling_ratio", float),
+}
+
+
+def read_config_file(path):
+    """Read the `NAME=VALUE` lines of the config file into a dict, skipping the empty and comment lines"""
+    values = {}
+    with open(path, encoding="utf-8") as config_file:
+        for line in config_file:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            name, value = (part.strip() for part in line.split("=", 1))
+            values[name] = value
+    return values
+
+
+def get_reloaded_configs(values, config):
+    """
+    Get the copies of the sampling, batch span processor and tail sampling configs of the `config`
+    that are updated with the reloadable settings of the `values`, by the name of their `OTIConfig` attribute
+    """
+    configs = {}
+    for name, value in values.items():
+        if name not in RELOADABLE_SETTINGS:
+            logger.warning("The %s setting can not be reloaded", name)
+            continue
+        config_name, field, convert = RELOADABLE_SETTINGS[name]
+        if config_name not in configs:
+            configs[config_name] = copy.copy(getattr(config, config_name))
+        try:
+            setattr(configs[config_name], field, convert(value))
+        except ValueError as error:
+            raise OTIConfigError(f'Invalid value of {name}: "{value}"') from error
+    return configs
+
+
+class ConfigFileWatcher:
+    """Thread that calls the `reload` callback when the config file changes, or when it is triggered"""
+
+    def __init__(self, path, interval_millis, reload):
+        """Constructor of the config file watcher"""
+        self.path = path
+        self.interval = interval_millis / 1000 if interval_millis else None
+        self.reload = reload
+        self.last_stat = self.stat()
+        self.triggered = threading.Event()
+        self.done = False
+        self.thread = None
+        self.start()
+
+    def start(self):
+        """Start the watcher thread"""
+        self.done = False
+        self.thread = threading.Thread(
+            target=self.run, name="OTIConfigFileWatcher", daemon=True
+        )
+        self.thread.start()
+
+    def stat(self):
+        """Get the modification time and the size of the file, or `None` if it does not exist"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def trigger(self):
+        """Reload the config file now, even if it has not changed"""
+        self.triggered.set()
+
+    def run(self):
+        """Check the config file until the watcher is stopped"""
+        while not self.done:
+            triggered = self.triggered.wait(self.interval)
+            self.triggered.clear()
+            if self.done:
+                break
+            stat = self.stat()
+            if stat is None or (stat == self.last_stat and not triggered):
+                continue
+            self.last_stat = stat
+            try:
+                self.reload()
+            except (OSError, ValueError, OTIConfigError) as error:
+                logger.warning("Failed to reload %s: %s", self.path, error)
+
+    def stop(self):
+        """Stop the watcher thread"""
+        self.done = True
+        self.triggered.set()
+        self.thread.join()
+
+
+def install_reload_signal_handler(signal_name, watcher):
+    """Trigger the config file watcher when the process receives the signal, e.g. `"SIGHUP"`"""
+    try:
+        signum = getattr(signal, signal_name.upper())
+    except AttributeError as error:
+        raise OTIConfigError(f'Unknown signal: "{signal_name}"') from error
+    try:
+        signal.signal(signum, lambda _signum, _frame: watcher.trigger())
+    except ValueError as error:
+        # The signal handlers can be installed only in the main thread
+        raise OTIConfigError(
+            f"Failed to install the {signal_name} handler: {error}"
+        ) from error
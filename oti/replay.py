@@ -0,0 +1,234 @@
+"""
+Replay of the OTLP files to a collector
+
+It sends the files written by the `OTLPFILE` exporter to a collector, oldest first.
+The requests of a file are merged into batches of `--batch-size` requests, and `--concurrency` batches are sent
+in parallel. A failed batch is retried `--retries` times with exponential backoff.
+The files that have been sent completely are deleted if `--delete` is set, so the command can be rerun
+after a failure. The files that are still being written (with the `.part` suffix) are skipped,
+unless `--include-partial` is set, e.g. to replay the files of the processes that crashed.
+
+The exporter is configured by the same environment variables as the exporters of `OTI`,
+e.g. `OTEL_EXPORTER_HEADERS`, `OTEL_EXPORTER_COMPRESSION` and `OTEL_EXPORTER_TIMEOUT_MILLIS`.
+The `OTLPGRPC`, `OTLPHTTP` and `OTLPHTTP_ASYNC` exporter types are supported.
+
+Usage:
+
+```bash
+oti-replay [--exporter-type OTLPGRPC] [--exporter-url http://localhost:4317] [--concurrency 4] [--batch-size 64] \\
+    [--retries 3] [--delete] [--include-partial] PATH [PATH ...]
+```
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from google.protobuf.json_format import ParseError
+from google.protobuf.message import DecodeError
+from opentelemetry.proto.collector.metrics.v1.metrics_service_pb2 import (  # pylint: disable=no-name-in-module
+    ExportMetricsServiceRequest,
+)
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (  # pylint: disable=no-name-in-module
+    ExportTraceServiceRequest,
+)
+from .config import ExporterConfig, OTIConfig, OTIConfigError, get_init_value
+from .encoding import decode_message
+from .otlp_file import PARTIAL_SUFFIX, get_file_encoding, read_records
+from .registry import METRIC_EXPORTERS, SPAN_EXPORTERS
+from .spool import get_serialized_sender
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLAY_EXPORTER_TYPE = "OTLPGRPC"
+SIGNALS = {
+    "traces": (SPAN_EXPORTERS, ExportTraceServiceRequest),
+    "metrics": (METRIC_EXPORTERS, ExportMetricsServiceRequest),
+}
+RETRY_BACKOFF_SEC = 1.0
+
+
+def find_files(paths, include_partial=False):
+    """
+    Find the OTLP files of the paths, the files of the directories are sorted from the oldest.
+    The files of the directories that are being written are found only if `include_partial` is set
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if get_file_encoding(name) is not None
+                and (include_partial or not name.endswith(PARTIAL_SUFFIX))
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def get_signal(path):
+    """Get the signal of an OTLP file from its name"""
+    signal = os.path.basename(path).split("-", 1)[0]
+    if signal not in SIGNALS or get_file_encoding(path) is None:
+        raise OTIConfigError(f"Not an OTLP file: {path}")
+    return signal
+
+
+def read_batches(path, batch_size):
+    """Read the requests of the OTLP file merged into protobuf encoded batches of `batch_size` requests"""
+    encoding, _compression = get_file_encoding(path)
+    message_class = SIGNALS[get_signal(path)][1]
+    batch = []
+    for record in read_records(path):
+        if encoding != "PROTOBUF":
+            record = decode_message(record, encoding, message_class).SerializeToString()
+        batch.append(record)
+        if len(batch) >= batch_size:
+            # The concatenation of serialized OTLP requests is a valid request that holds all their items
+            yield b"".join(batch)
+            batch = []
+    if batch:
+        yield b"".join(batch)
+
+
+class Replayer:
+    """Sends the batches of the OTLP files in parallel threads, with one exporter per thread and signal"""
+
+    def __init__(
+        self, exporter_config, concurrency, batch_size, retries
+    ):  # pylint: disable=too-many-positional-arguments
+        """Constructor of the replayer"""
+        self.config = OTIConfig(exporter_config=exporter_config)
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.retries = retries
+        self.executor = ThreadPoolExecutor(
+            self.concurrency, thread_name_prefix="OTIReplay"
+        )
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.exporters = []
+
+    def get_sender(self, signal):
+        """Get the serialized sender of the signal of the current thread"""
+        senders = getattr(self.local, "senders", None)
+        if senders is None:
+            senders = self.local.senders = {}
+        if signal not in senders:
+            exporter = SIGNALS[signal][0].create(
+                self.config.exporter_config.exporter_type, self.config
+            )
+            if exporter is None:
+                raise OTIConfigError(
+                    f'Unknown OTEL exporter type: "{self.config.exporter_config.exporter_type}"'
+                )
+            with self.lock:
+                self.exporters.append(exporter)
+            senders[signal] = get_serialized_sender(exporter)
+        return senders[signal]
+
+    def send(self, signal, batch):
+        """Send a batch, and retry it with exponential backoff. It returns `True` if the batch has been sent"""
+        send = self.get_sender(signal)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(RETRY_BACKOFF_SEC * 2 ** (attempt - 1))
+            if send(batch):
+                return True
+        return False
+
+    def replay_file(self, path):
+        """Send the batches of the file. It returns the number of the sent and the failed batches"""
+        signal = get_signal(path)
+        futures = deque()
+        sent = failed = 0
+        for batch in read_batches(path, self.batch_size):
+            # At most two rounds of batches are read ahead of the senders
+            if len(futures) >= 2 * self.concurrency:
+                if futures.popleft().result():
+                    sent += 1
+                else:
+                    failed += 1
+            futures.append(self.executor.submit(self.send, signal, batch))
+        for future in futures:
+            if future.result():
+                sent += 1
+            else:
+                failed += 1
+        return sent, failed
+
+    def shutdown(self):
+        """Stop the threads, and shut down the exporters"""
+        self.executor.shutdown()
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+def main(argv=None):
+    """Parse the command line arguments, and replay the files. It returns the exit code"""
+    parser = argparse.ArgumentParser(
+        prog="oti-replay", description=__doc__.split("\n\n")[1]
+    )
+    parser.add_argument("paths", nargs="+", help="The OTLP files or directories")
+    parser.add_argument(
+        "--exporter-type",
+        help="The exporter type. Default: OTEL_EXPORTER_TYPE or OTLPGRPC",
+    )
+    parser.add_argument(
+        "--exporter-url", help="The URL of the collector. Default: OTEL_EXPORTER_URL"
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument(
+        "--delete", action="store_true", help="Delete the files that have been sent"
+    )
+    parser.add_argument(
+        "--include-partial",
+        action="store_true",
+        help="Replay the files with the .part suffix too, e.g. of the processes that crashed",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    exporter_config = ExporterConfig(
+        exporter_type=get_init_value(
+            args.exporter_type, DEFAULT_REPLAY_EXPORTER_TYPE, "OTEL_EXPORTER_TYPE"
+        ),
+        exporter_url=args.exporter_url,
+    )
+    replayer = Replayer(
+        exporter_config, args.concurrency, args.batch_size, args.retries
+    )
+    failed_files = 0
+    try:
+        for path in find_files(args.paths, args.include_partial):
+            try:
+                sent, failed = replayer.replay_file(path)
+            except (OSError, ValueError, DecodeError, ParseError) as error:
+                logger.error("Failed to read %s: %s", path, error)
+                failed_files += 1
+                continue
+            if failed:
+                logger.error(
+                    "Sent %d batches of %s, %d batches failed", sent, path, failed
+                )
+                failed_files += 1
+                continue
+            logger.info("Sent %d batches of %s", sent, path)
+            if args.delete:
+                os.remove(path)
+    except OTIConfigError as error:
+        parser.error(str(error))
+    finally:
+        replayer.shutdown()
+    return 1 if failed_files else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Circuit breaker of the exporters
+
+When the collector degrades, every export waits out the timeout (and the retries) of the exporter,
+so the worker threads of the span processors and metric readers fall behind, and their queues fill up.
+The resilient exporters of this module wrap an exporter with a circuit breaker:
+
+- `CLOSED`: the batches are exported. After `failure_threshold` consecutive failures the circuit opens.
+- `OPEN`: the batches fail right away without calling the exporter, so the spool (if it is enabled) takes them,
+  or the batch span processor drops them, instead of blocking the worker thread.
+  The circuit stays open for a jittered exponential backoff, that doubles with every consecutive opening
+  from `backoff_initial_millis` up to `backoff_max_millis`.
+- `HALF_OPEN`: after the backoff one probe batch is exported, while the others still fail right away.
+  If the probe succeeds, the circuit closes and the backoff is reset, otherwise the circuit opens again.
+
+The `backoff_max_millis` bounds the time from the recovery of the collector to the next probe,
+so the throughput recovers within seconds.
+
+The OTLP exporters of the OTEL SDK retry the failed exports with their own exponential backoff for about a minute,
+while the worker thread waits. The resilient exporters send their batches in a single attempt instead,
+bounded by the timeout of the exporter, so the backoff of the circuit breaker is the only retry.
+They rely on private attributes of the SDK exporters (e.g. `_client`, `_translate_data`, `_export` and `_session`),
+that the tests check, so an upgrade of the SDK that changes them fails the tests.
+
+The exporters that report the results of their requests later (see the `oti.async_http` module) are judged by those results:
+their queued exports count neither as success nor as failure until the response arrives.
+"""
+
+import logging
+import random
+import threading
+from time import monotonic
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from .registry import set_completion_callback
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker with jittered exponential backoff"""
+
+    def __init__(
+        self, name, failure_threshold, backoff_initial_millis, backoff_max_millis
+    ):
+        """Constructor of the circuit breaker"""
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.backoff_initial = backoff_initial_millis / 1000
+        self.backoff_max = backoff_max_millis / 1000
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.openings = 0
+        self.open_until = 0.0
+        self.rejected = 0
+
+    def get_backoff(self):
+        """Get the jittered backoff of the current opening, between the half and the whole of the exponential backoff"""
+        backoff = min(
+            self.backoff_max, self.backoff_initial * 2 ** min(self.openings, 32)
+        )
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def allow_request(self):
+        """Check whether a request may be sent, and start the probe if the backoff has elapsed"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and monotonic() >= self.open_until:
+                self.state = HALF_OPEN
+                return True
+            # A probe is in flight, or the circuit is open
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        """Record a successful request, and close the circuit"""
+        with self.lock:
+            if self.state != CLOSED:
+                logger.warning(
+                    "The %s exporter recovered, the circuit is closed after %d rejected exports",
+                    self.name,
+                    self.rejected,
+                )
+            self.state = CLOSED
+            self.failures = 0
+            self.openings = 0
+            self.rejected = 0
+
+    def record_failure(self):
+        """Record a failed request, and open the circuit after too many failures or a failed probe"""
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                backoff = self.get_backoff()
+                if self.state == CLOSED:
+                    logger.warning(
+                        "The %s exporter failed %d times, the circuit is open for %.1f seconds",
+                        self.name,
+                        self.failures,
+                        backoff,
+                    )
+                self.state = OPEN
+                self.open_until = monotonic() + backoff
+                self.openings += 1
+
+    def record(self, succeeded):
+        """Record the result of a request"""
+        if succeeded:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def guard(self, send):
+        """Wrap a `send(body)` function, that returns `True` on success, into the circuit breaker"""
+
+        def guarded_send(body):
+            if not self.allow_request():
+                return False
+            succeeded = False
+            try:
+                succeeded = send(body)
+            finally:
+                self.record(succeeded)
+            return succeeded
+
+        return guarded_send
+
+
+class ResilientSpanExporter(SpanExporter):
+    """Span exporter that fails right away while the circuit of its delegate exporter is open"""
+
+    def __init__(self, exporter, circuit_breaker):
+        """Constructor of the resilient span exporter"""
+        self.exporter = exporter
+        self.circuit_breaker = circuit_breaker
+        self.export_once = get_single_attempt_export(exporter)
+        self.completion_callback = None
+        self.deferred_results = set_completion_callback(exporter, self.export_done)
+
+    def export(self, spans):
+        """Export the spans, unless the circuit is open"""
+        if not self.circuit_breaker.allow_request():
+            return SpanExportResult.FAILURE
+        result = SpanExportResult.FAILURE
+        try:
+            if self.export_once is None:
+                result = self.exporter.export(spans)
+            elif self.export_once(spans):
+                result = SpanExportResult.SUCCESS
+        finally:
+            succeeded = result is SpanExportResult.SUCCESS
+            # The queued requests of the deferred exporters are recorded by `export_done()`
+            if not (succeeded and self.deferred_results):
+                self.circuit_breaker.record(succeeded)
+        return result
+
+    def export_done(self, succeeded, request, batch):
+        """Record the result of a request of a deferred exporter"""
+        self.circuit_breaker.record(succeeded)
+        if self.completion_callback is not None:
+            self.completion_callback(succeeded, request, batch)
+
+    def force_flush(self, timeout_millis=30000):
+        """Force flush the delegate exporter"""
+        return self.exporter.force_flush(timeout_millis)
+
+    def shutdown(self):
+        """Shut down the delegate exporter"""
+        self.exporter.shutdown()
+
+
+class ResilientMetricExporter(MetricExporter):
+    """Metric exporter that fails right away while the circuit of its delegate exporter is open"""
+
+    def __init__(self, exporter, circuit_breaker):
+        """Constructor of the resilient metric exporter"""
+        super().__init__(
+            preferred_temporality=exporter._preferred_temporality,  # pylint: disable=protected-access
+            preferred_aggregation=exporter._preferred_aggregation,  # pylint: disable=protected-access
+        )
+        self.exporter = exporter
+        self.circuit_breaker = circuit_breaker
+        self.export_once = get_single_attempt_export(exporter)
+        self.completion_callback = None
+        self.deferred_results = set_completion_callback(exporter, self.export_done)
+
+    def export(self, metrics_data, timeout_millis=10_000, **kwargs):
+        """Export the metrics, unless the circuit is open"""
+        if not self.circuit_breaker.allow_request():
+            return MetricExportResult.FAILURE
+        result = MetricExportResult.FAILURE
+        try:
+            if self.export_once is None:
+                result = self.exporter.export(
+                    metrics_data, timeout_millis=timeout_millis, **kwargs
+                )
+            elif self.export_once(metrics_data):
+                result = MetricExportResult.SUCCESS
+        finally:
+            succeeded = result is MetricExportResult.SUCCESS
+            # The queued requests of the deferred exporters are recorded by `export_done()`
+            if not (succeeded and self.deferred_results):
+                self.circuit_breaker.record(succeeded)
+        return result
+
+    def export_done(self, succeeded, request, batch):
+        """Record the result of a request of a deferred exporter"""
+        self.circuit_breaker.record(succeeded)
+        if self.completion_callback is not None:
+            self.completion_callback(succeeded, request, batch)
+
+    def force_flush(self, timeout_millis=10_000):
+        """Force flush the delegate exporter"""
+        return self.exporter.force_flush(timeout_millis=timeout_millis)
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        """Shut down the delegate exporter"""
+        self.exporter.shutdown(timeout_millis=timeout_millis, **kwargs)
+
+
+def get_single_attempt_export(exporter):
+    """
+    Get the `export(data)` function that sends a batch of the OTLP exporter of the OTEL SDK in a single attempt,
+    without the retries of the exporter. It returns `True` on success, or `None` if the exporter does not retry
+    """
+    # pylint: disable=protected-access,import-outside-toplevel
+    if hasattr(exporter, "_client") and hasattr(exporter, "_translate_data"):
+        # The OTLP/gRPC exporters
+        from .grpc_channel import export_serialized
+
+        def export_grpc(data):
+            if exporter._shutdown:
+                return False
+            batches = [data]
+            # The metric exporters split the collections into batches of `max_export_batch_size` data points
+            if getattr(exporter, "_max_export_batch_size", None) is not None:
+                batches = exporter._split_metrics_data(data)
+            succeeded = True
+            for batch in batches:
+                succeeded = (
+                    export_serialized(exporter, exporter._translate_data(batch))
+                    and succeeded
+                )
+            return succeeded
+
+        return export_grpc
+    if hasattr(exporter, "_export") and hasattr(exporter, "_session"):
+        # The OTLP/HTTP exporters
+        serialize = getattr(exporter, "_serialize_spans", None)
+        if serialize is None:
+            from opentelemetry.exporter.otlp.proto.common.metrics_encoder import (
+                encode_metrics,
+            )
+
+            def serialize(data):
+                return encode_metrics(data).SerializeToString()
+
+        def export_http(data):
+            if getattr(exporter, "_shutdown", False):
+                return False
+            try:
+                response = exporter._export(serialize(data))
+            except OSError as error:
+                logger.warning("Failed to export the batch: %s", error)
+                return False
+            if not response.ok:
+                logger.warning(
+                    "Failed to export the batch: %d %s",
+                    response.status_code,
+                    response.reason,
+                )
+            return response.ok
+
+        return export_http
+    return None
+
+
+def create_circuit_breaker(exporter_config, signal):
+    """Create the circuit breaker of the exporter of the exporter config"""
+    return CircuitBreaker(
+        f"{exporter_config.exporter_type} {signal}",
+        exporter_config.exporter_circuit_breaker_failure_threshold,
+        exporter_config.exporter_backoff_initial_millis,
+        exporter_config.exporter_backoff_max_millis,
+    )
@@ -0,0 +1,418 @@
+"""Trace samplers provided by OTI in addition to the ones of the OTEL SDK"""
+
+import json
+import re
+import threading
+from time import monotonic
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanKind, get_current_span
+from .config import OTIConfigError
+
+# The samplers check the 64 low-order bits of the trace ID, like the `TraceIdRatioBased` sampler of the SDK
+TRACE_ID_LIMIT = (1 << 64) - 1
+# The length of the window the adaptive rate limiting sampler measures the throughput in
+DEFAULT_ADAPTIVE_WINDOW_SEC = 1.0
+# The weight of the latest window in the smoothed throughput of the adaptive rate limiting sampler
+ADAPTIVE_THROUGHPUT_SMOOTHING = 0.5
+# The rule based sampler caches the matching rule of at most this many span name and kind pairs
+MAX_CACHED_RULE_KEYS = 10_000
+# The fields of a sampling rule
+SAMPLING_RULE_FIELDS = (
+    "name",
+    "name_regex",
+    "kind",
+    "attributes",
+    "attribute_regexes",
+    "ratio",
+    "rate_limit",
+)
+
+
+def get_parent_trace_state(parent_context):
+    """Get the trace state of the parent span, if there is a valid one"""
+    parent_span_context = get_current_span(parent_context).get_span_context()
+    if parent_span_context is None or not parent_span_context.is_valid:
+        return None
+    return parent_span_context.trace_state
+
+
+class RateLimitingSampler(Sampler):
+    """
+    Sampler that samples at most `spans_per_second` spans per second
+
+    It uses a token bucket, that is refilled continuously with `spans_per_second` tokens per second,
+    and can hold at most one second worth of tokens, so short bursts are also sampled. A zero budget drops every span.
+    The lock is held only for the few arithmetic operations of the bucket update.
+    """
+
+    def __init__(self, spans_per_second):
+        """Constructor of the rate limiting sampler"""
+        if spans_per_second < 0:
+            raise ValueError("The spans per second must not be negative.")
+        self.spans_per_second = spans_per_second
+        # The bucket holds at least one token, so the budgets below one span per second sample too,
+        # except the zero budget, that samples nothing
+        self.capacity = max(1.0, spans_per_second) if spans_per_second > 0 else 0.0
+        self.tokens = self.capacity
+        self.last_refill = monotonic()
+        self.lock = threading.Lock()
+
+    def should_sample(
+        self,
+        parent_context,
+        trace_id,
+        name,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Sample the span if there is a token in the bucket"""
+        now = monotonic()
+        with self.lock:
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.last_refill) * self.spans_per_second,
+            )
+            self.last_refill = now
+            sampled = self.tokens >= 1.0
+            if sampled:
+                self.tokens -= 1.0
+        if sampled:
+            return SamplingResult(
+                Decision.RECORD_AND_SAMPLE,
+                attributes,
+                get_parent_trace_state(parent_context),
+            )
+        return SamplingResult(
+            Decision.DROP, None, get_parent_trace_state(parent_context)
+        )
+
+    def get_description(self):
+        """Get the description of the sampler"""
+        return f"RateLimitingSampler{{{self.spans_per_second}}}"
+
+
+class AdaptiveRateLimitingSampler(Sampler):
+    """
+    Sampler that adapts its sampling ratio to keep the sampled spans per second near to `spans_per_second`
+
+    It counts the spans it is asked about, and at the end of every window it recomputes the sampling ratio from
+    the smoothed throughput. Within a window the decision is a trace ID ratio check, like the one of the
+    `TraceIdRatioBased` sampler, so the traces are sampled consistently.
+    The span counter is updated without locking, so it may miss a few concurrent updates,
+    that is acceptable for estimating the throughput.
+    """
+
+    def __init__(self, spans_per_second, window_sec=DEFAULT_ADAPTIVE_WINDOW_SEC):
+        """Constructor of the adaptive rate limiting sampler"""
+        if spans_per_second < 0:
+            raise ValueError("The spans per second must not be negative.")
+        self.spans_per_second = spans_per_second
+        self.window_sec = window_sec
+        self.throughput = None
+        self.ratio = 1.0
+        self.bound = TRACE_ID_LIMIT + 1
+        self.seen = 0
+        self.window_end = monotonic() + window_sec
+        self.lock = threading.Lock()
+
+    def should_sample(
+        self,
+        parent_context,
+        trace_id,
+        name,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Sample the span according to the sampling ratio of the current window"""
+        self.seen += 1
+        now = monotonic()
+        if now >= self.window_end:
+            self.close_window(now)
+        if trace_id & TRACE_ID_LIMIT < self.bound:
+            return SamplingResult(
+                Decision.RECORD_AND_SAMPLE,
+                attributes,
+                get_parent_trace_state(parent_context),
+            )
+        return SamplingResult(
+            Decision.DROP, None, get_parent_trace_state(parent_context)
+        )
+
+    def close_window(self, now):
+        """Recompute the sampling ratio from the throughput measured in the window that has ended"""
+        if not self.lock.acquire(blocking=False):  # pylint: disable=consider-using-with
+            # Another thread is already closing the window
+            return
+        try:
+            if now < self.window_end:
+                return
+            elapsed = now - self.window_end + self.window_sec
+            throughput = self.seen / elapsed
+            self.seen = 0
+            self.window_end = now + self.window_sec
+            if self.throughput is None:
+                self.throughput = throughput
+            else:
+                self.throughput += ADAPTIVE_THROUGHPUT_SMOOTHING * (
+                    throughput - self.throughput
+                )
+            if self.throughput <= self.spans_per_second:
+                self.ratio = 1.0
+            else:
+                self.ratio = self.spans_per_second / self.throughput
+            self.bound = round(self.ratio * (TRACE_ID_LIMIT + 1))
+        finally:
+            self.lock.release()
+
+    def get_description(self):
+        """Get the description of the sampler"""
+        return f"AdaptiveRateLimitingSampler{{{self.spans_per_second}}}"
+
+
+class ReconfigurableSampler(Sampler):
+    """
+    Sampler proxy whose delegate sampler can be replaced while the spans are started
+
+    The tracers keep the sampler of the tracer provider, so the sampler is swapped inside this proxy.
+    Replacing the `sampler` attribute is atomic, and `should_sample()` reads it once without any lock.
+
+    If `record_unsampled` is set, the spans dropped by the delegate sampler are recorded without being sampled,
+    so the span processors (e.g. the span metrics) see every span, but only the sampled ones are exported.
+    """
+
+    def __init__(self, sampler, record_unsampled=False):
+        """Constructor of the reconfigurable sampler"""
+        self.sampler = sampler
+        self.record_unsampled = record_unsampled
+
+    def should_sample(
+        self,
+        parent_context,
+        trace_id,
+        name,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Sample the span by the current delegate sampler"""
+        result = self.sampler.should_sample(
+            parent_context, trace_id, name, kind, attributes, links, trace_state
+        )
+        if self.record_unsampled and result.decision is Decision.DROP:
+            # The recorded span gets its attributes from the sampling result
+            return SamplingResult(Decision.RECORD_ONLY, attributes, result.trace_state)
+        return result
+
+    def get_description(self):
+        """Get the description of the current delegate sampler"""
+        return self.sampler.get_description()
+
+
+class SamplingRule:  # pylint: disable=too-few-public-methods
+    """A compiled sampling rule: the conditions on the span and the sampler of the matching spans"""
+
+    def __init__(self, rule):
+        """Compile the rule dict. It raises `OTIConfigError` if the rule is invalid"""
+        unknown_fields = set(rule) - set(SAMPLING_RULE_FIELDS)
+        if unknown_fields:
+            raise OTIConfigError(
+                f"Unknown sampling rule fields: {sorted(unknown_fields)}"
+            )
+        if ("ratio" in rule) == ("rate_limit" in rule):
+            raise OTIConfigError(
+                f"A sampling rule needs either a ratio or a rate_limit: {rule}"
+            )
+        if "name" in rule and "name_regex" in rule:
+            raise OTIConfigError(
+                f"A sampling rule can not have both a name and a name_regex: {rule}"
+            )
+        self.rule = rule
+        self.name = rule.get("name")
+        try:
+            self.name_regex = (
+                re.compile(rule["name_regex"]) if "name_regex" in rule else None
+            )
+            self.kind = SpanKind[rule["kind"].upper()] if "kind" in rule else None
+            self.attributes = tuple(rule.get("attributes", {}).items())
+            self.attribute_regexes = tuple(
+                (key, re.compile(regex))
+                for key, regex in rule.get("attribute_regexes", {}).items()
+            )
+            if "ratio" in rule:
+                self.sampler = TraceIdRatioBased(float(rule["ratio"]))
+            else:
+                self.sampler = RateLimitingSampler(float(rule["rate_limit"]))
+        except (KeyError, TypeError, ValueError, re.error) as error:
+            raise OTIConfigError(f"Invalid sampling rule {rule}: {error}") from error
+        # The rules without attribute conditions match the same way for every span of a name and kind
+        self.has_attribute_conditions = bool(self.attributes or self.attribute_regexes)
+        # The (key, value) of the rules that only check one exact attribute value, they are looked up in a dict
+        self.lookup_attribute = None
+        if len(self.attributes) == 1 and not self.attribute_regexes:
+            if isinstance(self.attributes[0][1], (str, int, float, bool)):
+                self.lookup_attribute = self.attributes[0]
+
+    def matches_name_and_kind(self, name, kind):
+        """Check the kind and the name regex of the rule. The exact name has already been looked up"""
+        if self.kind is not None and self.kind is not kind:
+            return False
+        return self.name_regex is None or self.name_regex.fullmatch(name) is not None
+
+    def matches_attributes(self, attributes):
+        """Check the attribute conditions of the rule"""
+        if attributes is None:
+            return not self.has_attribute_conditions
+        for key, value in self.attributes:
+            if attributes.get(key) != value:
+                return False
+        for key, regex in self.attribute_regexes:
+            value = attributes.get(key)
+            if value is None or regex.fullmatch(str(value)) is None:
+                return False
+        return True
+
+    def match(self, attributes):
+        """Get the rule if the span matches its attribute conditions, otherwise `None`"""
+        return self if self.matches_attributes(attributes) else None
+
+
+class AttributeLookup:  # pylint: disable=too-few-public-methods
+    """Consecutive rules that check one exact value of the same attribute, compiled into a dict lookup"""
+
+    def __init__(self, key):
+        """Constructor of the lookup of the attribute key"""
+        self.key = key
+        self.rules_by_value = {}
+
+    def match(self, attributes):
+        """Get the first rule of the attribute value of the span, otherwise `None`"""
+        if attributes is None:
+            return None
+        try:
+            return self.rules_by_value.get(attributes.get(self.key))
+        except TypeError:
+            # Unhashable attribute values do not match any rule value
+            return None
+
+
+def load_sampling_rules(rules=None, rules_file=None):
+    """
+    Load the sampling rules from the JSON file, or from the list of rule dicts (or its JSON string).
+    It raises `OTIConfigError` if the rules can not be loaded.
+    """
+    try:
+        if rules_file:
+            with open(rules_file, encoding="utf-8") as file:
+                rules = json.load(file)
+        elif isinstance(rules, str):
+            rules = json.loads(rules) if rules.strip() else []
+    except (OSError, ValueError) as error:
+        raise OTIConfigError(f"Failed to load the sampling rules: {error}") from error
+    if not isinstance(rules, list) or not all(isinstance(rule, dict) for rule in rules):
+        raise OTIConfigError("The sampling rules must be a list of objects")
+    return rules
+
+
+class RuleBasedSampler(Sampler):
+    """
+    Sampler that samples the spans by the first of the `rules` they match, or by the `default_ratio`
+
+    A rule (a dict) matches the spans by the `name` (exact) or the `name_regex`, the `kind`, the exact values of the
+    `attributes`, and the `attribute_regexes`, all of them optional. The matching spans are sampled by the `ratio`
+    (like `TraceIdRatioBased`), or by the `rate_limit` spans per second (like `RateLimitingSampler`), e.g.:
+
+    ```python
+    [
+        {"name": "GET /health", "ratio": 0},
+        {"attributes": {"http.route": "/checkout"}, "ratio": 1},
+        {"kind": "CONSUMER", "rate_limit": 10},
+    ]
+    ```
+
+    The rules are compiled when the sampler is created. Every span name gets the list of the rules that may
+    match it: the rules of that exact `name` and the rules without a `name`, in their original order.
+    The regexes are precompiled, and the rules a span name and kind may match are compiled once into the
+    steps of its decision: consecutive rules that check one exact value of the same attribute become a dict
+    lookup, and the steps end at the first rule without attribute conditions. So a span of a known name and
+    kind costs a dict lookup, plus a lookup per group of attribute rules, whatever the number of rules is.
+    """
+
+    def __init__(self, rules, default_ratio):
+        """Constructor of the rule based sampler"""
+        self.rules = [SamplingRule(rule) for rule in rules]
+        self.default_rule = SamplingRule({"ratio": default_ratio})
+        self.unnamed_rules = tuple(rule for rule in self.rules if rule.name is None)
+        self.rules_by_name = {}
+        for rule in self.rules:
+            if rule.name is not None and rule.name not in self.rules_by_name:
+                self.rules_by_name[rule.name] = tuple(
+                    candidate
+                    for candidate in self.rules
+                    if candidate.name in (None, rule.name)
+                )
+        # The steps of the decision of the (name, kind) pairs
+        self.cache = {}
+
+    def compile_steps(self, name, kind):
+        """Compile the rules the spans of the name and kind may match into the steps of their decision"""
+        steps = []
+        for rule in self.rules_by_name.get(name, self.unnamed_rules):
+            if not rule.matches_name_and_kind(name, kind):
+                continue
+            if not rule.has_attribute_conditions:
+                # It matches every span, the rules after it are never checked
+                steps.append(rule)
+                return tuple(steps)
+            if rule.lookup_attribute is None:
+                steps.append(rule)
+                continue
+            key, value = rule.lookup_attribute
+            if not steps or getattr(steps[-1], "key", None) != key:
+                steps.append(AttributeLookup(key))
+            # The first rule of a value wins, like in the original order
+            steps[-1].rules_by_value.setdefault(value, rule)
+        steps.append(self.default_rule)
+        return tuple(steps)
+
+    def find_rule(self, name, kind, attributes):
+        """Find the first rule the span matches, or the default rule"""
+        key = (name, kind)
+        steps = self.cache.get(key)
+        if steps is None:
+            steps = self.compile_steps(name, kind)
+            if len(self.cache) < MAX_CACHED_RULE_KEYS:
+                self.cache[key] = steps
+        for step in steps:
+            rule = step.match(attributes)
+            if rule is not None:
+                return rule
+        return self.default_rule
+
+    def should_sample(
+        self,
+        parent_context,
+        trace_id,
+        name,
+        kind=None,
+        attributes=None,
+        links=None,
+        trace_state=None,
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Sample the span by the sampler of its first matching rule"""
+        return self.find_rule(name, kind, attributes).sampler.should_sample(
+            parent_context, trace_id, name, kind, attributes, links, trace_state
+        )
+
+    def get_description(self):
+        """Get the description of the sampler"""
+        return f"RuleBasedSampler{{{len(self.rules)} rules}}"
@@ -0,0 +1,114 @@
+"""
+Span metrics (request rate, error rate and duration) computed from the ended spans
+
+The `SpanMetricsProcessor` records every ended span into three instruments of the `OTI.meter`:
+
+- `span.calls`: counter of the ended spans.
+- `span.errors`: counter of the ended spans with error status.
+- `span.duration`: histogram of the duration of the spans in seconds.
+
+The measurements have the `span.name`, `span.kind` and `status.code` attributes,
+and the values of the configured span attributes (e.g. `http.route`), if the span has them.
+The attribute dicts of the series are built once, when the first span of the series ends,
+so recording a span of an existing series takes one dict lookup and the three instrument calls.
+
+The processor sees the spans that are recorded. When the span metrics are enabled, the spans that are not sampled
+are recorded too (see `ReconfigurableSampler`), so the metrics count every span, while only the sampled ones
+are exported by the span processors of the exporters.
+"""
+
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.trace import StatusCode
+
+# The bucket boundaries of the duration histogram in seconds, the ones of the HTTP semantic conventions
+DURATION_BUCKET_BOUNDARIES = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+# The attribute dicts of at most this many series are kept, the further series build them per span
+MAX_CACHED_SERIES = 10_000
+
+
+class SpanMetricsProcessor(SpanProcessor):
+    """
+    Span processor that records the calls, the errors and the duration of the ended spans as metrics
+
+    The spans are ignored until the instruments are created by `bind()`,
+    because the processor is set up before the meter provider exists.
+    """
+
+    def __init__(self, attribute_keys):
+        """Constructor of the span metrics processor"""
+        self.attribute_keys = tuple(attribute_keys)
+        # The attribute dicts of the series by the span name, kind, status code and attribute values
+        self.series = {}
+        self.calls = None
+        self.errors = None
+        self.duration = None
+
+    def bind(self, meter):
+        """Create the instruments on the `meter`"""
+        self.calls = meter.create_counter(
+            "span.calls", unit="{span}", description="The number of ended spans"
+        )
+        self.errors = meter.create_counter(
+            "span.errors",
+            unit="{span}",
+            description="The number of ended spans with error status",
+        )
+        self.duration = meter.create_histogram(
+            "span.duration",
+            unit="s",
+            description="The duration of the spans",
+            explicit_bucket_boundaries_advisory=DURATION_BUCKET_BOUNDARIES,
+        )
+
+    def get_series_attributes(self, key, span):
+        """Build the attributes of the new series of the key"""
+        attributes = {
+            "span.name": span.name,
+            "span.kind": span.kind.name,
+            "status.code": span.status.status_code.name,
+        }
+        for attribute_key, value in zip(self.attribute_keys, key[3:]):
+            if value is not None:
+                attributes[attribute_key] = value
+        # Concurrent spans of a new series may build it twice, both builds are equal
+        if len(self.series) < MAX_CACHED_SERIES:
+            self.series[key] = attributes
+        return attributes
+
+    def on_end(self, span):
+        """Record the ended span"""
+        if self.calls is None:
+            return
+        status_code = span.status.status_code
+        if self.attribute_keys:
+            span_attributes = span.attributes
+            key = (
+                span.name,
+                span.kind,
+                status_code,
+                *(span_attributes.get(key) for key in self.attribute_keys),
+            )
+        else:
+            key = (span.name, span.kind, status_code)
+        attributes = self.series.get(key)
+        if attributes is None:
+            attributes = self.get_series_attributes(key, span)
+        self.calls.add(1, attributes)
+        if status_code is StatusCode.ERROR:
+            self.errors.add(1, attributes)
+        self.duration.record((span.end_time - span.start_time) / 1e9, attributes)
@@ -0,0 +1,456 @@
+"""
+Disk-backed spool of the export requests
+
+When the collector is unavailable or slow, the exporters give up after a few retries, and the data is lost.
+The spooling exporters of this module wrap the OTLP exporters, and write the serialized OTLP requests of the failed
+exports into a spool on disk instead. A background thread replays the spooled requests in large batches
+as soon as the exporter succeeds again, and it also retries them periodically.
+
+The spool is a directory of fixed size, memory-mapped segment files. The requests are appended to the active segment,
+and when it is full, a new segment is started. The total size of the segments is capped,
+when the cap is reached, the oldest segment is evicted with the requests it holds.
+Every segment header records how far its requests have been acknowledged by the collector,
+so after a crash or restart, the replay continues from there, and at most one replay batch is sent twice.
+
+The spool is written by the worker threads of the span processors and metric readers,
+it never blocks the threads of the application. The failed requests of the `OTLPHTTP_ASYNC` exporters
+are spooled by the event loop thread of their transport, when the response arrives. The `SIMPLE` span processor
+exports the spans in the threads of the application, so `OTI` rejects the spool with it.
+"""
+
+import contextlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import deque
+from opentelemetry.exporter.otlp.proto.common.metrics_encoder import encode_metrics
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from .config import OTIConfigError
+from .registry import set_completion_callback
+
+logger = logging.getLogger(__name__)
+
+# The segment header: magic bytes, end offset of the written records, end offset of the acknowledged records
+SEGMENT_HEADER = struct.Struct("<4sII")
+SEGMENT_MAGIC = b"OTI1"
+SEGMENT_SUFFIX = ".seg"
+# The record header: length and CRC32 checksum of the payload
+RECORD_HEADER = struct.Struct("<II")
+# A spool keeps at least the active segment and one segment under replay
+MIN_SEGMENTS = 2
+
+
+class SpoolSegment:
+    """An append-only, memory-mapped segment file of the spool"""
+
+    def __init__(self, path, size=None):
+        """Create a new segment file of `size` bytes, or open the existing one if `size` is `None`"""
+        self.path = path
+        flags = os.O_RDWR if size is None else os.O_RDWR | os.O_CREAT | os.O_EXCL
+        fd = os.open(path, flags, 0o600)
+        try:
+            if size is None:
+                size = os.fstat(fd).st_size
+            else:
+                os.ftruncate(fd, size)
+            self.mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.size = size
+        if flags & os.O_CREAT:
+            self.write_offset = self.acked_offset = SEGMENT_HEADER.size
+            self.write_header()
+        else:
+            magic, self.write_offset, self.acked_offset = SEGMENT_HEADER.unpack_from(
+                self.mmap
+            )
+            if magic != SEGMENT_MAGIC or not (
+                SEGMENT_HEADER.size <= self.acked_offset <= self.write_offset <= size
+            ):
+                self.mmap.close()
+                raise ValueError(f"Invalid spool segment: {path}")
+
+    def write_header(self):
+        """Write the offsets into the segment header"""
+        SEGMENT_HEADER.pack_into(
+            self.mmap, 0, SEGMENT_MAGIC, self.write_offset, self.acked_offset
+        )
+
+    @property
+    def pending(self):
+        """`True` if the segment has records that are not acknowledged yet"""
+        return self.acked_offset < self.write_offset
+
+    def append(self, payload):
+        """Append a record to the segment. It returns `False` if the record does not fit into the segment"""
+        end_offset = self.write_offset + RECORD_HEADER.size + len(payload)
+        if end_offset > self.size:
+            return False
+        RECORD_HEADER.pack_into(
+            self.mmap, self.write_offset, len(payload), zlib.crc32(payload)
+        )
+        self.mmap[self.write_offset + RECORD_HEADER.size : end_offset] = payload
+        # The header is updated after the record, so a crash never leaves a partial record behind the write offset
+        self.write_offset = end_offset
+        self.write_header()
+        return True
+
+    def read_batch(self, max_bytes):
+        """
+        Read the records that follow the acknowledged ones, up to `max_bytes` (but at least one record).
+        It returns the concatenated payloads, and the offset to acknowledge when they are exported.
+        """
+        offset = self.acked_offset
+        payloads = []
+        size = 0
+        while offset < self.write_offset and (not payloads or size < max_bytes):
+            length, checksum = RECORD_HEADER.unpack_from(self.mmap, offset)
+            start = offset + RECORD_HEADER.size
+            payload = self.mmap[start : start + length]
+            if start + length > self.write_offset or zlib.crc32(payload) != checksum:
+                logger.warning("Skipping the corrupt records of %s", self.path)
+                offset = self.write_offset
+                break
+            payloads.append(payload)
+            size += length
+            offset = start + length
+        # The concatenation of serialized OTLP requests is a valid request that holds all their items
+        return b"".join(payloads), offset
+
+    def ack(self, offset):
+        """Acknowledge the records up to the `offset`"""
+        self.acked_offset = offset
+        self.write_header()
+
+    def close(self):
+        """Flush and unmap the segment file"""
+        self.mmap.flush()
+        self.mmap.close()
+
+
+class Spool:
+    """
+    A directory of spool segments with a total size cap
+
+    The segments found in the directory at startup are replayed first.
+    """
+
+    def __init__(self, directory, max_bytes, segment_bytes):
+        """Constructor of the spool"""
+        if segment_bytes <= SEGMENT_HEADER.size + RECORD_HEADER.size:
+            raise OTIConfigError(
+                f"The spool segment size is too small: {segment_bytes}"
+            )
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max(MIN_SEGMENTS, max_bytes // segment_bytes)
+        self.lock = threading.Lock()
+        self.active = None
+        self.sealed = deque(
+            sorted(
+                os.path.join(directory, name)
+                for name in os.listdir(directory)
+                if name.endswith(SEGMENT_SUFFIX)
+            )
+        )
+        self.sequence = (
+            int(os.path.basename(self.sealed[-1])[: -len(SEGMENT_SUFFIX)]) + 1
+            if self.sealed
+            else 0
+        )
+        self.evicted_segments = 0
+
+    def is_empty(self):
+        """`True` if there is nothing to replay"""
+        active = self.active
+        return not self.sealed and (active is None or not active.pending)
+
+    def append(self, payload):
+        """Append a serialized request to the spool. It returns `False` if the request is larger than a segment"""
+        if SEGMENT_HEADER.size + RECORD_HEADER.size + len(payload) > self.segment_bytes:
+            logger.warning(
+                "Dropping an export request of %s bytes, that is larger than a spool segment",
+                len(payload),
+            )
+            return False
+        with self.lock:
+            if self.active is None or not self.active.append(payload):
+                self.roll()
+                self.active.append(payload)
+        return True
+
+    def roll(self):
+        """Seal the active segment, and start a new one. The lock must be held by the caller"""
+        self.seal()
+        while len(self.sealed) >= self.max_segments:
+            path = self.sealed.popleft()
+            self.evicted_segments += 1
+            logger.warning("The spool is full, evicting the oldest segment: %s", path)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+        path = os.path.join(self.directory, f"{self.sequence:016d}{SEGMENT_SUFFIX}")
+        self.sequence += 1
+        self.active = SpoolSegment(path, self.segment_bytes)
+
+    def seal(self):
+        """Seal the active segment, so it can be replayed. The lock must be held by the caller"""
+        if self.active is not None:
+            self.active.close()
+            self.sealed.append(self.active.path)
+            self.active = None
+
+    def oldest_segment(self):
+        """Get the path of the oldest segment to replay, sealing the active one if there is no other"""
+        with self.lock:
+            if not self.sealed and self.active is not None and self.active.pending:
+                self.seal()
+            return self.sealed[0] if self.sealed else None
+
+    def remove_segment(self, path):
+        """Remove the replayed segment, unless it has been evicted meanwhile"""
+        with self.lock:
+            if self.sealed and self.sealed[0] == path:
+                self.sealed.popleft()
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+    def replay(self, send, batch_bytes):
+        """
+        Send the spooled requests oldest first, in batches of `batch_bytes`, via the `send(body)` function.
+        It stops at the first failed batch, and returns `True` if the spool has been drained.
+        """
+        while True:
+            path = self.oldest_segment()
+            if path is None:
+                return True
+            try:
+                segment = SpoolSegment(path)
+            except (OSError, ValueError) as error:
+                logger.warning("Dropping the unreadable spool segment: %s", error)
+                self.remove_segment(path)
+                continue
+            try:
+                while segment.pending:
+                    body, offset = segment.read_batch(batch_bytes)
+                    if body and not send(body):
+                        return False
+                    segment.ack(offset)
+            finally:
+                segment.close()
+            self.remove_segment(path)
+
+    def close(self):
+        """Close the active segment. The spooled requests are kept on disk for the next start"""
+        with self.lock:
+            self.seal()
+
+
+class SpoolReplayer:
+    """Replays the spool in a background thread, when it is woken up or periodically"""
+
+    def __init__(self, spool, send, replay_interval_millis, replay_batch_bytes):
+        """Constructor of the replayer. It starts the replay thread"""
+        self.spool = spool
+        self.send = send
+        self.replay_interval_sec = replay_interval_millis / 1e3
+        self.replay_batch_bytes = replay_batch_bytes
+        self.wakeup = threading.Event()
+        self.done = False
+        self.thread = threading.Thread(
+            name="OTISpoolReplayer", target=self.run, daemon=True
+        )
+        self.thread.start()
+
+    def wake(self):
+        """Start the replay without waiting for the next period, if there is anything to replay"""
+        if not self.spool.is_empty():
+            self.wakeup.set()
+
+    def run(self):
+        """The loop of the replay thread"""
+        while not self.done:
+            self.wakeup.wait(self.replay_interval_sec)
+            self.wakeup.clear()
+            if self.done or self.spool.is_empty():
+                continue
+            try:
+                self.spool.replay(self.send, self.replay_batch_bytes)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to replay the spool")
+
+    def shutdown(self, timeout_sec=None):
+        """Stop the replay thread"""
+        self.done = True
+        self.wakeup.set()
+        self.thread.join(timeout_sec)
+
+
+def get_serialized_sender(exporter):
+    """Get the function of the exporter that sends an already serialized OTLP request"""
+    circuit_breaker = getattr(exporter, "circuit_breaker", None)
+    if circuit_breaker is not None:
+        # The replay of the resilient exporters is rejected while their circuit is open
+        return circuit_breaker.guard(get_serialized_sender(exporter.exporter))
+    export_serialized = getattr(exporter, "export_serialized", None)
+    if export_serialized is not None:
+        return export_serialized
+    if hasattr(exporter, "_export") and hasattr(exporter, "_session"):
+        # The OTLP/HTTP exporters of the OTEL SDK
+
+        def send(body):
+            try:
+                return exporter._export(body).ok  # pylint: disable=protected-access
+            except OSError as error:
+                logger.warning("Failed to replay the spool: %s", error)
+                return False
+
+        return send
+    raise OTIConfigError(
+        f"The spool does not support the {type(exporter).__name__} exporter"
+    )
+
+
+def spool_failed_request(spooling_exporter, succeeded, request):
+    """
+    Spool the failed request of a deferred exporter, or wake up the replay if it succeeded.
+    It returns `True` if the request succeeded or it is spooled
+    """
+    if succeeded:
+        spooling_exporter.replayer.wake()
+        return True
+    return spooling_exporter.spool.append(request.SerializeToString())
+
+
+class SpoolingSpanExporter(SpanExporter):
+    """Span exporter that spools the spans of the failed exports, and replays them in the background"""
+
+    def __init__(
+        self, exporter, spool, replay_interval_millis, replay_batch_bytes
+    ):  # pylint: disable=too-many-positional-arguments
+        """Constructor of the spooling span exporter"""
+        self.exporter = exporter
+        self.spool = spool
+        self.replayer = SpoolReplayer(
+            spool,
+            get_serialized_sender(exporter),
+            replay_interval_millis,
+            replay_batch_bytes,
+        )
+        self.completion_callback = None
+        self.deferred_results = set_completion_callback(exporter, self.export_done)
+
+    def export(self, spans):
+        """Export the spans, or spool them if the export fails"""
+        if self.exporter.export(spans) is SpanExportResult.SUCCESS:
+            # The deferred exporters wake up the replay when the response arrives
+            if not self.deferred_results:
+                self.replayer.wake()
+            return SpanExportResult.SUCCESS
+        if self.spool.append(encode_spans(spans).SerializeToString()):
+            return SpanExportResult.SUCCESS
+        return SpanExportResult.FAILURE
+
+    def export_done(self, succeeded, request, batch):
+        """Spool the request of a deferred exporter, if it failed"""
+        succeeded = spool_failed_request(self, succeeded, request)
+        if self.completion_callback is not None:
+            self.completion_callback(succeeded, request, batch)
+
+    def force_flush(self, timeout_millis=30000):
+        """Force flush the delegate exporter"""
+        return self.exporter.force_flush(timeout_millis)
+
+    def shutdown(self):
+        """Stop the replay, shut down the delegate exporter, then close the spool"""
+        self.replayer.shutdown()
+        # The requests in flight of the deferred exporters may still fail into the spool
+        self.exporter.shutdown()
+        self.spool.close()
+
+
+class SpoolingMetricExporter(MetricExporter):
+    """Metric exporter that spools the metrics of the failed exports, and replays them in the background"""
+
+    def __init__(
+        self, exporter, spool, replay_interval_millis, replay_batch_bytes
+    ):  # pylint: disable=too-many-positional-arguments
+        """Constructor of the spooling metric exporter"""
+        super().__init__(
+            preferred_temporality=exporter._preferred_temporality,  # pylint: disable=protected-access
+            preferred_aggregation=exporter._preferred_aggregation,  # pylint: disable=protected-access
+        )
+        self.exporter = exporter
+        self.spool = spool
+        self.replayer = SpoolReplayer(
+            spool,
+            get_serialized_sender(exporter),
+            replay_interval_millis,
+            replay_batch_bytes,
+        )
+        self.completion_callback = None
+        self.deferred_results = set_completion_callback(exporter, self.export_done)
+
+    def export(self, metrics_data, timeout_millis=10_000, **kwargs):
+        """Export the metrics, or spool them if the export fails"""
+        result = self.exporter.export(
+            metrics_data, timeout_millis=timeout_millis, **kwargs
+        )
+        if result is MetricExportResult.SUCCESS:
+            # The deferred exporters wake up the replay when the response arrives
+            if not self.deferred_results:
+                self.replayer.wake()
+            return MetricExportResult.SUCCESS
+        if self.spool.append(encode_metrics(metrics_data).SerializeToString()):
+            return MetricExportResult.SUCCESS
+        return MetricExportResult.FAILURE
+
+    def export_done(self, succeeded, request, batch):
+        """Spool the request of a deferred exporter, if it failed"""
+        succeeded = spool_failed_request(self, succeeded, request)
+        if self.completion_callback is not None:
+            self.completion_callback(succeeded, request, batch)
+
+    def force_flush(self, timeout_millis=10_000):
+        """Force flush the delegate exporter"""
+        return self.exporter.force_flush(timeout_millis=timeout_millis)
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        """Stop the replay, shut down the delegate exporter, then close the spool"""
+        self.replayer.shutdown(timeout_millis / 1e3)
+        # The requests in flight of the deferred exporters may still fail into the spool
+        self.exporter.shutdown(timeout_millis=timeout_millis, **kwargs)
+        self.spool.close()
+
+
+def create_spooling_span_exporter(exporter, spool_config, name="traces"):
+    """Wrap the span exporter into a spooling one, that spools into the `name` subdirectory"""
+    return SpoolingSpanExporter(
+        exporter,
+        Spool(
+            os.path.join(spool_config.spool_dir, name),
+            spool_config.max_bytes,
+            spool_config.segment_bytes,
+        ),
+        spool_config.replay_interval_millis,
+        spool_config.replay_batch_bytes,
+    )
+
+
+def create_spooling_metric_exporter(exporter, spool_config, name="metrics"):
+    """Wrap the metric exporter into a spooling one, that spools into the `name` subdirectory"""
+    return SpoolingMetricExporter(
+        exporter,
+        Spool(
+            os.path.join(spool_config.spool_dir, name),
+            spool_config.max_bytes,
+            spool_config.segment_bytes,
+        ),
+        spool_config.replay_interval_millis,
+        spool_config.replay_batch_bytes,
+    )
@@ -0,0 +1,287 @@
+"""
+Self-telemetry of the OTI export pipeline
+
+The wrappers of this module measure the span processor, the span exporter and the metric exporter
+built by `OTI`, and report the measurements as metrics on the `OTI.meter`:
+
+- `oti.exporter.batch.size`: histogram of the number of spans or data points per export.
+- `oti.exporter.export.duration`: histogram of the export latency in milliseconds.
+- `oti.exporter.exported`: counter of the exported spans and data points.
+- `oti.exporter.export.failures`: counter of the failed exports.
+- `oti.exporter.dropped`: counter of the spans and data points lost by the failed exports.
+- `oti.span_processor.queue.size`: gauge of the number of spans waiting in the queue of the batching span processor.
+- `oti.span_processor.dropped`: counter of the spans dropped because the queue of the span processor was full.
+
+Every measurement has a `signal` attribute, that is either `traces` or `metrics`.
+
+The export instruments are updated once per export, not per span. The exporters that report the results of their requests
+later (e.g. the `OTLPHTTP_ASYNC` ones) are counted as exported or failed when the response arrives,
+and their export duration is the time it takes to queue the request. The queue size and the dropped spans are observed
+only when the metrics are collected.
+
+Counting the dropped spans is the only per-span cost: the batch span processor of the OTEL SDK only sets a flag
+when its queue is full, so the span processor wrapper repeats its queue length check in the thread that ends the span,
+and takes a lock to count the span only if it is dropped, so that the concurrent drops are not lost.
+"""
+
+import threading
+from time import perf_counter_ns
+from opentelemetry.metrics import Observation
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from .registry import set_completion_callback
+
+TRACES_ATTRIBUTES = {"signal": "traces"}
+METRICS_ATTRIBUTES = {"signal": "metrics"}
+FAN_OUT_ATTRIBUTES = {"signal": "traces", "span_processor": "fan_out"}
+
+
+class PipelineTelemetry:
+    """
+    The instruments of the self-telemetry
+
+    The measurements are ignored until the instruments are created by `bind()`,
+    because the wrappers are set up before the meter provider exists.
+    """
+
+    def __init__(self):
+        """Constructor of the pipeline telemetry"""
+        self.span_processors = []
+        # The fan-out processors, that drop from their own dispatch queue
+        self.fan_out_processors = []
+        self.batch_size = None
+        self.export_duration = None
+        self.exported = None
+        self.export_failures = None
+        self.dropped = None
+
+    def bind(self, meter):
+        """Create the instruments on the `meter`"""
+        self.batch_size = meter.create_histogram(
+            "oti.exporter.batch.size",
+            unit="{item}",
+            description="The number of spans or data points per export",
+        )
+        self.export_duration = meter.create_histogram(
+            "oti.exporter.export.duration",
+            unit="ms",
+            description="The duration of the exports",
+        )
+        self.exported = meter.create_counter(
+            "oti.exporter.exported",
+            unit="{item}",
+            description="The number of exported spans or data points",
+        )
+        self.export_failures = meter.create_counter(
+            "oti.exporter.export.failures",
+            unit="{export}",
+            description="The number of failed exports",
+        )
+        self.dropped = meter.create_counter(
+            "oti.exporter.dropped",
+            unit="{item}",
+            description="The number of spans or data points lost by the failed exports",
+        )
+        meter.create_observable_gauge(
+            "oti.span_processor.queue.size",
+            callbacks=[self.observe_queue_size],
+            unit="{span}",
+            description="The number of spans waiting in the queue of the span processor",
+        )
+        meter.create_observable_counter(
+            "oti.span_processor.dropped",
+            callbacks=[self.observe_dropped_spans],
+            unit="{span}",
+            description="The number of spans dropped because the queue of the span processor was full",
+        )
+
+    def record_export(self, attributes, batch_size, duration_ns, success):
+        """Record the measurements of an export. The `success` is `None` if the result is reported later"""
+        if self.batch_size is None:
+            return
+        self.batch_size.record(batch_size, attributes)
+        self.export_duration.record(duration_ns / 1e6, attributes)
+        if success is not None:
+            self.record_result(attributes, batch_size, success)
+
+    def record_result(self, attributes, batch_size, success):
+        """Record the result of an export"""
+        if self.batch_size is None:
+            return
+        if success:
+            self.exported.add(batch_size, attributes)
+        else:
+            self.export_failures.add(1, attributes)
+            self.dropped.add(batch_size, attributes)
+
+    def observe_queue_size(self, _options):
+        """Observe the queue size of the span processors"""
+        return [
+            Observation(len(processor.processor.queue), TRACES_ATTRIBUTES)
+            for processor in self.span_processors
+        ] + [
+            Observation(len(processor.queue), FAN_OUT_ATTRIBUTES)
+            for processor in self.fan_out_processors
+        ]
+
+    def observe_dropped_spans(self, _options):
+        """Observe the number of spans dropped by the span processors"""
+        return [
+            Observation(processor.dropped_spans, TRACES_ATTRIBUTES)
+            for processor in self.span_processors
+        ] + [
+            Observation(processor.dropped_spans, FAN_OUT_ATTRIBUTES)
+            for processor in self.fan_out_processors
+        ]
+
+    def instrument_span_processor(self, processor):
+        """
+        Wrap the span processor that owns the span queue.
+        The processors that pass the spans to a `downstream` processor (e.g. the `TAIL` one) or to several
+        `pipelines` (the fan-out one) are kept, and their downstream processors are wrapped.
+        The queue size and the dropped spans of the dispatch queue of the fan-out processors are observed
+        with the `span_processor="fan_out"` attribute.
+        """
+        if hasattr(processor, "downstream"):
+            processor.downstream = self.instrument_span_processor(processor.downstream)
+            return processor
+        if hasattr(processor, "pipelines"):
+            processor.pipelines = [
+                self.instrument_span_processor(pipeline)
+                for pipeline in processor.pipelines
+            ]
+            self.fan_out_processors.append(processor)
+            return processor
+        if hasattr(processor, "queue"):
+            processor = InstrumentedSpanProcessor(processor)
+            self.span_processors.append(processor)
+        return processor
+
+
+class InstrumentedSpanProcessor(SpanProcessor):
+    """Span processor proxy that counts the spans dropped because the queue of the batching processor is full"""
+
+    def __init__(self, processor):
+        """Constructor of the instrumented span processor"""
+        self.processor = processor
+        self.dropped_spans = 0
+        self.lock = threading.Lock()
+
+    def on_start(self, span, parent_context=None):
+        """Pass the started span to the delegate processor"""
+        self.processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span):
+        """Pass the finished span to the delegate processor, that drops the oldest span if its queue is full"""
+        processor = self.processor
+        # The spans that are recorded, but not sampled, are not queued
+        if (
+            len(processor.queue) >= processor.max_queue_size
+            and span.context.trace_flags.sampled
+        ):
+            with self.lock:
+                self.dropped_spans += 1
+        processor.on_end(span)
+
+    def shutdown(self):
+        """Shut down the delegate processor"""
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis=30000):
+        """Force flush the delegate processor"""
+        return self.processor.force_flush(timeout_millis)
+
+
+class InstrumentedSpanExporter(SpanExporter):
+    """Span exporter proxy that measures the exports"""
+
+    def __init__(self, exporter, telemetry):
+        """Constructor of the instrumented span exporter"""
+        self.exporter = exporter
+        self.telemetry = telemetry
+        self.completion_callback = None
+        self.deferred_results = set_completion_callback(exporter, self.export_done)
+
+    def export(self, spans):
+        """Export the spans via the delegate exporter, and record the measurements"""
+        start = perf_counter_ns()
+        result = self.exporter.export(spans)
+        success = result is SpanExportResult.SUCCESS
+        self.telemetry.record_export(
+            TRACES_ATTRIBUTES,
+            len(spans),
+            perf_counter_ns() - start,
+            None if success and self.deferred_results else success,
+        )
+        return result
+
+    def export_done(self, succeeded, request, batch):
+        """Record the result of a request of a deferred exporter"""
+        self.telemetry.record_result(TRACES_ATTRIBUTES, len(batch), succeeded)
+        if self.completion_callback is not None:
+            self.completion_callback(succeeded, request, batch)
+
+    def force_flush(self, timeout_millis=30000):
+        """Force flush the delegate exporter"""
+        return self.exporter.force_flush(timeout_millis)
+
+    def shutdown(self):
+        """Shut down the delegate exporter"""
+        self.exporter.shutdown()
+
+
+def count_data_points(metrics_data):
+    """Count the data points of the metrics data"""
+    return sum(
+        len(metric.data.data_points)
+        for resource_metrics in metrics_data.resource_metrics
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics
+    )
+
+
+class InstrumentedMetricExporter(MetricExporter):
+    """Metric exporter proxy that measures the exports"""
+
+    def __init__(self, exporter, telemetry):
+        """Constructor of the instrumented metric exporter"""
+        super().__init__(
+            preferred_temporality=exporter._preferred_temporality,  # pylint: disable=protected-access
+            preferred_aggregation=exporter._preferred_aggregation,  # pylint: disable=protected-access
+        )
+        self.exporter = exporter
+        self.telemetry = telemetry
+        self.completion_callback = None
+        self.deferred_results = set_completion_callback(exporter, self.export_done)
+
+    def export(self, metrics_data, timeout_millis=10_000, **kwargs):
+        """Export the metrics via the delegate exporter, and record the measurements"""
+        start = perf_counter_ns()
+        result = self.exporter.export(
+            metrics_data, timeout_millis=timeout_millis, **kwargs
+        )
+        success = result is MetricExportResult.SUCCESS
+        self.telemetry.record_export(
+            METRICS_ATTRIBUTES,
+            count_data_points(metrics_data),
+            perf_counter_ns() - start,
+            None if success and self.deferred_results else success,
+        )
+        return result
+
+    def export_done(self, succeeded, request, batch):
+        """Record the result of a request of a deferred exporter"""
+        self.telemetry.record_result(
+            METRICS_ATTRIBUTES, count_data_points(batch), succeeded
+        )
+        if self.completion_callback is not None:
+            self.completion_callback(succeeded, request, batch)
+
+    def force_flush(self, timeout_millis=10_000):
+        """Force flush the delegate exporter"""
+        return self.exporter.force_flush(timeout_millis=timeout_millis)
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        """Shut down the delegate exporter"""
+        self.exporter.shutdown(timeout_millis=timeout_millis, **kwargs)
@@ -0,0 +1,182 @@
+"""Test the async_http module"""
+
+import gzip
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (  # pylint: disable=no-name-in-module
+    ExportTraceServiceRequest,
+)
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from oti import OTIConfig, ExporterConfig
+from oti.config import OTIConfigError
+from oti.async_http import get_base_url
+from oti.registry import SPAN_EXPORTERS, METRIC_EXPORTERS
+from oti.resilience import OPEN, CircuitBreaker, ResilientSpanExporter
+from oti.spool import Spool, SpoolingSpanExporter
+from oti.telemetry import InstrumentedSpanExporter, PipelineTelemetry
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    """Records the requests received by the test collector"""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+    status = 200
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Record an export request"""
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.requests.append((self.path, self.headers, body))
+        self.send_response(self.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Do not log the requests"""
+
+
+def create_spans():
+    """Create a finished span"""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(ALWAYS_ON)
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    # pylint: disable=not-context-manager
+    with provider.get_tracer(__name__).start_as_current_span("async-span"):
+        pass
+    return exporter.get_finished_spans()
+
+
+class AsyncOTLPHTTPTestCase(unittest.TestCase):
+    """The asyncio OTLP/HTTP exporter test cases"""
+
+    def setUp(self) -> None:
+        CollectorHandler.requests = []
+        CollectorHandler.status = 200
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CollectorHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/traces"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def create_config(self, encoding, compression="NONE"):
+        """Create the config of the OTLPHTTP_ASYNC exporter type"""
+        return OTIConfig(
+            exporter_config=ExporterConfig(
+                exporter_type="OTLPHTTP_ASYNC",
+                exporter_url=self.url,
+                exporter_encoding=encoding,
+                exporter_compression=compression,
+                exporter_headers={"x-api-key": "secret"},
+            )
+        )
+
+    def test_protobuf_export(self) -> None:
+        """The spans are posted as protobuf, and the exporters share the transport"""
+        config = self.create_config("PROTOBUF")
+        span_exporter = SPAN_EXPORTERS.create("OTLPHTTP_ASYNC", config)
+        metric_exporter = METRIC_EXPORTERS.create("OTLPHTTP_ASYNC", config)
+        self.assertIs(span_exporter.transport, metric_exporter.transport)
+
+        span_exporter.export(create_spans())
+        self.assertTrue(span_exporter.force_flush())
+        span_exporter.shutdown()
+        self.assertFalse(metric_exporter.transport.closed)
+        metric_exporter.shutdown()
+        self.assertTrue(metric_exporter.transport.closed)
+
+        path, headers, body = CollectorHandler.requests[0]
+        content_type = headers["Content-Type"]
+        self.assertEqual(path, "/v1/traces")
+        self.assertEqual(content_type, "application/x-protobuf")
+        request = ExportTraceServiceRequest.FromString(body)
+        self.assertEqual(
+            request.resource_spans[0].scope_spans[0].spans[0].name, "async-span"
+        )
+
+    def test_json_export(self) -> None:
+        """The spans are posted as OTLP/JSON with hex encoded IDs"""
+        spans = create_spans()
+        span_exporter = SPAN_EXPORTERS.create(
+            "OTLPHTTP_ASYNC", self.create_config("json")
+        )
+        span_exporter.export(spans)
+        span_exporter.shutdown()
+
+        _, headers, body = CollectorHandler.requests[0]
+        content_type = headers["Content-Type"]
+        self.assertEqual(content_type, "application/json")
+        span = json.loads(body)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        self.assertEqual(span["traceId"], f"{spans[0].context.trace_id:032x}")
+        self.assertEqual(span["spanId"], f"{spans[0].context.span_id:016x}")
+
+    def test_gzip_export(self) -> None:
+        """The request body is compressed, and the configured headers are sent"""
+        span_exporter = SPAN_EXPORTERS.create(
+            "OTLPHTTP_ASYNC", self.create_config("PROTOBUF", "GZIP")
+        )
+        span_exporter.export(create_spans())
+        span_exporter.shutdown()
+
+        _, headers, body = CollectorHandler.requests[0]
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["x-api-key"], "secret")
+        request = ExportTraceServiceRequest.FromString(gzip.decompress(body))
+        self.assertEqual(len(request.resource_spans), 1)
+
+    def test_failed_response(self) -> None:
+        """The failed responses are reported to the circuit breaker, the spool and the self-telemetry"""
+        CollectorHandler.status = 503
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+        spool = Spool(spool_dir, 1 << 20, 1 << 16)
+        circuit_breaker = CircuitBreaker("test", 1, 60_000, 60_000)
+        telemetry = mock.Mock(spec=PipelineTelemetry)
+        span_exporter = InstrumentedSpanExporter(
+            SpoolingSpanExporter(
+                ResilientSpanExporter(
+                    SPAN_EXPORTERS.create(
+                        "OTLPHTTP_ASYNC", self.create_config("PROTOBUF")
+                    ),
+                    circuit_breaker,
+                ),
+                spool,
+                60_000,
+                1 << 16,
+            ),
+            telemetry,
+        )
+
+        self.assertIs(span_exporter.export(create_spans()), SpanExportResult.SUCCESS)
+        self.assertTrue(span_exporter.force_flush())
+        self.assertEqual(circuit_breaker.state, OPEN)
+        self.assertFalse(spool.is_empty())
+        # The spooled request counts as exported, like the spooled failures of the other exporters
+        telemetry.record_result.assert_called_once_with({"signal": "traces"}, 1, True)
+        span_exporter.shutdown()
+
+    def test_unknown_encoding(self) -> None:
+        """An unknown encoding is a config error"""
+        with self.assertRaises(OTIConfigError):
+            SPAN_EXPORTERS.create("OTLPHTTP_ASYNC", self.create_config("XML"))
+
+    def test_base_url(self) -> None:
+        """The signal specific paths are removed from the exporter URL"""
+        self.assertEqual(
+            get_base_url("http://localhost:4318/v1/traces"), "http://localhost:4318"
+        )
+        self.assertEqual(
+            get_base_url("http://localhost:4318/"), "http://localhost:4318"
+        )
@@ -2,7 +2,22 @@
 
 import unittest
 import os
-from oti import OTIConfig, ExporterConfig, SamplingConfig
+from unittest import mock
+from oti import (
+    OTIConfig,
+    ExporterConfig,
+    SamplingConfig,
+    BatchSpanProcessorConfig,
+    MultiprocessConfig,
+    SpoolConfig,
+    MetricViewsConfig,
+    MetricAggregationConfig,
+    SpanLimitsConfig,
+    FlushConfig,
+    SpanMetricsConfig,
+    FileExporterConfig,
+    ConsoleExporterConfig,
+)
 from oti.config import (
     DEFAULT_SERVICE_NAME,
     DEFAULT_SERVICE_NAMESPACE,
@@ -48,6 +63,8 @@ class OTIConfigTestCase(unittest.TestCase):
             config.metric_exporter_endpoint_config.endpoint_port,
             DEFAULT_OTEL_METRIC_EXPORTER_ENDPOINT_PORT,
         )
+        self.assertEqual(config.metric_exporter_endpoint_config.cache_ttl_millis, 1000)
+        self.assertTrue(config.metric_exporter_endpoint_config.server_enabled)
 
     def test_config_with_config_object(self) -> None:
         """Test the OTIConfig class using initial config parameters"""
@@ -115,3 +132,328 @@ class OTIConfigTestCase(unittest.TestCase):
             config.periodic_metric_reader_config.export_timeout_millis,
             expected_export_timeout_millis,
         )
+
+    def test_batch_span_processor_config(self) -> None:
+        """Test the BatchSpanProcessorConfig class using constructor arguments and environment variables"""
+
+        config = BatchSpanProcessorConfig(max_queue_size=65536)
+        self.assertEqual(config.max_queue_size, 65536)
+
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_BSP_MAX_QUEUE_SIZE": "16384",
+                "OTEL_BSP_SCHEDULE_DELAY": "200",
+                "OTEL_BSP_MAX_EXPORT_BATCH_SIZE": "1024",
+                "OTEL_BSP_EXPORT_TIMEOUT": "10000",
+            },
+        ):
+            config = OTIConfig().batch_span_processor_config
+        self.assertEqual(config.max_queue_size, 16384)
+        self.assertEqual(config.schedule_delay_millis, 200)
+        self.assertEqual(config.max_export_batch_size, 1024)
+        self.assertEqual(config.export_timeout_millis, 10000)
+
+    def test_multiprocess_config(self) -> None:
+        """Test the MultiprocessConfig class using environment variables"""
+
+        self.assertFalse(OTIConfig().multiprocess_config.enabled)
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_MULTIPROCESS_ENABLED": "True",
+                "PROMETHEUS_MULTIPROC_DIR": "/tmp/metrics",
+                "OTEL_MULTIPROCESS_SYNC_INTERVAL_MILLIS": "500",
+            },
+        ):
+            config = MultiprocessConfig()
+        self.assertTrue(config.enabled)
+        self.assertEqual(config.multiprocess_dir, "/tmp/metrics")
+        self.assertEqual(config.sync_interval_millis, 500)
+
+    def test_exporter_configs(self) -> None:
+        """Test the list of the exporter configs"""
+
+        config = OTIConfig(
+            exporter_config=ExporterConfig(
+                exporter_type="OTLPGRPC, STDOUT", exporter_url="http://agent:4317"
+            )
+        )
+        self.assertEqual(
+            [
+                exporter_config.exporter_type
+                for exporter_config in config.exporter_configs
+            ],
+            ["OTLPGRPC", "STDOUT"],
+        )
+        self.assertEqual(config.exporter_configs[1].exporter_url, "http://agent:4317")
+        self.assertIs(config.exporter_config, config.exporter_configs[0])
+
+        stdout_config = ExporterConfig(exporter_type="STDOUT")
+        config = OTIConfig(
+            exporter_configs=[ExporterConfig(exporter_type="OTLPHTTP"), stdout_config]
+        )
+        self.assertEqual(config.exporter_config.exporter_type, "OTLPHTTP")
+        self.assertIs(
+            config.with_exporter_config(stdout_config).exporter_config, stdout_config
+        )
+
+    def test_spool_config(self) -> None:
+        """Test the SpoolConfig class using environment variables"""
+
+        self.assertFalse(OTIConfig().spool_config.enabled)
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_SPOOL_ENABLED": "yes",
+                "OTEL_SPOOL_DIR": "/var/spool/oti",
+                "OTEL_SPOOL_MAX_BYTES": "1048576",
+                "OTEL_SPOOL_SEGMENT_BYTES": "65536",
+                "OTEL_SPOOL_REPLAY_INTERVAL_MILLIS": "1000",
+                "OTEL_SPOOL_REPLAY_BATCH_BYTES": "32768",
+            },
+        ):
+            config = SpoolConfig()
+        self.assertTrue(config.enabled)
+        self.assertEqual(config.spool_dir, "/var/spool/oti")
+        self.assertEqual(config.max_bytes, 1048576)
+        self.assertEqual(config.segment_bytes, 65536)
+        self.assertEqual(config.replay_interval_millis, 1000)
+        self.assertEqual(config.replay_batch_bytes, 32768)
+
+    def test_metric_views_config(self) -> None:
+        """Test the MetricViewsConfig class using environment variables"""
+
+        config = OTIConfig().metric_views_config
+        self.assertEqual(config.max_series_per_instrument, 2000)
+        self.assertEqual(config.attribute_allowlist, {})
+        self.assertEqual(config.drop_instruments, [])
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_METRIC_ATTRIBUTE_ALLOWLIST": "http.*=http.method|http.route, rpc.duration=rpc.method",
+                "OTEL_METRIC_MAX_SERIES_PER_INSTRUMENT": "100",
+                "OTEL_METRIC_DROP_INSTRUMENTS": "debug.*, noisy",
+            },
+        ):
+            config = MetricViewsConfig()
+        self.assertEqual(
+            config.attribute_allowlist,
+            {"http.*": ["http.method", "http.route"], "rpc.duration": ["rpc.method"]},
+        )
+        self.assertEqual(config.max_series_per_instrument, 100)
+        self.assertEqual(config.drop_instruments, ["debug.*", "noisy"])
+
+    def test_metric_aggregation_config(self) -> None:
+        """Test the MetricAggregationConfig class using environment variables"""
+
+        config = OTIConfig().metric_aggregation_config
+        self.assertEqual(config.temporality, {})
+        self.assertEqual(config.histogram_aggregation, "EXPLICIT")
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_METRIC_TEMPORALITY": "delta, counter=cumulative",
+                "OTEL_METRIC_HISTOGRAM_AGGREGATION": "EXPONENTIAL",
+                "OTEL_METRIC_EXPONENTIAL_HISTOGRAM_MAX_SCALE": "10",
+                "OTEL_METRIC_EXPONENTIAL_HISTOGRAM_MAX_SIZE": "80",
+            },
+        ):
+            config = MetricAggregationConfig()
+        self.assertEqual(
+            config.temporality,
+            {
+                "COUNTER": "CUMULATIVE",
+                "HISTOGRAM": "DELTA",
+                "OBSERVABLE_COUNTER": "DELTA",
+            },
+        )
+        self.assertEqual(config.histogram_aggregation, "EXPONENTIAL")
+        self.assertEqual(config.exponential_histogram_max_scale, 10)
+        self.assertEqual(config.exponential_histogram_max_size, 80)
+
+    def test_span_limits_config(self) -> None:
+        """Test the SpanLimitsConfig class using environment variables"""
+
+        config = OTIConfig().span_limits_config
+        self.assertIsNone(config.max_attribute_length)
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_ATTRIBUTE_COUNT_LIMIT": "64",
+                "OTEL_SPAN_ATTRIBUTE_COUNT_LIMIT": "32",
+                "OTEL_EVENT_ATTRIBUTE_COUNT_LIMIT": "8",
+                "OTEL_LINK_ATTRIBUTE_COUNT_LIMIT": "4",
+                "OTEL_SPAN_EVENT_COUNT_LIMIT": "16",
+                "OTEL_SPAN_LINK_COUNT_LIMIT": "2",
+                "OTEL_ATTRIBUTE_VALUE_LENGTH_LIMIT": "4096",
+                "OTEL_SPAN_ATTRIBUTE_VALUE_LENGTH_LIMIT": "1024",
+            },
+        ):
+            config = SpanLimitsConfig()
+        self.assertEqual(
+            (
+                config.max_attributes,
+                config.max_span_attributes,
+                config.max_event_attributes,
+                config.max_link_attributes,
+                config.max_events,
+                config.max_links,
+                config.max_attribute_length,
+                config.max_span_attribute_length,
+            ),
+            (64, 32, 8, 4, 16, 2, 4096, 1024),
+        )
+
+    def test_sdk_disabled(self) -> None:
+        """The OTEL_SDK_DISABLED disables both the tracing and the metrics"""
+
+        self.assertFalse(OTIConfig().sdk_disabled)
+        with mock.patch.dict(
+            os.environ,
+            {"OTEL_SDK_DISABLED": "true", "OTEL_SPAN_PROCESSOR_TYPE": "BATCH"},
+        ):
+            config = OTIConfig(metric_exporter_mode_config="PERIODIC")
+        self.assertTrue(config.sdk_disabled)
+        self.assertEqual(config.span_processor_type, "DISABLED")
+        self.assertEqual(config.metric_exporter_mode_config, "DISABLED")
+
+    def test_flush_config(self) -> None:
+        """Test the FlushConfig class using environment variables"""
+
+        config = OTIConfig().flush_config
+        self.assertEqual(config.timeout_millis, 5000)
+        self.assertEqual(config.flush_signals, [])
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_FLUSH_TIMEOUT_MILLIS": "8000",
+                "OTEL_FLUSH_SIGNALS": "SIGUSR1, SIGTERM",
+            },
+        ):
+            config = FlushConfig()
+        self.assertEqual(config.timeout_millis, 8000)
+        self.assertEqual(config.flush_signals, ["SIGUSR1", "SIGTERM"])
+
+    def test_span_metrics_config(self) -> None:
+        """Test the SpanMetricsConfig class using environment variables"""
+
+        config = OTIConfig().span_metrics_config
+        self.assertFalse(config.enabled)
+        self.assertEqual(config.attribute_keys, [])
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_SPAN_METRICS_ENABLED": "true",
+                "OTEL_SPAN_METRICS_ATTRIBUTES": "http.route, http.request.method",
+            },
+        ):
+            config = SpanMetricsConfig()
+        self.assertTrue(config.enabled)
+        self.assertEqual(config.attribute_keys, ["http.route", "http.request.method"])
+
+    def test_file_exporter_config(self) -> None:
+        """Test the FileExporterConfig class using environment variables"""
+
+        config = OTIConfig().file_exporter_config
+        self.assertIsNone(config.file_dir)
+        self.assertEqual(config.max_file_bytes, 67108864)
+        self.assertEqual(config.max_files, 16)
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_EXPORTER_FILE_DIR": "/var/spool/otel",
+                "OTEL_EXPORTER_FILE_MAX_BYTES": "1048576",
+                "OTEL_EXPORTER_FILE_MAX_FILES": "0",
+                "OTEL_EXPORTER_FILE_ROTATE_INTERVAL_MILLIS": "60000",
+                "OTEL_EXPORTER_FILE_BUFFER_BYTES": "65536",
+            },
+        ):
+            config = FileExporterConfig()
+        self.assertEqual(config.file_dir, "/var/spool/otel")
+        self.assertEqual(config.max_file_bytes, 1048576)
+        self.assertEqual(config.max_files, 0)
+        self.assertEqual(config.rotate_interval_millis, 60000)
+        self.assertEqual(config.buffer_bytes, 65536)
+
+    def test_console_exporter_config(self) -> None:
+        """Test the ConsoleExporterConfig class using environment variables"""
+
+        config = OTIConfig().console_exporter_config
+        self.assertEqual(config.output_format, "PRETTY")
+        self.assertEqual(config.fd, 1)
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_EXPORTER_CONSOLE_FORMAT": "NDJSON",
+                "OTEL_EXPORTER_CONSOLE_FD": "2",
+                "OTEL_EXPORTER_CONSOLE_FLUSH_INTERVAL_MILLIS": "50",
+                "OTEL_EXPORTER_CONSOLE_MAX_BUFFER_BYTES": "65536",
+            },
+        ):
+            config = ConsoleExporterConfig()
+        self.assertEqual(config.output_format, "NDJSON")
+        self.assertEqual(config.fd, 2)
+        self.assertEqual(config.flush_interval_millis, 50)
+        self.assertEqual(config.max_buffer_bytes, 65536)
+
+    def test_sampling_rules_config(self) -> None:
+        """Test the sampling rule parameters of the SamplingConfig class using environment variables"""
+
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_TRACES_SAMPLER": "RULES",
+                "OTEL_TRACES_SAMPLER_RULES": '[{"name": "GET /health", "ratio": 0}]',
+                "OTEL_TRACES_SAMPLER_RULES_FILE": "/etc/oti/rules.json",
+            },
+        ):
+            config = SamplingConfig()
+        self.assertEqual(config.trace_sampling_type, "RULES")
+        self.assertEqual(
+            config.trace_sampling_rules, '[{"name": "GET /health", "ratio": 0}]'
+        )
+        self.assertEqual(config.trace_sampling_rules_file, "/etc/oti/rules.json")
+
+    def test_exporter_transport_config(self) -> None:
+        """Test the transport parameters of the ExporterConfig class using environment variables"""
+
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_EXPORTER_COMPRESSION": "GZIP",
+                "OTEL_EXPORTER_TIMEOUT_MILLIS": "3000",
+                "OTEL_EXPORTER_HEADERS": "x-api-key=secret, x-tenant=a=b",
+                "OTEL_EXPORTER_GRPC_CHANNEL_OPTIONS": "grpc.keepalive_time_ms=30000,grpc.lb_policy_name=round_robin",
+            },
+        ):
+            config = ExporterConfig()
+        self.assertEqual(config.exporter_compression, "GZIP")
+        self.assertEqual(config.exporter_timeout_millis, 3000)
+        self.assertEqual(
+            config.exporter_headers, {"x-api-key": "secret", "x-tenant": "a=b"}
+        )
+        self.assertEqual(
+            config.exporter_channel_options,
+            {"grpc.keepalive_time_ms": 30000, "grpc.lb_policy_name": "round_robin"},
+        )
+        self.assertNotIn("secret", str(config))
+        self.assertFalse(config.exporter_circuit_breaker_enabled)
+
+    def test_exporter_circuit_breaker_config(self) -> None:
+        """Test the circuit breaker parameters of the ExporterConfig class using environment variables"""
+
+        with mock.patch.dict(
+            os.environ,
+            {
+                "OTEL_EXPORTER_CIRCUIT_BREAKER_ENABLED": "true",
+                "OTEL_EXPORTER_CIRCUIT_BREAKER_FAILURE_THRESHOLD": "5",
+                "OTEL_EXPORTER_BACKOFF_INITIAL_MILLIS": "250",
+                "OTEL_EXPORTER_BACKOFF_MAX_MILLIS": "5000",
+            },
+        ):
+            config = ExporterConfig()
+        self.assertTrue(config.exporter_circuit_breaker_enabled)
+        self.assertEqual(config.exporter_circuit_breaker_failure_threshold, 5)
+        self.assertEqual(config.exporter_backoff_initial_millis, 250)
+        self.assertEqual(config.exporter_backoff_max_millis, 5000)
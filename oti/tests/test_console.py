@@ -0,0 +1,158 @@
+"""Test the console module"""
+
+import json
+import os
+import select
+import time
+import unittest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from oti.config import ConsoleExporterConfig, OTIConfig, OTIConfigError
+from oti.console import SHARED_WRITERS
+from oti.registry import METRIC_EXPORTERS, SPAN_EXPORTERS
+
+
+class ConsoleTestCase(unittest.TestCase):
+    """The NDJSON console exporter test cases"""
+
+    def setUp(self):
+        """Create the pipe the exporters write into"""
+        self.read_fd, self.write_fd = os.pipe()
+        self.addCleanup(os.close, self.read_fd)
+        self.addCleanup(os.close, self.write_fd)
+
+    def create_config(self, **console_config):
+        """Create the config of the NDJSON console exporters that write into the pipe"""
+        return OTIConfig(
+            service_name="console-test",
+            console_exporter_config=ConsoleExporterConfig(
+                output_format="NDJSON", fd=self.write_fd, **console_config
+            ),
+        )
+
+    def read_lines(self, timeout_sec=0.0):
+        """Read the JSON lines written into the pipe"""
+        data = b""
+        while select.select([self.read_fd], [], [], timeout_sec)[0]:
+            data += os.read(self.read_fd, 65536)
+            timeout_sec = 0.0
+        return [json.loads(line) for line in data.splitlines()]
+
+    def test_spans(self) -> None:
+        """Every span is written into one compact line"""
+        # pylint: disable=not-context-manager
+        span_exporter = SPAN_EXPORTERS.create("STDOUT", self.create_config())
+        tracer_provider = TracerProvider(
+            ALWAYS_ON, resource=Resource.create({"service.name": "console-test"})
+        )
+        tracer_provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+        tracer = tracer_provider.get_tracer(__name__)
+        with tracer.start_as_current_span("parent") as parent:
+            with tracer.start_as_current_span(
+                "child", kind=SpanKind.CLIENT, attributes={"peer": "db", "rows": 2}
+            ) as child:
+                child.add_event("retry", {"attempt": 1})
+                child.set_status(Status(StatusCode.ERROR, "timeout"))
+        span_exporter.force_flush()
+
+        child_line, parent_line = self.read_lines()
+        self.assertEqual(child_line["name"], "child")
+        self.assertEqual(child_line["kind"], "CLIENT")
+        self.assertEqual(child_line["status"], "ERROR")
+        self.assertEqual(child_line["status_message"], "timeout")
+        self.assertEqual(child_line["attributes"], {"peer": "db", "rows": 2})
+        self.assertEqual(child_line["events"][0]["name"], "retry")
+        self.assertEqual(child_line["service.name"], "console-test")
+        self.assertEqual(
+            child_line["parent_span_id"],
+            f"{parent.get_span_context().span_id:016x}",
+        )
+        self.assertEqual(parent_line["trace_id"], child_line["trace_id"])
+        self.assertNotIn("parent_span_id", parent_line)
+        tracer_provider.shutdown()
+
+    def test_metrics(self) -> None:
+        """Every data point is written into one compact line"""
+        metric_reader = InMemoryMetricReader()
+        meter_provider = MeterProvider(metric_readers=[metric_reader])
+        meter = meter_provider.get_meter(__name__)
+        meter.create_counter("requests").add(3, {"route": "/a"})
+        meter.create_histogram("duration", unit="s").record(0.5)
+        metric_exporter = METRIC_EXPORTERS.create("STDOUT", self.create_config())
+        metric_exporter.export(metric_reader.get_metrics_data())
+        metric_exporter.shutdown()
+        meter_provider.shutdown()
+
+        counter_line, histogram_line = self.read_lines()
+        self.assertEqual(counter_line["name"], "requests")
+        self.assertEqual(counter_line["type"], "Sum")
+        self.assertEqual(counter_line["value"], 3)
+        self.assertEqual(counter_line["attributes"], {"route": "/a"})
+        self.assertEqual(histogram_line["unit"], "s")
+        self.assertEqual(histogram_line["count"], 1)
+        self.assertEqual(histogram_line["sum"], 0.5)
+
+    def test_background_write(self) -> None:
+        """The writer thread writes the lines without a flush, and the exporters share it"""
+        config = self.create_config(flush_interval_millis=10)
+        span_exporter = SPAN_EXPORTERS.create("STDOUT", config)
+        metric_exporter = METRIC_EXPORTERS.create("STDOUT", config)
+        self.assertIs(span_exporter.writer, metric_exporter.writer)
+
+        tracer_provider = TracerProvider(ALWAYS_ON)
+        tracer_provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+        tracer_provider.get_tracer(__name__).start_span("background").end()
+        (line,) = self.read_lines(timeout_sec=5.0)
+        self.assertEqual(line["name"], "background")
+
+        tracer_provider.shutdown()
+        self.assertIn(self.write_fd, SHARED_WRITERS)
+        metric_exporter.shutdown()
+        self.assertNotIn(self.write_fd, SHARED_WRITERS)
+
+    def test_fork(self) -> None:
+        """The writer of a forked child process writes the lines of the child, without a flush"""
+        writer = SPAN_EXPORTERS.create(
+            "STDOUT", self.create_config(flush_interval_millis=10)
+        ).writer
+        self.addCleanup(writer.release)
+        writer.append(b'{"process":"parent"}\n')
+        pid = os.fork()
+        if pid == 0:
+            try:
+                writer.append(b'{"process":"child"}\n')
+                time.sleep(0.5)
+            finally:
+                os._exit(0)  # pylint: disable=protected-access
+        os.waitpid(pid, 0)
+        writer.write_pending()
+        self.assertEqual(
+            sorted(line["process"] for line in self.read_lines(timeout_sec=1.0)),
+            ["child", "parent"],
+        )
+
+    def test_full_buffer(self) -> None:
+        """The records are dropped while the buffer is full"""
+        writer = SPAN_EXPORTERS.create(
+            "STDOUT",
+            self.create_config(flush_interval_millis=3_600_000, max_buffer_bytes=8),
+        ).writer
+        self.addCleanup(writer.release)
+        self.assertTrue(writer.append(b"{}\n"))
+        with self.assertLogs("oti.console", "WARNING"):
+            self.assertFalse(writer.append(b'{"a":1}\n'))
+        writer.write_pending()
+        self.assertEqual(self.read_lines(), [{}])
+
+    def test_unknown_format(self) -> None:
+        """The console format is validated"""
+        config = OTIConfig(
+            console_exporter_config=ConsoleExporterConfig(output_format="YAML")
+        )
+        with self.assertRaises(OTIConfigError):
+            SPAN_EXPORTERS.create("STDOUT", config)
@@ -0,0 +1,68 @@
+"""Test the disabled signals of the OTI class"""
+
+import unittest
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from oti import OTI, OTIConfig, PeriodicMetricReaderConfig, SamplingConfig
+
+
+class DisabledTestCase(unittest.TestCase):
+    """The disabled mode test cases"""
+
+    def test_sdk_disabled(self) -> None:
+        """The no-op providers of the OTEL API are used, and neither exporters nor servers are created"""
+        instance = OTI(OTIConfig(sdk_disabled=True))
+        self.assertIsInstance(instance.tracer_provider, trace.NoOpTracerProvider)
+        self.assertIsInstance(instance.meter_provider, metrics.NoOpMeterProvider)
+        self.assertIsNone(instance.span_processor)
+        self.assertIsNone(instance.metric_server)
+        self.assertIsNone(instance.metrics_wsgi_app)
+
+        span = instance.tracer_provider.get_tracer(__name__).start_span("span")
+        self.assertFalse(span.is_recording())
+
+        def function():
+            pass
+
+        self.assertIs(instance.traced(function), function)
+        instance.meter_provider.get_meter(__name__).create_counter("counter").add(1)
+
+        # The reconfiguration validates the sampling config, but there is no sampler to replace
+        instance.reconfigure(sampling_config=SamplingConfig("ALWAYS_ON"))
+        self.assertEqual(
+            instance.config.sampling_config.trace_sampling_type, "ALWAYS_ON"
+        )
+        instance.shutdown()
+
+    def test_tracing_disabled(self) -> None:
+        """The tracing can be disabled, while the metrics are exported"""
+        instance = OTI(
+            OTIConfig(
+                span_processor_type="DISABLED",
+                metric_exporter_mode_config="PERIODIC",
+                periodic_metric_reader_config=PeriodicMetricReaderConfig(
+                    export_interval_millis=3_600_000
+                ),
+            )
+        )
+        try:
+            self.assertIsInstance(instance.tracer_provider, trace.NoOpTracerProvider)
+            self.assertIsInstance(instance.meter_provider, MeterProvider)
+        finally:
+            instance.shutdown()
+
+    def test_metrics_disabled(self) -> None:
+        """The metrics can be disabled, while the spans are exported"""
+        instance = OTI(
+            OTIConfig(
+                sampling_config=SamplingConfig("ALWAYS_ON"),
+                metric_exporter_mode_config="DISABLED",
+            )
+        )
+        try:
+            self.assertIsInstance(instance.meter_provider, metrics.NoOpMeterProvider)
+            self.assertIsNone(instance.metric_server)
+            span = instance.tracer_provider.get_tracer(__name__).start_span("span")
+            self.assertTrue(span.is_recording())
+        finally:
+            instance.shutdown()
@@ -0,0 +1,131 @@
+"""Test the flush module"""
+
+import io
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from opentelemetry.sdk.metrics.export import ConsoleMetricExporter
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from oti import (
+    OTI,
+    OTIConfig,
+    BatchSpanProcessorConfig,
+    ExporterConfig,
+    FlushConfig,
+    PeriodicMetricReaderConfig,
+    SamplingConfig,
+)
+from oti.flush import install_flush_signal_handler, run_until_deadline
+from oti.registry import METRIC_EXPORTERS, SPAN_EXPORTERS
+
+
+class SlowSpanExporter(SpanExporter):
+    """Span exporter that takes some time to export, like a slow backend"""
+
+    def __init__(self, delay):
+        """Constructor of the slow span exporter"""
+        self.delay = delay
+        self.exported = []
+
+    def export(self, spans):
+        """Wait, then keep the spans"""
+        time.sleep(self.delay)
+        self.exported.extend(spans)
+        return SpanExportResult.SUCCESS
+
+
+class FlushTestCase(unittest.TestCase):
+    """The flush and shutdown test cases"""
+
+    def test_run_until_deadline(self) -> None:
+        """The tasks run in parallel, and the failed and unfinished ones are returned"""
+
+        def fail():
+            raise RuntimeError("failed")
+
+        start = time.monotonic()
+        failed = run_until_deadline(
+            {
+                "slow": lambda: time.sleep(0.3),
+                "slower": lambda: time.sleep(0.3),
+                "stuck": lambda: time.sleep(5),
+                "false": lambda: False,
+                "error": fail,
+                "done": lambda: True,
+            },
+            500,
+            "flush",
+        )
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(failed, ["stuck", "false", "error"])
+
+    def test_force_flush_and_shutdown(self) -> None:
+        """The flush exports the queued spans, and the shutdown returns within the timeout"""
+        exporter = SlowSpanExporter(delay=0.1)
+        SPAN_EXPORTERS.register("SLOW", lambda _config: exporter)
+        METRIC_EXPORTERS.register(
+            "SLOW", lambda _config: ConsoleMetricExporter(out=io.StringIO())
+        )
+        instance = OTI(
+            OTIConfig(
+                span_processor_type="BATCH",
+                exporter_config=ExporterConfig(exporter_type="SLOW"),
+                sampling_config=SamplingConfig("ALWAYS_ON"),
+                batch_span_processor_config=BatchSpanProcessorConfig(
+                    schedule_delay_millis=3_600_000
+                ),
+                metric_exporter_mode_config="PERIODIC",
+                periodic_metric_reader_config=PeriodicMetricReaderConfig(
+                    export_interval_millis=3_600_000
+                ),
+                flush_config=FlushConfig(timeout_millis=2000),
+            )
+        )
+        tracer = instance.tracer_provider.get_tracer(__name__)
+        tracer.start_span("flushed").end()
+        self.assertEqual(instance.force_flush(), [])
+        self.assertEqual(len(exporter.exported), 1)
+
+        exporter.delay = 2
+        tracer.start_span("unflushed").end()
+        start = time.monotonic()
+        self.assertEqual(instance.shutdown(timeout_millis=300), ["traces"])
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_flush_signal_handler(self) -> None:
+        """The signal triggers a flush in the background, and the previous handler is called"""
+        flushed = threading.Event()
+        previous_calls = []
+        previous_handler = signal.signal(
+            signal.SIGUSR1, lambda signum, _frame: previous_calls.append(signum)
+        )
+        self.addCleanup(signal.signal, signal.SIGUSR1, previous_handler)
+        install_flush_signal_handler("sigusr1", flushed.set)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        self.assertTrue(flushed.wait(5))
+        self.assertEqual(previous_calls, [signal.SIGUSR1])
+
+    def test_default_termination_signal(self) -> None:
+        """The termination signal without a Python handler flushes, then stops the process"""
+        script = (
+            "import os, signal\n"
+            "from oti.flush import install_flush_signal_handler\n"
+            "install_flush_signal_handler('SIGTERM', lambda: print('flushed', flush=True))\n"
+            "os.kill(os.getpid(), signal.SIGTERM)\n"
+            "print('survived', flush=True)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            # The package is imported from the source tree, even if it is not installed
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            capture_output=True,
+            check=False,
+            text=True,
+            timeout=30,
+        )
+        self.assertEqual(result.returncode, -signal.SIGTERM)
+        self.assertEqual(result.stdout, "flushed\n")
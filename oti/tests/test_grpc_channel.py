@@ -0,0 +1,102 @@
+"""Test the grpc_channel module"""
+
+import threading
+import unittest
+from unittest import mock
+import grpc
+from oti import OTIConfig, ExporterConfig
+from oti.config import OTIConfigError
+from oti.grpc_channel import (
+    SHARED_CHANNELS,
+    SharedChannelOTLPMetricExporter,
+    SharedChannelOTLPSpanExporter,
+)
+from oti.registry import SPAN_EXPORTERS, METRIC_EXPORTERS
+
+
+class SharedChannelTestCase(unittest.TestCase):
+    """The shared gRPC channel test cases"""
+
+    def test_shared_channel(self) -> None:
+        """The trace and metric exporters share one channel, that is closed after both are shut down"""
+        config = OTIConfig(
+            exporter_config=ExporterConfig(
+                exporter_type="OTLPGRPC",
+                exporter_url="http://localhost:4317",
+                exporter_compression="gzip",
+                exporter_timeout_millis=2500,
+                exporter_headers="x-api-key=secret",
+                exporter_channel_options="grpc.keepalive_time_ms=30000",
+            )
+        )
+        span_exporter = SPAN_EXPORTERS.create("OTLPGRPC", config)
+        metric_exporter = METRIC_EXPORTERS.create("OTLPGRPC", config)
+        self.assertIs(span_exporter.shared_channel, metric_exporter.shared_channel)
+        shared_channel = span_exporter.shared_channel
+        self.assertEqual(shared_channel.references, 2)
+        self.assertEqual(shared_channel.key[1], grpc.Compression.Gzip)
+        self.assertEqual(shared_channel.key[2], (("grpc.keepalive_time_ms", 30000),))
+        timeout = span_exporter._timeout  # pylint: disable=protected-access
+        self.assertEqual(timeout, 2.5)
+        self.assertIn(
+            ("x-api-key", "secret"),
+            span_exporter._headers,  # pylint: disable=protected-access
+        )
+
+        span_exporter.shutdown()
+        self.assertIn(shared_channel.key, SHARED_CHANNELS)
+        metric_exporter.shutdown()
+        self.assertNotIn(shared_channel.key, SHARED_CHANNELS)
+
+    def test_sdk_channel_closed(self) -> None:
+        """The channel created by the SDK exporter is closed right away"""
+        config = OTIConfig(
+            exporter_config=ExporterConfig(
+                exporter_type="OTLPGRPC", exporter_url="http://localhost:4317"
+            )
+        )
+        with mock.patch(
+            "opentelemetry.exporter.otlp.proto.grpc.exporter.insecure_channel"
+        ) as insecure_channel:
+            span_exporter = SPAN_EXPORTERS.create("OTLPGRPC", config)
+        insecure_channel.return_value.close.assert_called_once_with()
+        span_exporter.shutdown()
+
+    def test_sdk_private_interface(self) -> None:
+        """The private hooks and attributes of the SDK exporters that the shared channel exporters use still exist"""
+        # pylint: disable=protected-access
+        config = OTIConfig(
+            exporter_config=ExporterConfig(
+                exporter_type="OTLPGRPC", exporter_url="http://localhost:4317"
+            )
+        )
+        for exporters, exporter_class in (
+            (SPAN_EXPORTERS, SharedChannelOTLPSpanExporter),
+            (METRIC_EXPORTERS, SharedChannelOTLPMetricExporter),
+        ):
+            with self.subTest(exporter_class.__name__):
+                # The SDK exporter creates its client by calling the `_stub` hook once, in its constructor
+                with mock.patch.object(
+                    exporter_class,
+                    "_stub",
+                    autospec=True,
+                    side_effect=exporter_class._stub,
+                ) as stub:
+                    exporter = exporters.create("OTLPGRPC", config)
+                self.addCleanup(exporter.shutdown)
+                stub.assert_called_once()
+                self.assertTrue(callable(exporter._client.Export))
+                self.assertIsInstance(exporter._export_lock, type(threading.Lock()))
+                self.assertIsInstance(exporter._headers, tuple)
+                self.assertIsInstance(exporter._timeout, float)
+                self.assertFalse(exporter._shutdown)
+
+    def test_unknown_compression(self) -> None:
+        """An unknown compression is a config error"""
+        config = OTIConfig(
+            exporter_config=ExporterConfig(
+                exporter_type="OTLPGRPC", exporter_compression="brotli"
+            )
+        )
+        with self.assertRaises(OTIConfigError):
+            SPAN_EXPORTERS.create("OTLPGRPC", config)
@@ -0,0 +1,150 @@
+"""Test the metric_server module"""
+
+import asyncio
+import gzip
+import threading
+import time
+import unittest
+import urllib.request
+from prometheus_client import CollectorRegistry
+from prometheus_client.core import CounterMetricFamily
+from oti.metric_server import (
+    ScrapeCache,
+    make_asgi_app,
+    make_wsgi_app,
+    start_metric_server,
+)
+
+
+class SlowCollector:  # pylint: disable=too-few-public-methods
+    """Collector that counts its collections, and takes some time to collect"""
+
+    def __init__(self, delay):
+        """Constructor of the slow collector"""
+        self.delay = delay
+        self.collections = 0
+
+    def collect(self):
+        """Collect a counter"""
+        self.collections += 1
+        time.sleep(self.delay)
+        yield CounterMetricFamily("requests", "The requests", value=self.collections)
+
+
+class MetricServerTestCase(unittest.TestCase):
+    """The metric server test cases"""
+
+    def setUp(self):
+        """Create a registry with a slow collector"""
+        self.collector = SlowCollector(delay=0.2)
+        self.registry = CollectorRegistry()
+        self.registry.register(self.collector)
+
+    def test_concurrent_scrapes(self) -> None:
+        """The concurrent scrapes are served from one collection"""
+        scrape_cache = ScrapeCache(self.registry, ttl_millis=0)
+        payloads = []
+        scrapers = [
+            threading.Thread(
+                target=lambda: payloads.append(scrape_cache.scrape(None, None)[2])
+            )
+            for _ in range(4)
+        ]
+        for scraper in scrapers:
+            scraper.start()
+        for scraper in scrapers:
+            scraper.join()
+        self.assertEqual(self.collector.collections, 1)
+        self.assertEqual(len(set(payloads)), 1)
+        self.assertIn(b"requests_total 1.0", payloads[0])
+
+    def test_cache_ttl(self) -> None:
+        """The metrics are collected again after the TTL"""
+        scrape_cache = ScrapeCache(self.registry, ttl_millis=100)
+        scrape_cache.scrape(None, None)
+        scrape_cache.scrape(None, None)
+        self.assertEqual(self.collector.collections, 1)
+        time.sleep(0.15)
+        scrape_cache.scrape(None, None)
+        self.assertEqual(self.collector.collections, 2)
+
+    def test_formats(self) -> None:
+        """The OpenMetrics format and the gzip compression are negotiated"""
+        scrape_cache = ScrapeCache(self.registry, ttl_millis=60_000)
+        content_type, content_encoding, payload = scrape_cache.scrape(
+            "application/openmetrics-text; version=1.0.0,text/plain;q=0.5", "gzip"
+        )
+        self.assertTrue(content_type.startswith("application/openmetrics-text"))
+        self.assertEqual(content_encoding, "gzip")
+        self.assertTrue(gzip.decompress(payload).endswith(b"# EOF\n"))
+
+        content_type, content_encoding, payload = scrape_cache.scrape(
+            "application/vnd.google.protobuf;proto=io.prometheus.client.MetricFamily;encoding=delimited",
+            None,
+        )
+        self.assertTrue(content_type.startswith("text/plain"))
+        self.assertIsNone(content_encoding)
+        self.assertIn(b"requests_total 1.0", payload)
+        self.assertEqual(self.collector.collections, 1)
+
+    def test_http_server(self) -> None:
+        """The metric server serves the scrapes over HTTP"""
+        self.collector.delay = 0
+        server, thread = start_metric_server(
+            "127.0.0.1", 0, ScrapeCache(self.registry, 1000)
+        )
+        try:
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{server.server_address[1]}/metrics",
+                headers={"Accept-Encoding": "gzip"},
+            )
+            with urllib.request.urlopen(request, timeout=5) as response:
+                self.assertEqual(response.headers["Content-Encoding"], "gzip")
+                self.assertIn(b"requests_total", gzip.decompress(response.read()))
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_wsgi_app(self) -> None:
+        """The WSGI app serves the scrapes"""
+        self.collector.delay = 0
+        metrics_app = make_wsgi_app(ScrapeCache(self.registry, 1000))
+        responses = []
+        body = metrics_app(
+            {"PATH_INFO": "/metrics", "HTTP_ACCEPT_ENCODING": "gzip"},
+            lambda status, headers: responses.append((status, dict(headers))),
+        )
+        self.assertEqual(responses[0][0], "200 OK")
+        self.assertEqual(responses[0][1]["Content-Encoding"], "gzip")
+        self.assertIn(b"requests_total", gzip.decompress(b"".join(body)))
+
+    def test_asgi_app(self) -> None:
+        """The ASGI app serves the scrapes"""
+        self.collector.delay = 0
+        metrics_app = make_asgi_app(ScrapeCache(self.registry, 1000))
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(
+            metrics_app(
+                {
+                    "type": "http",
+                    "path": "/metrics",
+                    "headers": [(b"accept", b"application/openmetrics-text")],
+                },
+                None,
+                send,
+            )
+        )
+        self.assertEqual(len(messages), 2)
+        start, body = messages[0], messages[1]
+        self.assertEqual(start["status"], 200)
+        self.assertTrue(
+            dict(start["headers"])[b"content-type"].startswith(
+                b"application/openmetrics-text"
+            )
+        )
+        self.assertTrue(body["body"].endswith(b"# EOF\n"))
@@ -0,0 +1,63 @@
+"""Test the multiprocess module"""
+
+import os
+import tempfile
+import unittest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from prometheus_client import generate_latest
+from oti.multiprocess import (
+    ForkSafeSpanExporter,
+    MultiProcessMetricExporter,
+    create_multiprocess_registry,
+)
+
+
+def record_metrics(multiprocess_dir, amount):
+    """Record metrics with a meter provider that writes them to the multi-process files"""
+    reader = PeriodicExportingMetricReader(
+        MultiProcessMetricExporter(multiprocess_dir),
+        export_interval_millis=3_600_000,
+    )
+    meter_provider = MeterProvider(metric_readers=[reader])
+    meter = meter_provider.get_meter(__name__)
+    meter.create_counter("work.counter").add(amount, {"work.type": "test"})
+    meter.create_histogram("work.duration").record(amount, {"work.type": "test"})
+    meter_provider.shutdown()
+
+
+class MultiProcessTestCase(unittest.TestCase):
+    """The multi-process mode test cases"""
+
+    def test_aggregates_processes(self) -> None:
+        """The metrics of a forked child and the parent are aggregated"""
+        with tempfile.TemporaryDirectory() as multiprocess_dir:
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    record_metrics(multiprocess_dir, 2)
+                finally:
+                    os._exit(0)  # pylint: disable=protected-access
+            os.waitpid(pid, 0)
+            record_metrics(multiprocess_dir, 1)
+
+            exposition = generate_latest(
+                create_multiprocess_registry(multiprocess_dir)
+            ).decode()
+
+        self.assertIn('work_counter_total{work_type="test"} 3.0', exposition)
+        self.assertIn('work_duration_count{work_type="test"} 2.0', exposition)
+        self.assertIn('work_duration_sum{work_type="test"} 3.0', exposition)
+        self.assertIn('work_duration_bucket{le="5.0",work_type="test"} 2.0', exposition)
+
+    def test_fork_safe_span_exporter(self) -> None:
+        """The fork-safe exporter delegates to a new exporter after rebuild"""
+        exporter = ForkSafeSpanExporter(InMemorySpanExporter)
+        original = exporter.exporter
+        exporter.rebuild()
+        self.assertIsNot(exporter.exporter, original)
+        exporter.export([])
+        exporter.shutdown()
@@ -0,0 +1,245 @@
+"""Test the otlp_file and the replay modules"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (  # pylint: disable=no-name-in-module
+    ExportTraceServiceRequest,
+)
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExporter
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from oti.config import ExporterConfig, FileExporterConfig, OTIConfig, OTIConfigError
+from oti.encoding import decode_message
+from oti.otlp_file import PARTIAL_SUFFIX, RotatingFileWriter, read_records
+from oti.registry import SPAN_EXPORTERS
+from oti.replay import main
+
+
+class ReplayedSpanExporter(SpanExporter):
+    """Span exporter that records the replayed requests"""
+
+    requests = []
+    collector_up = True
+
+    def export(self, spans):
+        """Export the spans"""
+
+    def export_serialized(self, body):
+        """Record the replayed request, if the collector is up"""
+        if not self.collector_up:
+            return False
+        self.requests.append(ExportTraceServiceRequest.FromString(body))
+        return True
+
+    def shutdown(self):
+        """Shut down the exporter"""
+
+
+SPAN_EXPORTERS.register("REPLAYED", lambda _config: ReplayedSpanExporter())
+
+
+class OTLPFileTestCase(unittest.TestCase):
+    """The OTLP file exporter and replay test cases"""
+
+    def setUp(self):
+        """Create the directory of the files"""
+        self.file_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.file_dir)
+        ReplayedSpanExporter.requests = []
+        ReplayedSpanExporter.collector_up = True
+
+    def export_spans(
+        self, names, encoding="PROTOBUF", compression="NONE", **file_config
+    ):
+        """Export one span per name into the OTLPFILE exporter, then shut it down"""
+        config = OTIConfig(
+            exporter_config=ExporterConfig(
+                exporter_type="OTLPFILE",
+                exporter_encoding=encoding,
+                exporter_compression=compression,
+            ),
+            file_exporter_config=FileExporterConfig(
+                file_dir=self.file_dir, **file_config
+            ),
+        )
+        tracer_provider = TracerProvider(ALWAYS_ON)
+        tracer_provider.add_span_processor(
+            SimpleSpanProcessor(SPAN_EXPORTERS.create("OTLPFILE", config))
+        )
+        tracer = tracer_provider.get_tracer(__name__)
+        for name in names:
+            tracer.start_span(name).end()
+        tracer_provider.shutdown()
+        return sorted(os.listdir(self.file_dir))
+
+    def read_span_names(self, path, encoding="PROTOBUF"):
+        """Read the names of the spans of the file"""
+        return [
+            span.name
+            for record in read_records(path)
+            for resource_spans in decode_message(
+                record, encoding, ExportTraceServiceRequest
+            ).resource_spans
+            for scope_spans in resource_spans.scope_spans
+            for span in scope_spans.spans
+        ]
+
+    def test_length_delimited_gzip(self) -> None:
+        """The requests are written length-delimited into a gzip file, that is renamed when it is closed"""
+        (name,) = self.export_spans(["first", "second"], compression="GZIP")
+        self.assertTrue(name.startswith("traces-"))
+        self.assertTrue(name.endswith(".otlp.gz"))
+        self.assertEqual(
+            self.read_span_names(os.path.join(self.file_dir, name)),
+            ["first", "second"],
+        )
+
+    def test_ndjson(self) -> None:
+        """The JSON requests are written one per line, with hex trace and span IDs"""
+        (name,) = self.export_spans(["first", "second"], encoding="JSON")
+        path = os.path.join(self.file_dir, name)
+        self.assertTrue(name.endswith(".ndjson"))
+        with open(path, "rb") as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertRegex(lines[0], rb'"traceId":"[0-9a-f]{32}"')
+        self.assertEqual(self.read_span_names(path, "JSON"), ["first", "second"])
+
+    def test_rotation(self) -> None:
+        """The files are rotated by their size, and the oldest ones are deleted"""
+        names = self.export_spans(
+            ["1", "2", "3", "4", "5"], max_file_bytes=1, max_files=2
+        )
+        self.assertEqual(len(names), 2)
+        self.assertFalse([name for name in names if name.endswith(PARTIAL_SUFFIX)])
+        self.assertEqual(
+            [self.read_span_names(os.path.join(self.file_dir, name)) for name in names],
+            [["4"], ["5"]],
+        )
+
+    def test_truncated_file(self) -> None:
+        """The truncated last record of a file is skipped"""
+        (name,) = self.export_spans(["first", "second"])
+        path = os.path.join(self.file_dir, name)
+        os.truncate(path, os.path.getsize(path) - 1)
+        with self.assertLogs("oti.otlp_file", "WARNING"):
+            self.assertEqual(self.read_span_names(path), ["first"])
+
+    def test_missing_file_dir(self) -> None:
+        """The file directory is required"""
+        config = OTIConfig(
+            exporter_config=ExporterConfig(exporter_type="OTLPFILE"),
+            file_exporter_config=FileExporterConfig(file_dir=None),
+        )
+        with self.assertRaises(OTIConfigError):
+            SPAN_EXPORTERS.create("OTLPFILE", config)
+
+    def test_replay(self) -> None:
+        """The files are replayed in batches, and deleted when they have been sent"""
+        self.export_spans(["1", "2", "3"], max_file_bytes=1)
+        self.export_spans(["4", "5"], encoding="JSON", rotate_interval_millis=0)
+        self.assertEqual(
+            main(
+                [
+                    self.file_dir,
+                    "--exporter-type",
+                    "REPLAYED",
+                    "--batch-size",
+                    "2",
+                    "--concurrency",
+                    "2",
+                    "--delete",
+                ]
+            ),
+            0,
+        )
+        self.assertEqual(os.listdir(self.file_dir), [])
+        span_counts = sorted(
+            len(request.resource_spans) for request in ReplayedSpanExporter.requests
+        )
+        # Three protobuf files of one request each, and a JSON file of two requests in one batch
+        self.assertEqual(span_counts, [1, 1, 1, 2])
+
+    def test_replay_failure(self) -> None:
+        """The files that could not be sent are kept"""
+        names = self.export_spans(["1"])
+        ReplayedSpanExporter.collector_up = False
+        with self.assertLogs("oti.replay", "ERROR"):
+            exit_code = main(
+                [self.file_dir, "--exporter-type", "REPLAYED", "--retries", "0"]
+            )
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(sorted(os.listdir(self.file_dir)), names)
+
+    def rename_to_partial(self, name, pid):
+        """Rename the file as if it was being written by the process of the pid, and return its new name"""
+        signal, timestamp, _pid, sequence = name.split("-")
+        partial_name = f"{signal}-{timestamp}-{pid}-{sequence}{PARTIAL_SUFFIX}"
+        os.rename(
+            os.path.join(self.file_dir, name),
+            os.path.join(self.file_dir, partial_name),
+        )
+        return partial_name
+
+    def test_stale_partial_files(self) -> None:
+        """The partial files of the stopped processes are finalized when a new writer starts"""
+        with subprocess.Popen([sys.executable, "-c", "pass"]) as process:
+            process.wait()
+        first_name, second_name = self.export_spans(
+            ["stopped", "live"], max_file_bytes=1
+        )
+        stopped_name = self.rename_to_partial(first_name, process.pid)
+        live_name = self.rename_to_partial(second_name, os.getppid())
+        with self.assertLogs("oti.otlp_file", "WARNING"):
+            names = self.export_spans(["new"])
+        self.assertNotIn(stopped_name, names)
+        self.assertIn(stopped_name[: -len(PARTIAL_SUFFIX)], names)
+        self.assertIn(live_name, names)
+        self.assertEqual(len(names), 3)
+
+    def test_idle_rotation(self) -> None:
+        """The file of an idle writer is rotated when it gets old enough"""
+        writer = RotatingFileWriter(
+            self.file_dir,
+            "traces",
+            "PROTOBUF",
+            "NONE",
+            FileExporterConfig(file_dir=self.file_dir, rotate_interval_millis=50),
+        )
+        self.addCleanup(writer.close)
+        writer.write(b"request")
+        deadline = time.monotonic() + 5
+        while os.listdir(self.file_dir)[0].endswith(PARTIAL_SUFFIX):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        (name,) = os.listdir(self.file_dir)
+        self.assertEqual(
+            list(read_records(os.path.join(self.file_dir, name))), [b"request"]
+        )
+
+    def test_replay_partial(self) -> None:
+        """The partial files are replayed only if it is requested"""
+        self.rename_to_partial(self.export_spans(["crashed"])[0], os.getppid())
+        self.assertEqual(
+            main([self.file_dir, "--exporter-type", "REPLAYED", "--delete"]), 0
+        )
+        self.assertEqual(ReplayedSpanExporter.requests, [])
+        self.assertEqual(
+            main(
+                [
+                    self.file_dir,
+                    "--exporter-type",
+                    "REPLAYED",
+                    "--delete",
+                    "--include-partial",
+                ]
+            ),
+            0,
+        )
+        self.assertEqual(len(ReplayedSpanExporter.requests), 1)
+        self.assertEqual(os.listdir(self.file_dir), [])
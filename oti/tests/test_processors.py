@@ -0,0 +1,266 @@
+"""Test the processors module"""
+
+import threading
+import time
+import unittest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import Status, StatusCode
+from oti.processors import (
+    AdaptiveBatchSpanProcessor,
+    FanOutSpanProcessor,
+    TailSamplingSpanProcessor,
+)
+
+
+class BlockingSpanExporter(InMemorySpanExporter):
+    """Span exporter that blocks until it is released, like an unavailable backend"""
+
+    def __init__(self):
+        """Constructor of the blocking span exporter"""
+        super().__init__()
+        self.released = threading.Event()
+
+    def export(self, spans):
+        """Wait for the release, then export the spans"""
+        self.released.wait()
+        return super().export(spans)
+
+
+class AdaptiveBatchSpanProcessorTestCase(unittest.TestCase):
+    """The AdaptiveBatchSpanProcessor test cases"""
+
+    def setUp(self) -> None:
+        self.exporter = InMemorySpanExporter()
+        self.processor = AdaptiveBatchSpanProcessor(
+            self.exporter,
+            max_queue_size=1024,
+            schedule_delay_millis=1000,
+            max_export_batch_size=64,
+            export_timeout_millis=100,
+        )
+
+    def tearDown(self) -> None:
+        self.processor.shutdown()
+
+    def test_grows_under_pressure(self) -> None:
+        """The batch size grows and the delay shrinks when the queue fills up"""
+        self.processor.queue.extend([None] * 900)
+        self.processor._adapt(1.0)  # pylint: disable=protected-access
+        self.assertEqual(self.processor.max_export_batch_size, 128)
+        self.assertEqual(self.processor.schedule_delay_millis, 500)
+        self.processor.queue.clear()
+
+        self.processor._adapt(1.0)  # pylint: disable=protected-access
+        self.assertEqual(self.processor.max_export_batch_size, 64)
+        self.assertEqual(self.processor.schedule_delay_millis, 1000)
+
+    def test_shrinks_on_slow_exporter(self) -> None:
+        """The batch size shrinks when the exports exceed the latency budget"""
+        for _ in range(5):
+            self.processor._adapt(500.0)  # pylint: disable=protected-access
+        self.assertEqual(
+            self.processor.max_export_batch_size,
+            self.processor.min_export_batch_size,
+        )
+
+    def test_exports_all_spans(self) -> None:
+        """All the spans are exported through the adapted batches"""
+        # pylint: disable=not-context-manager
+        provider = TracerProvider(ALWAYS_ON)
+        provider.add_span_processor(self.processor)
+        tracer = provider.get_tracer(__name__)
+        for _ in range(500):
+            with tracer.start_as_current_span("span"):
+                pass
+        self.assertTrue(self.processor.force_flush())
+        self.assertEqual(len(self.exporter.get_finished_spans()), 500)
+
+
+class TailSamplingSpanProcessorTestCase(unittest.TestCase):
+    """The TailSamplingSpanProcessor test cases"""
+
+    def setUp(self) -> None:
+        self.exporter = InMemorySpanExporter()
+        self.processor = None
+
+    def tearDown(self) -> None:
+        if self.processor is not None:
+            self.processor.shutdown()
+
+    def create_tracer(self, **kwargs):
+        """Create a tracer that exports through a tail sampling processor"""
+        settings = {
+            "decision_wait_millis": 30000,
+            "max_buffered_spans": 1000,
+            "latency_threshold_millis": 1000,
+            "sampling_ratio": 0.0,
+        }
+        settings.update(kwargs)
+        self.processor = TailSamplingSpanProcessor(
+            SimpleSpanProcessor(self.exporter), **settings
+        )
+        provider = TracerProvider(ALWAYS_ON)
+        provider.add_span_processor(self.processor)
+        return provider.get_tracer(__name__)
+
+    def test_keeps_error_traces(self) -> None:
+        """The traces with an error span are kept, the other ones are dropped"""
+        # pylint: disable=not-context-manager
+        tracer = self.create_tracer()
+        with tracer.start_as_current_span("ok-root"):
+            with tracer.start_as_current_span("ok-child"):
+                pass
+        with tracer.start_as_current_span("error-root"):
+            with tracer.start_as_current_span("error-child") as span:
+                span.set_status(Status(StatusCode.ERROR))
+        self.assertEqual(
+            sorted(span.name for span in self.exporter.get_finished_spans()),
+            ["error-child", "error-root"],
+        )
+        self.assertEqual(self.processor.buffered_spans, 0)
+
+    def test_keeps_slow_traces(self) -> None:
+        """The traces with a root span longer than the threshold are kept"""
+        # pylint: disable=not-context-manager
+        tracer = self.create_tracer(latency_threshold_millis=0)
+        with tracer.start_as_current_span("slow-root"):
+            pass
+        self.assertEqual(len(self.exporter.get_finished_spans()), 1)
+
+    def test_keeps_ratio(self) -> None:
+        """The sampling ratio of the normal traces is kept"""
+        # pylint: disable=not-context-manager
+        tracer = self.create_tracer(sampling_ratio=1.0)
+        with tracer.start_as_current_span("root"):
+            pass
+        self.assertEqual(len(self.exporter.get_finished_spans()), 1)
+
+    def test_bounded_buffer(self) -> None:
+        """The oldest traces are decided when the buffer is full, and the late spans follow the decision"""
+        # pylint: disable=not-context-manager
+        tracer = self.create_tracer(max_buffered_spans=10)
+        root = tracer.start_span("root")
+        with trace.use_span(root):
+            with tracer.start_as_current_span("error-child") as span:
+                span.set_status(Status(StatusCode.ERROR))
+        with tracer.start_as_current_span("other-root"):
+            for _ in range(10):
+                tracer.start_span("other-child").end()
+            self.assertEqual(self.processor.buffered_spans, 10)
+            self.assertEqual(len(self.exporter.get_finished_spans()), 1)
+        root.end()
+        self.assertEqual(len(self.exporter.get_finished_spans()), 2)
+
+    def test_evicts_without_new_spans(self) -> None:
+        """The traces that waited too long are decided even if no further span ends"""
+        # pylint: disable=not-context-manager
+        tracer = self.create_tracer(decision_wait_millis=50, sampling_ratio=1.0)
+        root = tracer.start_span("root")
+        with trace.use_span(root):
+            tracer.start_span("child").end()
+        for _ in range(500):
+            if self.exporter.get_finished_spans():
+                break
+            time.sleep(0.01)
+        self.assertEqual(
+            [span.name for span in self.exporter.get_finished_spans()], ["child"]
+        )
+        self.assertEqual(self.processor.buffered_spans, 0)
+        root.end()
+
+    def test_evicts_fast_traces_by_ratio(self) -> None:
+        """The evicted traces are judged by the duration of their spans, not by the time they waited"""
+        # pylint: disable=not-context-manager
+        tracer = self.create_tracer(
+            decision_wait_millis=50, latency_threshold_millis=20
+        )
+        root = tracer.start_span("root")
+        with trace.use_span(root):
+            tracer.start_span("fast-child").end()
+        for _ in range(500):
+            if self.processor.buffered_spans == 0:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.processor.buffered_spans, 0)
+        # The trace waited longer than the threshold, but its span was fast and out of the ratio
+        self.assertEqual(len(self.exporter.get_finished_spans()), 0)
+        root.end()
+        self.assertEqual(len(self.exporter.get_finished_spans()), 0)
+
+    def test_force_flush_decides(self) -> None:
+        """The force flush decides about the buffered traces, and passes the kept ones on"""
+        # pylint: disable=not-context-manager
+        tracer = self.create_tracer(sampling_ratio=1.0)
+        root = tracer.start_span("root")
+        with trace.use_span(root):
+            tracer.start_span("child").end()
+        self.assertEqual(len(self.exporter.get_finished_spans()), 0)
+        self.assertTrue(self.processor.force_flush())
+        self.assertEqual(len(self.exporter.get_finished_spans()), 1)
+        # The late root span follows the decision of its trace
+        root.end()
+        self.assertEqual(len(self.exporter.get_finished_spans()), 2)
+
+
+class FanOutSpanProcessorTestCase(unittest.TestCase):
+    """The FanOutSpanProcessor test cases"""
+
+    def test_exports_to_every_pipeline(self) -> None:
+        """Every pipeline exports all the spans"""
+        exporters = [InMemorySpanExporter(), InMemorySpanExporter()]
+        processor = FanOutSpanProcessor(
+            [
+                BatchSpanProcessor(exporter, schedule_delay_millis=10)
+                for exporter in exporters
+            ],
+            max_queue_size=2048,
+        )
+        tracer_provider = TracerProvider(ALWAYS_ON)
+        tracer_provider.add_span_processor(processor)
+        tracer = tracer_provider.get_tracer(__name__)
+        for _ in range(100):
+            tracer.start_span("work").end()
+        self.assertTrue(processor.force_flush())
+        for exporter in exporters:
+            self.assertEqual(len(exporter.get_finished_spans()), 100)
+        tracer_provider.shutdown()
+
+    def test_isolated_pipelines(self) -> None:
+        """A blocked exporter does not delay the other pipelines"""
+        blocked_exporter = BlockingSpanExporter()
+        # The blocked exporter would block the shutdown at exit if an assertion failed
+        self.addCleanup(blocked_exporter.released.set)
+        exporter = InMemorySpanExporter()
+        fast_pipeline = BatchSpanProcessor(exporter, schedule_delay_millis=10)
+        processor = FanOutSpanProcessor(
+            [
+                BatchSpanProcessor(
+                    blocked_exporter,
+                    max_queue_size=16,
+                    schedule_delay_millis=10,
+                    max_export_batch_size=16,
+                ),
+                fast_pipeline,
+            ],
+            max_queue_size=2048,
+        )
+        tracer_provider = TracerProvider(ALWAYS_ON)
+        tracer_provider.add_span_processor(processor)
+        tracer = tracer_provider.get_tracer(__name__)
+        for _ in range(100):
+            tracer.start_span("work").end()
+        processor.dispatch()
+        self.assertTrue(fast_pipeline.force_flush(5000))
+        self.assertEqual(len(exporter.get_finished_spans()), 100)
+        self.assertEqual(len(blocked_exporter.get_finished_spans()), 0)
+
+        blocked_exporter.released.set()
+        tracer_provider.shutdown()
+        # The blocked pipeline dropped the spans that did not fit into its own queue
+        self.assertLess(len(blocked_exporter.get_finished_spans()), 100)
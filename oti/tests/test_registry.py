@@ -0,0 +1,55 @@
+"""Test the registry module"""
+
+import subprocess
+import sys
+import unittest
+from unittest import mock
+from oti import OTIConfig
+from oti.registry import ExporterRegistry, SPAN_EXPORTERS, METRIC_EXPORTERS
+
+
+class ExporterRegistryTestCase(unittest.TestCase):
+    """The ExporterRegistry test cases"""
+
+    def test_builtin_exporter_types(self) -> None:
+        """The built-in exporter types are registered case-insensitively"""
+        for exporter_type in ("STDOUT", "OTLPGRPC", "otlphttp"):
+            self.assertIsNotNone(SPAN_EXPORTERS.get_factory(exporter_type))
+            self.assertIsNotNone(METRIC_EXPORTERS.get_factory(exporter_type))
+        self.assertIsNone(SPAN_EXPORTERS.create("UNKNOWN", OTIConfig()))
+
+    def test_register(self) -> None:
+        """A registered factory is called with the config"""
+        registry = ExporterRegistry("oti.test_exporters")
+        config = OTIConfig()
+        registry.register("custom", lambda cfg: ("custom", cfg))
+        self.assertEqual(registry.create("CUSTOM", config), ("custom", config))
+
+    def test_entry_point(self) -> None:
+        """The factories are looked up among the entry points, and loaded only once"""
+        entry_point = mock.Mock()
+        entry_point.name = "plugin"
+        entry_point.load.return_value = lambda cfg: "plugin-exporter"
+        registry = ExporterRegistry("oti.test_exporters")
+        with mock.patch(
+            "oti.registry.entry_points", return_value=[entry_point]
+        ) as mocked_entry_points:
+            self.assertEqual(registry.create("PLUGIN", OTIConfig()), "plugin-exporter")
+            self.assertEqual(registry.create("PLUGIN", OTIConfig()), "plugin-exporter")
+        mocked_entry_points.assert_called_once_with(group="oti.test_exporters")
+        entry_point.load.assert_called_once()
+
+    def test_lazy_import(self) -> None:
+        """Importing oti does not import the OTLP and Prometheus exporters"""
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, oti; print(sorted(m for m in sys.modules"
+                " if m.startswith(('grpc', 'opentelemetry.exporter', 'prometheus_client'))))",
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        self.assertEqual(output.strip(), "[]")
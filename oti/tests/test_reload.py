@@ -0,0 +1,150 @@
+"""Test the reload module"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from opentelemetry.sdk.trace.sampling import ParentBased
+from oti import (
+    OTI,
+    OTIConfig,
+    BatchSpanProcessorConfig,
+    ExporterConfig,
+    PeriodicMetricReaderConfig,
+    ReloadConfig,
+    SamplingConfig,
+)
+from oti.config import OTIConfigError
+from oti.reload import ConfigFileWatcher, get_reloaded_configs, read_config_file
+
+
+class ReloadTestCase(unittest.TestCase):
+    """The reload test cases"""
+
+    def setUp(self):
+        """Create the directory of the reload file"""
+        self.reload_dir = tempfile.mkdtemp()
+        self.reload_file = os.path.join(self.reload_dir, "oti.env")
+
+    def tearDown(self):
+        """Remove the directory of the reload file"""
+        shutil.rmtree(self.reload_dir)
+
+    def write_reload_file(self, content):
+        """Write the reload file"""
+        with open(self.reload_file, "w", encoding="utf-8") as reload_file:
+            reload_file.write(content)
+
+    def test_reloaded_configs(self) -> None:
+        """The reloadable settings of the file update the copies of the configs"""
+        self.write_reload_file(
+            "# Incident\nOTEL_TRACES_SAMPLER_ARG = 1.0\n\nOTEL_BSP_SCHEDULE_DELAY=100\n"
+        )
+        config = OTIConfig(sampling_config=SamplingConfig("TRACEIDRATIO", 0.01))
+        configs = get_reloaded_configs(read_config_file(self.reload_file), config)
+        self.assertEqual(
+            set(configs), {"sampling_config", "batch_span_processor_config"}
+        )
+        self.assertEqual(configs["sampling_config"].trace_sampling_type, "TRACEIDRATIO")
+        self.assertEqual(configs["sampling_config"].trace_sampling_ratio, 1.0)
+        self.assertEqual(config.sampling_config.trace_sampling_ratio, 0.01)
+        self.assertEqual(
+            configs["batch_span_processor_config"].schedule_delay_millis, 100
+        )
+        with self.assertRaises(OTIConfigError):
+            get_reloaded_configs({"OTEL_TRACES_SAMPLER_ARG": "all"}, config)
+
+    def test_config_file_watcher(self) -> None:
+        """The watcher reloads the changed file, and the file it is triggered for"""
+        reloaded = threading.Event()
+        self.write_reload_file("OTEL_TRACES_SAMPLER_ARG=0.5\n")
+        watcher = ConfigFileWatcher(self.reload_file, 10, reloaded.set)
+        self.addCleanup(watcher.stop)
+        self.assertFalse(reloaded.wait(0.1))
+        self.write_reload_file("OTEL_TRACES_SAMPLER_ARG=1.0\n")
+        self.assertTrue(reloaded.wait(5))
+        reloaded.clear()
+        watcher.trigger()
+        self.assertTrue(reloaded.wait(5))
+
+    def test_reconfigure(self) -> None:
+        """The sampler and the span processor settings are replaced on the running instrumentation"""
+        self.write_reload_file(
+            "OTEL_TRACES_SAMPLER=PARENTBASED_TRACEID_RATIO\nOTEL_TRACES_SAMPLER_ARG=0.5\n"
+        )
+        instance = OTI(
+            OTIConfig(
+                span_processor_type="ADAPTIVE",
+                exporter_config=ExporterConfig(exporter_type="STDOUT"),
+                sampling_config=SamplingConfig("ALWAYS_OFF"),
+                metric_exporter_mode_config="PERIODIC",
+                periodic_metric_reader_config=PeriodicMetricReaderConfig(
+                    export_interval_millis=3_600_000
+                ),
+                reload_config=ReloadConfig(
+                    reload_file=self.reload_file, reload_interval_millis=0
+                ),
+            )
+        )
+        try:
+            # The existing reload file is applied at start
+            self.assertIsInstance(instance.sampler.sampler, ParentBased)
+            self.assertEqual(instance.config.sampling_config.trace_sampling_ratio, 0.5)
+
+            tracer = instance.tracer_provider.get_tracer(__name__)
+            instance.reconfigure(
+                sampling_config=SamplingConfig("ALWAYS_ON"),
+                batch_span_processor_config=BatchSpanProcessorConfig(
+                    schedule_delay_millis=200
+                ),
+            )
+            self.assertTrue(tracer.start_span("sampled").is_recording())
+            self.assertEqual(instance.span_processor.base_schedule_delay_millis, 200)
+
+            with self.assertRaises(OTIConfigError):
+                instance.reconfigure(sampling_config=SamplingConfig("SOMETIMES"))
+            self.assertTrue(tracer.start_span("sampled").is_recording())
+        finally:
+            instance.shutdown()
+
+    def test_concurrent_reconfigure(self) -> None:
+        """The concurrent reconfigurations of different settings do not lose each other's changes"""
+        instance = OTI(
+            OTIConfig(
+                span_processor_type="ADAPTIVE",
+                exporter_config=ExporterConfig(exporter_type="STDOUT"),
+                metric_exporter_mode_config="PERIODIC",
+                periodic_metric_reader_config=PeriodicMetricReaderConfig(
+                    export_interval_millis=3_600_000
+                ),
+            )
+        )
+        self.addCleanup(instance.shutdown)
+
+        def reconfigure_sampling():
+            for _ in range(200):
+                instance.reconfigure(sampling_config=SamplingConfig("ALWAYS_ON"))
+
+        def reconfigure_batch_span_processor():
+            for delay in range(1, 201):
+                instance.reconfigure(
+                    batch_span_processor_config=BatchSpanProcessorConfig(
+                        schedule_delay_millis=delay
+                    )
+                )
+
+        threads = [
+            threading.Thread(target=reconfigure_sampling),
+            threading.Thread(target=reconfigure_batch_span_processor),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            instance.config.sampling_config.trace_sampling_type, "ALWAYS_ON"
+        )
+        self.assertEqual(
+            instance.config.batch_span_processor_config.schedule_delay_millis, 200
+        )
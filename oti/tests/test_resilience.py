@@ -0,0 +1,248 @@
+"""Test the resilience module"""
+
+import time
+import unittest
+from unittest import mock
+from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import (
+    OTLPMetricExporter as GRPCMetricExporter,
+)
+from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+    OTLPSpanExporter as GRPCSpanExporter,
+)
+from opentelemetry.exporter.otlp.proto.http.metric_exporter import (
+    OTLPMetricExporter as HTTPMetricExporter,
+)
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+    OTLPSpanExporter as HTTPSpanExporter,
+)
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    ConsoleMetricExporter,
+    InMemoryMetricReader,
+    MetricExportResult,
+    MetricsData,
+)
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from oti import OTI, OTIConfig, ExporterConfig
+from oti.registry import METRIC_EXPORTERS, SPAN_EXPORTERS
+from oti.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    ResilientMetricExporter,
+    ResilientSpanExporter,
+    get_single_attempt_export,
+)
+from oti.spool import get_serialized_sender
+
+
+class FlakySpanExporter(SpanExporter):
+    """Span exporter that fails until it is fixed, and counts its calls"""
+
+    def __init__(self):
+        """Constructor of the flaky span exporter"""
+        self.available = False
+        self.calls = 0
+
+    def export(self, spans):
+        """Fail, unless the exporter is available"""
+        self.calls += 1
+        if self.available:
+            return SpanExportResult.SUCCESS
+        return SpanExportResult.FAILURE
+
+    def export_serialized(self, _body):
+        """Send a serialized request"""
+        self.calls += 1
+        return self.available
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    """The circuit breaker test cases"""
+
+    def setUp(self):
+        """Create a resilient exporter with a flaky delegate, and a deterministic backoff"""
+        self.exporter = FlakySpanExporter()
+        self.circuit_breaker = CircuitBreaker("test", 3, 1000, 4000)
+        self.resilient_exporter = ResilientSpanExporter(
+            self.exporter, self.circuit_breaker
+        )
+        patcher = mock.patch("oti.resilience.random.uniform", lambda low, high: high)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def export_at(self, now):
+        """Export a batch at the `now` monotonic time"""
+        with mock.patch("oti.resilience.monotonic", return_value=now):
+            return self.resilient_exporter.export([])
+
+    def test_opens_after_failures(self) -> None:
+        """The circuit opens after the consecutive failures, and the exports fail without calling the exporter"""
+        for _ in range(3):
+            self.assertIs(self.export_at(0.0), SpanExportResult.FAILURE)
+        self.assertEqual(self.circuit_breaker.state, OPEN)
+        for _ in range(10):
+            self.assertIs(self.export_at(0.5), SpanExportResult.FAILURE)
+        self.assertEqual(self.exporter.calls, 3)
+
+    def test_half_open_probe(self) -> None:
+        """After the backoff one probe is sent, a failed probe doubles the backoff, a successful one closes the circuit"""
+        for _ in range(3):
+            self.export_at(0.0)
+        self.assertEqual(self.circuit_breaker.open_until, 1.0)
+
+        # The failed probe opens the circuit again for the doubled backoff
+        self.export_at(1.0)
+        self.assertEqual(self.exporter.calls, 4)
+        self.assertEqual(self.circuit_breaker.state, OPEN)
+        self.assertEqual(self.circuit_breaker.open_until, 3.0)
+
+        # The other requests are rejected while the probe is in flight
+        with mock.patch("oti.resilience.monotonic", return_value=3.0):
+            self.assertTrue(self.circuit_breaker.allow_request())
+        self.assertEqual(self.circuit_breaker.state, HALF_OPEN)
+        self.assertIs(self.export_at(3.0), SpanExportResult.FAILURE)
+        self.assertEqual(self.exporter.calls, 4)
+        with mock.patch("oti.resilience.monotonic", return_value=3.0):
+            self.circuit_breaker.record_failure()
+
+        # The backoff is capped
+        self.assertEqual(self.circuit_breaker.open_until, 3.0 + 4.0)
+        self.exporter.available = True
+        self.assertIs(self.export_at(7.0), SpanExportResult.SUCCESS)
+        self.assertEqual(self.circuit_breaker.state, CLOSED)
+        self.assertEqual(self.circuit_breaker.openings, 0)
+        self.assertIs(self.export_at(7.0), SpanExportResult.SUCCESS)
+
+    def test_guarded_replay(self) -> None:
+        """The spool replay of a resilient exporter goes through its circuit breaker"""
+        send = get_serialized_sender(self.resilient_exporter)
+        with mock.patch("oti.resilience.monotonic", return_value=0.0):
+            for _ in range(5):
+                self.assertFalse(send(b""))
+        self.assertEqual(self.exporter.calls, 3)
+        self.assertEqual(self.circuit_breaker.state, OPEN)
+
+    def test_metric_exporter(self) -> None:
+        """The resilient metric exporter keeps the preferences of its delegate"""
+        exporter = ConsoleMetricExporter()
+        exporter.export = mock.Mock(return_value=MetricExportResult.FAILURE)
+        resilient_exporter = ResilientMetricExporter(
+            exporter, CircuitBreaker("test", 1, 1000, 1000)
+        )
+        self.assertEqual(
+            resilient_exporter._preferred_temporality,  # pylint: disable=protected-access
+            exporter._preferred_temporality,  # pylint: disable=protected-access
+        )
+        self.assertIs(resilient_exporter.export(None), MetricExportResult.FAILURE)
+        self.assertIs(resilient_exporter.export(None), MetricExportResult.FAILURE)
+        exporter.export.assert_called_once()
+
+    def test_enabled_by_config(self) -> None:
+        """The exporters are wrapped if the circuit breaker is enabled in the exporter config"""
+        config = OTIConfig(
+            exporter_config=ExporterConfig(
+                exporter_type="STDOUT",
+                exporter_circuit_breaker_enabled=True,
+                exporter_circuit_breaker_failure_threshold=5,
+            ),
+            metric_exporter_mode_config="DISABLED",
+        )
+        instance = OTI(config)
+        try:
+            span_exporter = instance.setup_span_exporter(config)
+            self.assertIsInstance(span_exporter, ResilientSpanExporter)
+            self.assertEqual(span_exporter.circuit_breaker.failure_threshold, 5)
+            self.assertIsInstance(
+                instance.setup_metric_exporter(config), ResilientMetricExporter
+            )
+        finally:
+            instance.shutdown()
+
+    def test_single_attempt(self) -> None:
+        """The OTLP exporters of an unreachable collector fail right away, without their own retries"""
+        for exporter_type, exporter_url in (
+            ("OTLPGRPC", "http://127.0.0.1:1"),
+            ("OTLPHTTP", "http://127.0.0.1:1/v1/traces"),
+        ):
+            with self.subTest(exporter_type):
+                config = OTIConfig(
+                    exporter_config=ExporterConfig(
+                        exporter_type=exporter_type,
+                        exporter_url=exporter_url,
+                        exporter_timeout_millis=1000,
+                    )
+                )
+                circuit_breaker = CircuitBreaker("test", 2, 60_000, 60_000)
+                span_exporter = ResilientSpanExporter(
+                    SPAN_EXPORTERS.create(exporter_type, config), circuit_breaker
+                )
+                self.addCleanup(span_exporter.shutdown)
+                start = time.monotonic()
+                self.assertIs(span_exporter.export([]), SpanExportResult.FAILURE)
+                self.assertEqual(circuit_breaker.failures, 1)
+                metric_exporter = ResilientMetricExporter(
+                    METRIC_EXPORTERS.create(exporter_type, config), circuit_breaker
+                )
+                self.addCleanup(metric_exporter.shutdown)
+                self.assertIs(
+                    metric_exporter.export(MetricsData(resource_metrics=[])),
+                    MetricExportResult.FAILURE,
+                )
+                self.assertEqual(circuit_breaker.state, OPEN)
+                # The delegate exporters would retry for about a minute
+                self.assertLess(time.monotonic() - start, 5)
+
+    def test_split_metrics(self) -> None:
+        """The single attempt of the gRPC metric exporter sends the batches of its `max_export_batch_size`"""
+        metric_reader = InMemoryMetricReader()
+        meter_provider = MeterProvider(metric_readers=[metric_reader])
+        self.addCleanup(meter_provider.shutdown)
+        counter = meter_provider.get_meter(__name__).create_counter("requests")
+        for route in ("/a", "/b", "/c"):
+            counter.add(1, {"http.route": route})
+        metrics_data = metric_reader.get_metrics_data()
+
+        metric_exporter = GRPCMetricExporter(
+            endpoint="http://127.0.0.1:1", insecure=True, max_export_batch_size=1
+        )
+        self.addCleanup(metric_exporter.shutdown)
+        with mock.patch(
+            "oti.grpc_channel.export_serialized", return_value=True
+        ) as export_serialized:
+            resilient_exporter = ResilientMetricExporter(
+                metric_exporter, CircuitBreaker("test", 1, 1000, 1000)
+            )
+            self.assertIs(
+                resilient_exporter.export(metrics_data), MetricExportResult.SUCCESS
+            )
+        self.assertEqual(export_serialized.call_count, 3)
+
+    def test_sdk_private_interface(self) -> None:
+        """The private attributes of the SDK exporters that the single attempt exports use still exist"""
+        # pylint: disable=protected-access
+        grpc_span_exporter = GRPCSpanExporter(endpoint="http://127.0.0.1:1")
+        grpc_metric_exporter = GRPCMetricExporter(endpoint="http://127.0.0.1:1")
+        http_span_exporter = HTTPSpanExporter(endpoint="http://127.0.0.1:1")
+        http_metric_exporter = HTTPMetricExporter(endpoint="http://127.0.0.1:1")
+        for exporter in (
+            grpc_span_exporter,
+            grpc_metric_exporter,
+            http_span_exporter,
+            http_metric_exporter,
+        ):
+            self.addCleanup(exporter.shutdown)
+            with self.subTest(type(exporter).__module__):
+                self.assertIsNotNone(get_single_attempt_export(exporter))
+        for exporter in (grpc_span_exporter, grpc_metric_exporter):
+            self.assertTrue(callable(exporter._client.Export))
+            self.assertTrue(callable(exporter._translate_data))
+            self.assertFalse(exporter._shutdown)
+        self.assertIsNone(grpc_metric_exporter._max_export_batch_size)
+        self.assertTrue(callable(grpc_metric_exporter._split_metrics_data))
+        for exporter in (http_span_exporter, http_metric_exporter):
+            self.assertTrue(callable(exporter._export))
+            self.assertTrue(callable(exporter._session.post))
+        self.assertTrue(callable(http_span_exporter._serialize_spans))
+        self.assertFalse(http_span_exporter._shutdown)
@@ -0,0 +1,227 @@
+"""Test the samplers module"""
+
+import json
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+from opentelemetry.sdk.trace.sampling import (
+    ALWAYS_OFF,
+    ALWAYS_ON,
+    Decision,
+    ParentBased,
+)
+from opentelemetry.trace import SpanKind
+from oti import OTI, OTIConfig, SamplingConfig
+from oti.config import OTIConfigError
+from oti.samplers import (
+    RateLimitingSampler,
+    AdaptiveRateLimitingSampler,
+    ReconfigurableSampler,
+    RuleBasedSampler,
+    load_sampling_rules,
+)
+
+
+def count_sampled(sampler, count, name="span", kind=SpanKind.INTERNAL, attributes=None):
+    """Ask the sampler about `count` random trace IDs, and return the number of the sampled ones"""
+    return sum(
+        sampler.should_sample(
+            None, random.getrandbits(128), name, kind, attributes
+        ).decision
+        is Decision.RECORD_AND_SAMPLE
+        for _ in range(count)
+    )
+
+
+class RateLimitingSamplerTestCase(unittest.TestCase):
+    """The RateLimitingSampler test cases"""
+
+    def test_limits_rate(self) -> None:
+        """The sampler samples at most the budget of spans per second"""
+        with mock.patch("oti.samplers.monotonic", return_value=100.0):
+            sampler = RateLimitingSampler(10)
+            self.assertEqual(count_sampled(sampler, 100), 10)
+        with mock.patch("oti.samplers.monotonic", return_value=100.5):
+            self.assertEqual(count_sampled(sampler, 100), 5)
+
+    def test_zero_budget(self) -> None:
+        """The sampler with zero budget samples nothing, not even the first span"""
+        with mock.patch("oti.samplers.monotonic", return_value=100.0):
+            sampler = RateLimitingSampler(0)
+            self.assertEqual(count_sampled(sampler, 100), 0)
+        with mock.patch("oti.samplers.monotonic", return_value=200.0):
+            self.assertEqual(count_sampled(sampler, 100), 0)
+
+    def test_fractional_budget(self) -> None:
+        """The sampler with a budget below one span per second samples one span per interval"""
+        with mock.patch("oti.samplers.monotonic", return_value=100.0):
+            sampler = RateLimitingSampler(0.5)
+            self.assertEqual(count_sampled(sampler, 10), 1)
+        with mock.patch("oti.samplers.monotonic", return_value=102.0):
+            self.assertEqual(count_sampled(sampler, 10), 1)
+
+
+class AdaptiveRateLimitingSamplerTestCase(unittest.TestCase):
+    """The AdaptiveRateLimitingSampler test cases"""
+
+    def test_adapts_ratio(self) -> None:
+        """The sampling ratio follows the throughput measured in the previous window"""
+        with mock.patch("oti.samplers.monotonic", return_value=0.0):
+            sampler = AdaptiveRateLimitingSampler(100)
+            self.assertEqual(count_sampled(sampler, 999), 999)
+        with mock.patch("oti.samplers.monotonic", return_value=1.0):
+            count_sampled(sampler, 1)
+        self.assertAlmostEqual(sampler.ratio, 0.1)
+        with mock.patch("oti.samplers.monotonic", return_value=1.5):
+            sampled = count_sampled(sampler, 10000)
+        self.assertAlmostEqual(sampled / 10000, 0.1, delta=0.02)
+
+        with mock.patch("oti.samplers.monotonic", return_value=2.0):
+            count_sampled(sampler, 1)
+        self.assertLess(sampler.ratio, 0.1)
+
+        for now in range(3, 12):
+            with mock.patch("oti.samplers.monotonic", return_value=float(now)):
+                count_sampled(sampler, 1)
+        self.assertEqual(sampler.ratio, 1.0)
+
+
+class ReconfigurableSamplerTestCase(unittest.TestCase):
+    """The ReconfigurableSampler test cases"""
+
+    def test_replace_sampler(self) -> None:
+        """The spans are sampled by the delegate sampler that is set at the time"""
+        sampler = ReconfigurableSampler(ALWAYS_OFF)
+        self.assertEqual(count_sampled(sampler, 10), 0)
+        sampler.sampler = ALWAYS_ON
+        self.assertEqual(count_sampled(sampler, 10), 10)
+        self.assertEqual(sampler.get_description(), ALWAYS_ON.get_description())
+
+
+RULES = [
+    {"name": "GET /health", "ratio": 0},
+    {"name_regex": "GET /internal/.*", "kind": "SERVER", "ratio": 0},
+    {"attributes": {"http.route": "/checkout"}, "ratio": 1},
+    {"attribute_regexes": {"messaging.destination": "orders-.*"}, "rate_limit": 10},
+]
+
+
+class RuleBasedSamplerTestCase(unittest.TestCase):
+    """The RuleBasedSampler test cases"""
+
+    def setUp(self):
+        """Create the sampler of the rules, that samples the other spans at 5%"""
+        self.sampler = RuleBasedSampler(RULES, 0.05)
+
+    def test_rules(self) -> None:
+        """The spans are sampled by the first rule they match"""
+        self.assertEqual(count_sampled(self.sampler, 1000, "GET /health"), 0)
+        self.assertEqual(
+            count_sampled(
+                self.sampler,
+                1000,
+                "GET /health",
+                attributes={"http.route": "/checkout"},
+            ),
+            0,
+        )
+        self.assertEqual(
+            count_sampled(
+                self.sampler,
+                1000,
+                "POST /checkout",
+                attributes={"http.route": "/checkout"},
+            ),
+            1000,
+        )
+        self.assertEqual(
+            count_sampled(self.sampler, 1000, "GET /internal/metrics", SpanKind.SERVER),
+            0,
+        )
+        self.assertGreater(
+            count_sampled(self.sampler, 1000, "GET /internal/metrics", SpanKind.CLIENT),
+            0,
+        )
+        with mock.patch("oti.samplers.monotonic", return_value=100.0):
+            self.assertEqual(
+                count_sampled(
+                    RuleBasedSampler(RULES, 0.05),
+                    100,
+                    "publish",
+                    attributes={"messaging.destination": "orders-eu"},
+                ),
+                10,
+            )
+
+    def test_default_ratio(self) -> None:
+        """The spans that match no rule are sampled by the default ratio"""
+        sampled = count_sampled(self.sampler, 10000, "GET /products")
+        self.assertGreater(sampled, 300)
+        self.assertLess(sampled, 700)
+
+    def test_compiled_steps(self) -> None:
+        """The rules of a name and kind are compiled once, the exact attribute values into a dict lookup"""
+        self.sampler.should_sample(None, 1, "GET /health", SpanKind.SERVER)
+        # The exact name rule matches every span of the name, the other rules are never checked
+        self.assertEqual(
+            self.sampler.cache[("GET /health", SpanKind.SERVER)],
+            (self.sampler.rules[0],),
+        )
+        sampler = RuleBasedSampler(
+            [
+                {"attributes": {"http.route": f"/{index}"}, "ratio": 1}
+                for index in range(500)
+            ]
+            + [{"attributes": {"http.route": "/0"}, "ratio": 0}],
+            0.0,
+        )
+        for index in (0, 250, 499):
+            self.assertIs(
+                sampler.find_rule("GET", SpanKind.SERVER, {"http.route": f"/{index}"}),
+                sampler.rules[index],
+            )
+        self.assertIs(
+            sampler.find_rule("GET", SpanKind.SERVER, {"http.route": ["/0"]}),
+            sampler.default_rule,
+        )
+        lookup, default_rule = sampler.cache[("GET", SpanKind.SERVER)]
+        self.assertEqual(len(lookup.rules_by_value), 500)
+        self.assertIs(default_rule, sampler.default_rule)
+
+    def test_invalid_rules(self) -> None:
+        """The invalid rules are rejected when the sampler is created"""
+        for rules in (
+            [{"name": "a"}],
+            [{"name": "a", "ratio": 1, "rate_limit": 1}],
+            [{"name_regex": "(", "ratio": 1}],
+            [{"kind": "UNKNOWN", "ratio": 1}],
+            [{"span_name": "a", "ratio": 1}],
+        ):
+            with self.assertRaises(OTIConfigError):
+                RuleBasedSampler(rules, 1.0)
+        with self.assertRaises(OTIConfigError):
+            load_sampling_rules('{"name": "a"}')
+
+    def test_rules_file(self) -> None:
+        """The rules are loaded from a JSON file by the RULES sampling types"""
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+            json.dump(RULES, file)
+        self.addCleanup(os.remove, file.name)
+        instance = OTI(
+            OTIConfig(
+                metric_exporter_mode_config="DISABLED",
+                sampling_config=SamplingConfig(
+                    "PARENTBASED_RULES", 0.05, trace_sampling_rules_file=file.name
+                ),
+            )
+        )
+        try:
+            self.assertIsInstance(instance.sampler.sampler, ParentBased)
+            instance.reconfigure(
+                SamplingConfig("RULES", 0.05, trace_sampling_rules=json.dumps(RULES))
+            )
+            self.assertEqual(len(instance.sampler.sampler.rules), len(RULES))
+        finally:
+            instance.shutdown()
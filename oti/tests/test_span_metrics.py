@@ -0,0 +1,120 @@
+"""Test the span_metrics module"""
+
+import unittest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from oti import OTI, OTIConfig, SpanMetricsConfig
+from oti.samplers import ReconfigurableSampler
+from oti.span_metrics import SpanMetricsProcessor
+
+
+def get_data_points(metric_reader):
+    """Get the data points of the collected metrics by the metric names"""
+    return {
+        metric.name: list(metric.data.data_points)
+        for resource_metrics in metric_reader.get_metrics_data().resource_metrics
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics
+    }
+
+
+class SpanMetricsProcessorTestCase(unittest.TestCase):
+    """The SpanMetricsProcessor test cases"""
+
+    def setUp(self):
+        """Create a tracer provider that records the unsampled spans into the span metrics"""
+        self.metric_reader = InMemoryMetricReader()
+        meter_provider = MeterProvider(metric_readers=[self.metric_reader])
+        self.addCleanup(meter_provider.shutdown)
+        self.processor = SpanMetricsProcessor(["http.route"])
+        self.processor.bind(meter_provider.get_meter(__name__))
+        self.span_exporter = InMemorySpanExporter()
+        self.tracer_provider = TracerProvider(
+            ReconfigurableSampler(TraceIdRatioBased(0.01), record_unsampled=True)
+        )
+        self.tracer_provider.add_span_processor(SimpleSpanProcessor(self.span_exporter))
+        self.tracer_provider.add_span_processor(self.processor)
+        self.addCleanup(self.tracer_provider.shutdown)
+
+    def test_every_span_is_counted(self) -> None:
+        """The unsampled spans are counted, but only the sampled ones are exported"""
+        # pylint: disable=not-context-manager
+        tracer = self.tracer_provider.get_tracer(__name__)
+        for index in range(1000):
+            with tracer.start_as_current_span(
+                "GET /users",
+                kind=SpanKind.SERVER,
+                attributes={"http.route": "/users", "user.id": index},
+            ) as span:
+                if index % 10 == 0:
+                    span.set_status(Status(StatusCode.ERROR))
+        self.assertLess(len(self.span_exporter.get_finished_spans()), 100)
+
+        data_points = get_data_points(self.metric_reader)
+        calls = {
+            point.attributes["status.code"]: point.value
+            for point in data_points["span.calls"]
+        }
+        self.assertEqual(calls, {"ERROR": 100, "UNSET": 900})
+        (errors,) = data_points["span.errors"]
+        self.assertEqual(errors.value, 100)
+        self.assertEqual(
+            dict(errors.attributes),
+            {
+                "span.name": "GET /users",
+                "span.kind": "SERVER",
+                "status.code": "ERROR",
+                "http.route": "/users",
+            },
+        )
+        self.assertEqual(
+            sum(point.count for point in data_points["span.duration"]), 1000
+        )
+        self.assertEqual(len(self.processor.series), 2)
+
+    def test_missing_attributes(self) -> None:
+        """The configured attributes the span does not have are left out"""
+        self.tracer_provider.get_tracer(__name__).start_span("work").end()
+        (point,) = get_data_points(self.metric_reader)["span.calls"]
+        self.assertEqual(
+            dict(point.attributes),
+            {"span.name": "work", "span.kind": "INTERNAL", "status.code": "UNSET"},
+        )
+
+    def test_not_recorded_without_span_metrics(self) -> None:
+        """The unsampled spans are not recorded by default"""
+        sampler = ReconfigurableSampler(ALWAYS_OFF)
+        tracer = TracerProvider(sampler).get_tracer(__name__)
+        self.assertFalse(tracer.start_span("work").is_recording())
+        sampler.record_unsampled = True
+        span = tracer.start_span("work", attributes={"a": 1})
+        self.assertTrue(span.is_recording())
+        self.assertFalse(span.get_span_context().trace_flags.sampled)
+        self.assertEqual(span.attributes["a"], 1)
+
+    def test_enabled_by_config(self) -> None:
+        """The span metrics processor is added to the tracer provider if it is enabled"""
+        instance = OTI(
+            OTIConfig(
+                metric_exporter_mode_config="DISABLED",
+                span_metrics_config=SpanMetricsConfig(
+                    enabled=True, attribute_keys="http.route, rpc.method"
+                ),
+            )
+        )
+        try:
+            self.assertEqual(
+                instance.span_metrics_processor.attribute_keys,
+                ("http.route", "rpc.method"),
+            )
+            self.assertTrue(instance.sampler.record_unsampled)
+            self.assertIsNotNone(instance.span_metrics_processor.calls)
+        finally:
+            instance.shutdown()
@@ -0,0 +1,146 @@
+"""Test the spool module"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (  # pylint: disable=no-name-in-module
+    ExportTraceServiceRequest,
+)
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from oti import OTI, OTIConfig
+from oti.config import OTIConfigError, SpoolConfig
+from oti.spool import Spool, SpoolingSpanExporter, get_serialized_sender
+
+
+class FlakySpanExporter(SpanExporter):
+    """Span exporter that fails while the collector is down, and records the replayed requests"""
+
+    def __init__(self):
+        """Constructor of the flaky span exporter"""
+        self.collector_up = False
+        self.exported = []
+        self.replayed = []
+        self.replay_done = threading.Event()
+
+    def export(self, spans):
+        """Export the spans if the collector is up"""
+        if not self.collector_up:
+            return SpanExportResult.FAILURE
+        self.exported.extend(spans)
+        return SpanExportResult.SUCCESS
+
+    def export_serialized(self, body):
+        """Record the replayed request"""
+        self.replayed.append(ExportTraceServiceRequest.FromString(body))
+        self.replay_done.set()
+        return True
+
+    def shutdown(self):
+        """Shut down the exporter"""
+
+
+class SpoolTestCase(unittest.TestCase):
+    """The spool test cases"""
+
+    def setUp(self):
+        """Create the spool directory"""
+        self.spool_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the spool directory"""
+        shutil.rmtree(self.spool_dir)
+
+    def test_replay_after_restart(self) -> None:
+        """The spooled requests are replayed in order after the spool is reopened"""
+        spool = Spool(self.spool_dir, max_bytes=4096, segment_bytes=1024)
+        for index in range(20):
+            self.assertTrue(spool.append(f"request-{index:02d};".encode()))
+        spool.close()
+
+        spool = Spool(self.spool_dir, max_bytes=4096, segment_bytes=1024)
+        self.assertFalse(spool.is_empty())
+        bodies = []
+        self.assertTrue(spool.replay(lambda body: bodies.append(body) or True, 64))
+        self.assertEqual(
+            b"".join(bodies), b"".join(f"request-{i:02d};".encode() for i in range(20))
+        )
+        self.assertGreater(len(bodies), 1)
+        self.assertTrue(spool.is_empty())
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_acknowledged_batches(self) -> None:
+        """The acknowledged batches are not replayed again after a failed replay"""
+        spool = Spool(self.spool_dir, max_bytes=4096, segment_bytes=1024)
+        for index in range(4):
+            spool.append(f"request-{index};".encode())
+        results = iter([True, False])
+        bodies = []
+        self.assertFalse(
+            spool.replay(lambda body: bodies.append(body) or next(results), 20)
+        )
+        self.assertEqual(bodies, [b"request-0;request-1;", b"request-2;request-3;"])
+
+        bodies.clear()
+        self.assertTrue(spool.replay(lambda body: bodies.append(body) or True, 20))
+        self.assertEqual(bodies, [b"request-2;request-3;"])
+
+    def test_eviction(self) -> None:
+        """The oldest segments are evicted when the spool is full"""
+        spool = Spool(self.spool_dir, max_bytes=512, segment_bytes=256)
+        for _ in range(20):
+            spool.append(b"x" * 100)
+        self.assertEqual(len(os.listdir(self.spool_dir)), 2)
+        self.assertGreater(spool.evicted_segments, 0)
+        self.assertFalse(spool.append(b"x" * 256))
+
+    def test_spooling_span_exporter(self) -> None:
+        """The spans of the failed exports are replayed after the exporter succeeds again"""
+        exporter = FlakySpanExporter()
+        spooling_exporter = SpoolingSpanExporter(
+            exporter,
+            Spool(self.spool_dir, max_bytes=1 << 20, segment_bytes=1 << 16),
+            replay_interval_millis=60_000,
+            replay_batch_bytes=1 << 20,
+        )
+        tracer_provider = TracerProvider(ALWAYS_ON)
+        tracer_provider.add_span_processor(SimpleSpanProcessor(spooling_exporter))
+        tracer = tracer_provider.get_tracer(__name__)
+
+        for _ in range(3):
+            tracer.start_span("spooled").end()
+        exporter.collector_up = True
+        tracer.start_span("exported").end()
+
+        self.assertTrue(exporter.replay_done.wait(5))
+        tracer_provider.shutdown()
+        self.assertEqual([span.name for span in exporter.exported], ["exported"])
+        self.assertEqual(len(exporter.replayed), 1)
+        replayed_spans = [
+            span.name
+            for resource_spans in exporter.replayed[0].resource_spans
+            for scope_spans in resource_spans.scope_spans
+            for span in scope_spans.spans
+        ]
+        self.assertEqual(replayed_spans, ["spooled"] * 3)
+
+    def test_simple_span_processor(self) -> None:
+        """The spool is rejected with the SIMPLE span processor, that exports in the threads of the application"""
+        config = OTIConfig(
+            span_processor_type="SIMPLE",
+            spool_config=SpoolConfig(enabled=True, spool_dir=self.spool_dir),
+        )
+        with self.assertRaises(OTIConfigError):
+            OTI(config)
+
+    def test_unsupported_exporter(self) -> None:
+        """The exporters that can not send serialized requests are rejected"""
+        with self.assertRaises(OTIConfigError):
+            get_serialized_sender(object())
@@ -0,0 +1,209 @@
+"""Test the telemetry module"""
+
+import threading
+import unittest
+from collections import deque
+from unittest import mock
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader, MetricExportResult
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from oti.processors import FanOutSpanProcessor, TailSamplingSpanProcessor
+from oti.telemetry import (
+    InstrumentedMetricExporter,
+    InstrumentedSpanExporter,
+    InstrumentedSpanProcessor,
+    PipelineTelemetry,
+)
+
+
+class FailingSpanExporter(SpanExporter):
+    """Span exporter that always fails"""
+
+    def export(self, spans):
+        """Fail to export the spans"""
+        return SpanExportResult.FAILURE
+
+    def shutdown(self):
+        """Shut down the exporter"""
+
+
+class QueueingSpanProcessor(SimpleSpanProcessor):
+    """Span processor with a bounded queue, that is never drained"""
+
+    def __init__(self, max_queue_size):
+        """Constructor of the queueing span processor"""
+        super().__init__(InMemorySpanExporter())
+        self.max_queue_size = max_queue_size
+        self.queue = deque(maxlen=max_queue_size)
+
+    def on_end(self, span):
+        """Queue the span, dropping the oldest one if the queue is full"""
+        self.queue.appendleft(span)
+
+
+class PipelineTelemetryTestCase(unittest.TestCase):
+    """The pipeline telemetry test cases"""
+
+    def setUp(self):
+        """Create the telemetry bound to an in-memory metric reader"""
+        self.metric_reader = InMemoryMetricReader()
+        self.meter_provider = MeterProvider(metric_readers=[self.metric_reader])
+        self.telemetry = PipelineTelemetry()
+        self.telemetry.bind(self.meter_provider.get_meter(__name__))
+
+    def tearDown(self):
+        """Shut down the meter provider"""
+        self.meter_provider.shutdown()
+
+    def collect(self):
+        """Collect the data points of the telemetry by metric name"""
+        data_points = {}
+        metrics_data = self.metric_reader.get_metrics_data()
+        for resource_metrics in metrics_data.resource_metrics:
+            for scope_metrics in resource_metrics.scope_metrics:
+                for metric in scope_metrics.metrics:
+                    data_points[metric.name] = list(metric.data.data_points)
+        return data_points
+
+    def create_tracer(self, span_processor):
+        """Create a tracer that passes the spans to the `span_processor`"""
+        tracer_provider = TracerProvider(ALWAYS_ON)
+        tracer_provider.add_span_processor(span_processor)
+        return tracer_provider.get_tracer(__name__)
+
+    def test_span_exports(self) -> None:
+        """The batch size, latency and exported spans are recorded per export"""
+        span_exporter = InMemorySpanExporter()
+        tracer = self.create_tracer(
+            SimpleSpanProcessor(InstrumentedSpanExporter(span_exporter, self.telemetry))
+        )
+        for _ in range(3):
+            tracer.start_span("work").end()
+
+        data_points = self.collect()
+        self.assertEqual(len(span_exporter.get_finished_spans()), 3)
+        (batch_size,) = data_points["oti.exporter.batch.size"]
+        self.assertEqual((batch_size.count, batch_size.sum), (3, 3))
+        self.assertEqual(batch_size.attributes, {"signal": "traces"})
+        self.assertEqual(data_points["oti.exporter.export.duration"][0].count, 3)
+        self.assertEqual(data_points["oti.exporter.exported"][0].value, 3)
+        self.assertNotIn("oti.exporter.export.failures", data_points)
+
+    def test_failed_exports(self) -> None:
+        """The failed exports and the spans they lose are counted"""
+        span_exporter = InstrumentedSpanExporter(FailingSpanExporter(), self.telemetry)
+        tracer = self.create_tracer(SimpleSpanProcessor(span_exporter))
+        tracer.start_span("work").end()
+        tracer.start_span("work").end()
+
+        data_points = self.collect()
+        self.assertEqual(data_points["oti.exporter.export.failures"][0].value, 2)
+        self.assertEqual(data_points["oti.exporter.dropped"][0].value, 2)
+        self.assertNotIn("oti.exporter.exported", data_points)
+
+    def test_queue_size_and_dropped_spans(self) -> None:
+        """The queue size and the spans dropped by the full queue are observed at collection"""
+        span_processor = self.telemetry.instrument_span_processor(
+            QueueingSpanProcessor(max_queue_size=4)
+        )
+        self.assertIsInstance(span_processor, InstrumentedSpanProcessor)
+        tracer = self.create_tracer(span_processor)
+        for _ in range(6):
+            tracer.start_span("work").end()
+
+        data_points = self.collect()
+        self.assertEqual(data_points["oti.span_processor.queue.size"][0].value, 4)
+        self.assertEqual(data_points["oti.span_processor.dropped"][0].value, 2)
+
+    def test_concurrent_dropped_spans(self) -> None:
+        """The spans dropped concurrently by several threads are all counted"""
+        span_processor = self.telemetry.instrument_span_processor(
+            QueueingSpanProcessor(max_queue_size=4)
+        )
+        tracer = self.create_tracer(span_processor)
+        for _ in range(4):
+            tracer.start_span("work").end()
+
+        def end_spans():
+            for _ in range(1000):
+                tracer.start_span("work").end()
+
+        threads = [threading.Thread(target=end_spans) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        data_points = self.collect()
+        self.assertEqual(data_points["oti.span_processor.dropped"][0].value, 8000)
+
+    def test_fan_out_dropped_spans(self) -> None:
+        """The spans dropped by the full dispatch queue of the fan-out processor are logged and observed"""
+        fan_out_processor = FanOutSpanProcessor(
+            [SimpleSpanProcessor(InMemorySpanExporter())], max_queue_size=4
+        )
+        self.addCleanup(fan_out_processor.shutdown)
+        span_processor = self.telemetry.instrument_span_processor(fan_out_processor)
+        tracer = self.create_tracer(span_processor)
+        # The dispatcher can not drain the queue while the dispatch lock is held
+        with fan_out_processor.dispatch_lock:
+            with self.assertLogs("oti.processors", "WARNING"):
+                for _ in range(6):
+                    tracer.start_span("work").end()
+            data_points = self.collect()
+        fan_out_attributes = {"signal": "traces", "span_processor": "fan_out"}
+        (queue_size,) = [
+            point
+            for point in data_points["oti.span_processor.queue.size"]
+            if point.attributes == fan_out_attributes
+        ]
+        self.assertEqual(queue_size.value, 4)
+        (dropped,) = [
+            point
+            for point in data_points["oti.span_processor.dropped"]
+            if point.attributes == fan_out_attributes
+        ]
+        self.assertEqual(dropped.value, 2)
+
+    def test_tail_sampling_downstream(self) -> None:
+        """The downstream processor of the tail sampling processor is instrumented"""
+        downstream = QueueingSpanProcessor(max_queue_size=4)
+        span_processor = self.telemetry.instrument_span_processor(
+            TailSamplingSpanProcessor(
+                downstream,
+                decision_wait_millis=30000,
+                max_buffered_spans=100,
+                latency_threshold_millis=1000,
+                sampling_ratio=1.0,
+            )
+        )
+        self.assertIsInstance(span_processor, TailSamplingSpanProcessor)
+        self.assertIs(span_processor.downstream.processor, downstream)
+
+    def test_metric_exports(self) -> None:
+        """The exported data points are counted"""
+        metric_reader = InMemoryMetricReader()
+        meter_provider = MeterProvider(metric_readers=[metric_reader])
+        counter = meter_provider.get_meter(__name__).create_counter("work")
+        counter.add(1, {"kind": "a"})
+        counter.add(1, {"kind": "b"})
+        delegate = mock.Mock(_preferred_temporality={}, _preferred_aggregation={})
+        delegate.export.return_value = MetricExportResult.SUCCESS
+        metric_exporter = InstrumentedMetricExporter(delegate, self.telemetry)
+        metric_exporter.export(metric_reader.get_metrics_data())
+        meter_provider.shutdown()
+
+        data_points = self.collect()
+        self.assertEqual(data_points["oti.exporter.exported"][0].value, 2)
+        self.assertEqual(
+            data_points["oti.exporter.exported"][0].attributes, {"signal": "metrics"}
+        )
@@ -0,0 +1,194 @@
+"""Test the tracing module"""
+
+import asyncio
+import time
+import unittest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON
+from opentelemetry.trace import StatusCode
+from oti.tracing import TracedSpan, traced
+
+
+class TracingTestCase(unittest.TestCase):
+    """The traced decorator and the traced span test cases"""
+
+    def setUp(self):
+        """Create a tracer provider that keeps the spans in memory"""
+        self.span_exporter = InMemorySpanExporter()
+        self.tracer_provider = TracerProvider(ALWAYS_ON)
+        self.tracer_provider.add_span_processor(SimpleSpanProcessor(self.span_exporter))
+        self.addCleanup(self.tracer_provider.shutdown)
+
+    def get_tracer(self, module_name):
+        """Get the tracer of the module"""
+        return self.tracer_provider.get_tracer(module_name)
+
+    def test_function(self) -> None:
+        """The function runs in the current span, that is named after the function"""
+
+        @traced(self.get_tracer, attributes={"job": "test"})
+        def add(first, second):
+            return first + second, trace.get_current_span()
+
+        result, current_span = add(1, 2)
+        self.assertEqual(result, 3)
+        spans = self.span_exporter.get_finished_spans()
+        self.assertEqual(len(spans), 1)
+        span = spans[0]
+        self.assertEqual(span.name, "TracingTestCase.test_function.<locals>.add")
+        self.assertEqual(span.instrumentation_scope.name, __name__)
+        self.assertEqual(span.attributes["job"], "test")
+        self.assertEqual(current_span.get_span_context(), span.context)
+        self.assertFalse(trace.get_current_span().is_recording())
+
+    def test_nested(self) -> None:
+        """The spans of the nested calls are the children of the span of the caller"""
+
+        @traced(self.get_tracer, "inner")
+        def inner():
+            pass
+
+        @traced(self.get_tracer, "outer")
+        def outer():
+            inner()
+
+        outer()
+        spans = self.span_exporter.get_finished_spans()
+        self.assertEqual(len(spans), 2)
+        child, parent = spans[0], spans[1]
+        self.assertEqual(child.name, "inner")
+        self.assertEqual(child.parent.span_id, parent.context.span_id)
+
+    def test_exception(self) -> None:
+        """The exceptions are recorded only if it is enabled"""
+
+        @traced(self.get_tracer, "recorded")
+        def recorded():
+            raise ValueError("recorded")
+
+        @traced(self.get_tracer, "ignored", record_exception=False)
+        def ignored():
+            raise ValueError("ignored")
+
+        with self.assertRaises(ValueError):
+            recorded()
+        with self.assertRaises(ValueError):
+            ignored()
+        spans = self.span_exporter.get_finished_spans()
+        self.assertEqual(len(spans), 2)
+        recorded_span, ignored_span = spans[0], spans[1]
+        self.assertEqual(recorded_span.status.status_code, StatusCode.ERROR)
+        self.assertEqual(recorded_span.events[0].name, "exception")
+        self.assertEqual(ignored_span.status.status_code, StatusCode.UNSET)
+        self.assertFalse(ignored_span.events)
+
+    def test_attribute_factory(self) -> None:
+        """The attribute factory is called with the arguments, only if the span is recording"""
+        calls = []
+
+        def get_attributes(user_id):
+            calls.append(user_id)
+            return {"user.id": user_id}
+
+        @traced(self.get_tracer, "handle", attributes=get_attributes)
+        def handle(user_id):
+            return user_id
+
+        handle(42)
+        self.assertEqual(
+            self.span_exporter.get_finished_spans()[0].attributes["user.id"], 42
+        )
+
+        unsampled_tracer_provider = TracerProvider(ALWAYS_OFF)
+        unsampled = traced(
+            unsampled_tracer_provider.get_tracer, "handle", attributes=get_attributes
+        )(lambda user_id: user_id)
+        self.assertEqual(unsampled(43), 43)
+        self.assertEqual(calls, [42])
+
+    def test_coroutine_function(self) -> None:
+        """The coroutine runs in the span"""
+
+        @traced(self.get_tracer, "fetch")
+        async def fetch():
+            await asyncio.sleep(0)
+            return trace.get_current_span()
+
+        current_span = asyncio.run(fetch())
+        spans = self.span_exporter.get_finished_spans()
+        self.assertEqual(len(spans), 1)
+        span = spans[0]
+        self.assertEqual(span.name, "fetch")
+        self.assertEqual(current_span.get_span_context(), span.context)
+
+    def test_generator_function(self) -> None:
+        """The span is current only while the generator runs, and it ends when the generator is closed"""
+
+        @traced(self.get_tracer, "rows")
+        def rows():
+            for index in range(3):
+                yield index, trace.get_current_span()
+
+        items = rows()
+        index, current_span = next(items)
+        self.assertEqual(index, 0)
+        self.assertTrue(current_span.is_recording())
+        self.assertFalse(trace.get_current_span().is_recording())
+        self.assertEqual([index for index, _ in items], [1, 2])
+
+        items = rows()
+        next(items)
+        items.close()
+        spans = self.span_exporter.get_finished_spans()
+        self.assertEqual(len(spans), 2)
+        first, second = spans[0], spans[1]
+        self.assertEqual(first.context, current_span.get_span_context())
+        self.assertEqual(second.status.status_code, StatusCode.UNSET)
+
+    def test_async_generator_function(self) -> None:
+        """The async generator functions are rejected"""
+
+        async def rows():
+            yield 1
+
+        with self.assertRaises(TypeError):
+            traced(self.get_tracer)(rows)
+
+    def test_traced_span(self) -> None:
+        """The traced span is a sync and async context manager"""
+        tracer = self.get_tracer(__name__)
+        with TracedSpan(
+            tracer, "sync", trace.SpanKind.INTERNAL, {"a": 1}, True
+        ) as span:
+            self.assertIs(trace.get_current_span(), span)
+
+        async def run():
+            async with TracedSpan(
+                tracer, "async", trace.SpanKind.CLIENT, None, True
+            ) as span:
+                raise ValueError(span)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+        spans = self.span_exporter.get_finished_spans()
+        self.assertEqual(len(spans), 2)
+        sync_span, async_span = spans[0], spans[1]
+        self.assertEqual(sync_span.attributes["a"], 1)
+        self.assertEqual(async_span.kind, trace.SpanKind.CLIENT)
+        self.assertEqual(async_span.status.status_code, StatusCode.ERROR)
+
+    def test_traced_span_started_on_enter(self) -> None:
+        """The span of the traced span starts when its block is entered"""
+        traced_span = TracedSpan(
+            self.get_tracer(__name__), "late", trace.SpanKind.INTERNAL, None, True
+        )
+        self.assertIsNone(traced_span.span)
+        entered_ns = time.time_ns()
+        with traced_span as span:
+            self.assertGreaterEqual(span.start_time, entered_ns)
+        self.assertEqual(len(self.span_exporter.get_finished_spans()), 1)
@@ -0,0 +1,179 @@
+"""Test the views module"""
+
+import unittest
+from opentelemetry.sdk.metrics import Counter, MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    AggregationTemporality,
+    ConsoleMetricExporter,
+    ExponentialHistogramDataPoint,
+    InMemoryMetricReader,
+)
+from oti.config import MetricAggregationConfig, MetricViewsConfig, OTIConfigError
+from oti.views import (
+    OVERFLOW_ATTRIBUTES,
+    create_views,
+    limit_cardinality,
+    set_exporter_preferences,
+)
+
+
+class ViewsTestCase(unittest.TestCase):
+    """The metric views and cardinality limit test cases"""
+
+    def setUp(self):
+        """Reset the metric reader and the meter provider created by the test"""
+        self.metric_reader = None
+        self.meter_provider = None
+
+    def create_meter(self, views_config, metric_reader=None):
+        """Create a meter of a meter provider with the views and the cardinality limits of the config"""
+        self.metric_reader = metric_reader or InMemoryMetricReader()
+        self.meter_provider = MeterProvider(
+            metric_readers=[self.metric_reader], views=create_views(views_config)
+        )
+        self.addCleanup(self.meter_provider.shutdown)
+        limit_cardinality(self.meter_provider, views_config)
+        return self.meter_provider.get_meter(__name__)
+
+    def collect(self):
+        """Collect the data points by metric name"""
+        data_points = {}
+        metrics_data = self.metric_reader.get_metrics_data()
+        for resource_metrics in metrics_data.resource_metrics:
+            for scope_metrics in resource_metrics.scope_metrics:
+                for metric in scope_metrics.metrics:
+                    data_points[metric.name] = list(metric.data.data_points)
+        return data_points
+
+    def test_overflow_series(self) -> None:
+        """The new attribute sets above the limit are recorded into the overflow series"""
+        meter = self.create_meter(MetricViewsConfig(max_series_per_instrument=4))
+        counter = meter.create_counter("requests")
+        for user_id in range(100):
+            counter.add(1, {"user.id": str(user_id)})
+        counter.add(1, {"user.id": "0"})
+
+        data_points = {
+            frozenset(data_point.attributes.items()): data_point.value
+            for data_point in self.collect()["requests"]
+        }
+        self.assertEqual(len(data_points), 4)
+        self.assertEqual(data_points[frozenset({"user.id": "0"}.items())], 2)
+        self.assertEqual(data_points[frozenset(OVERFLOW_ATTRIBUTES.items())], 97)
+
+    def test_overflow_series_delta_temporality(self) -> None:
+        """The limit counts the attribute sets over the lifetime of the process, also with DELTA temporality"""
+        meter = self.create_meter(
+            MetricViewsConfig(max_series_per_instrument=4),
+            InMemoryMetricReader(
+                preferred_temporality={Counter: AggregationTemporality.DELTA}
+            ),
+        )
+        counter = meter.create_counter("requests")
+        for user_id in range(3):
+            counter.add(1, {"user.id": str(user_id)})
+        self.assertEqual(len(self.collect()["requests"]), 3)
+
+        counter.add(1, {"user.id": "0"})
+        counter.add(1, {"user.id": "new"})
+        data_points = {
+            frozenset(data_point.attributes.items()): data_point.value
+            for data_point in self.collect()["requests"]
+        }
+        self.assertEqual(
+            data_points,
+            {
+                frozenset({"user.id": "0"}.items()): 1,
+                frozenset(OVERFLOW_ATTRIBUTES.items()): 1,
+            },
+        )
+
+    def test_attribute_allowlist(self) -> None:
+        """Only the allowed attributes are kept, and the limit applies to the filtered attribute sets"""
+        meter = self.create_meter(
+            MetricViewsConfig(
+                attribute_allowlist="http.*=http.method|http.route",
+                max_series_per_instrument=2,
+            )
+        )
+        histogram = meter.create_histogram("http.server.duration")
+        for user_id in range(10):
+            histogram.record(
+                10, {"http.method": "GET", "http.route": "/", "user.id": str(user_id)}
+            )
+
+        (data_point,) = self.collect()["http.server.duration"]
+        self.assertEqual(
+            data_point.attributes, {"http.method": "GET", "http.route": "/"}
+        )
+        self.assertEqual(data_point.count, 10)
+
+    def test_drop_instruments(self) -> None:
+        """The measurements of the dropped instruments are not exported"""
+        meter = self.create_meter(MetricViewsConfig(drop_instruments="noisy.*"))
+        meter.create_counter("noisy.debug").add(1)
+        meter.create_counter("kept").add(1)
+
+        data_points = self.collect()
+        self.assertNotIn("noisy.debug", data_points)
+        self.assertEqual(data_points["kept"][0].value, 1)
+
+    def test_unlimited(self) -> None:
+        """The cardinality limit is disabled by zero"""
+        meter = self.create_meter(MetricViewsConfig(max_series_per_instrument=0))
+        counter = meter.create_counter("requests")
+        for user_id in range(100):
+            counter.add(1, {"user.id": str(user_id)})
+        self.assertEqual(len(self.collect()["requests"]), 100)
+
+    def test_exponential_histogram_delta_temporality(self) -> None:
+        """The exporter preferences of the aggregation config select the delta exponential histograms"""
+        metric_exporter = set_exporter_preferences(
+            ConsoleMetricExporter(),
+            MetricAggregationConfig(
+                temporality="DELTA",
+                histogram_aggregation="EXPONENTIAL",
+                exponential_histogram_max_size=40,
+            ),
+        )
+        meter = self.create_meter(
+            MetricViewsConfig(),
+            InMemoryMetricReader(
+                preferred_temporality=metric_exporter._preferred_temporality,  # pylint: disable=protected-access
+                preferred_aggregation=metric_exporter._preferred_aggregation,  # pylint: disable=protected-access
+            ),
+        )
+        histogram = meter.create_histogram("latency")
+        up_down_counter = meter.create_up_down_counter("in_flight")
+        for value in range(1, 1001):
+            histogram.record(value)
+        up_down_counter.add(1)
+
+        metrics = {}
+        for resource_metrics in self.metric_reader.get_metrics_data().resource_metrics:
+            for scope_metrics in resource_metrics.scope_metrics:
+                for metric in scope_metrics.metrics:
+                    metrics[metric.name] = metric.data
+        (data_point,) = metrics["latency"].data_points
+        self.assertIsInstance(data_point, ExponentialHistogramDataPoint)
+        self.assertEqual(data_point.count, 1000)
+        self.assertLessEqual(len(data_point.positive.bucket_counts), 40)
+        self.assertEqual(
+            metrics["latency"].aggregation_temporality, AggregationTemporality.DELTA
+        )
+        self.assertEqual(
+            metrics["in_flight"].aggregation_temporality,
+            AggregationTemporality.CUMULATIVE,
+        )
+
+    def test_invalid_aggregation_config(self) -> None:
+        """The unknown instrument kinds, temporalities and aggregations are rejected"""
+        for aggregation_config in (
+            MetricAggregationConfig(temporality="SPAN=DELTA"),
+            MetricAggregationConfig(temporality="COUNTER=SOMETIMES"),
+            MetricAggregationConfig(histogram_aggregation="LINEAR"),
+        ):
+            with self.assertRaises(OTIConfigError):
+                set_exporter_preferences(ConsoleMetricExporter(), aggregation_config)
+        with self.assertRaises(OTIConfigError):
+            MetricAggregationConfig(temporality="SOMETIMES")
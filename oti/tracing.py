@@ -0,0 +1,173 @@
+"""
+Decorator and context manager helpers of the tracing
+
+The `traced()` decorator wraps a function, a coroutine function or a generator function into a span.
+The tracer of the module of the function and the name of the span are looked up once, when the function
+is decorated. The `attributes` of the span are either a dict, or a factory that is called with the arguments
+of the function only if the span is recording, so the unsampled calls do not build the attribute dicts.
+
+The span is set as the current span with `context.attach()` directly, instead of the generator based
+context managers of the OTEL API, so the unsampled call costs little more than starting a non-recording span.
+The span of a generator function is current only while the generator runs, not while the caller consumes its items.
+If the tracer is the no-op tracer of the disabled tracing, the functions are returned undecorated.
+"""
+
+import functools
+import inspect
+from opentelemetry import context
+from opentelemetry.trace import NoOpTracer, SpanKind, set_span_in_context
+
+
+def start_span(
+    tracer, name, kind, attributes, record_exception, args, kwargs
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Start the span, and set its attributes if the `attributes` are a factory and the span is recording"""
+    span = tracer.start_span(
+        name,
+        kind=kind,
+        attributes=None if callable(attributes) else attributes,
+        record_exception=record_exception,
+        set_status_on_exception=record_exception,
+    )
+    if callable(attributes) and span.is_recording():
+        span.set_attributes(attributes(*args, **kwargs))
+    return span
+
+
+def traced(
+    get_tracer,
+    name=None,
+    kind=SpanKind.INTERNAL,
+    attributes=None,
+    record_exception=True,
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Create a decorator that runs the function in a span of the tracer of its module.
+    The span is named after the qualified name of the function, if the `name` is not set.
+    """
+
+    def decorator(function):
+        if inspect.isasyncgenfunction(function):
+            raise TypeError("The async generator functions can not be traced")
+        tracer = get_tracer(function.__module__)
+        if isinstance(tracer, NoOpTracer):
+            # The tracing is disabled, so the function is not wrapped at all
+            return function
+        span_name = name or function.__qualname__
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def coroutine_wrapper(*args, **kwargs):
+                span = start_span(
+                    tracer, span_name, kind, attributes, record_exception, args, kwargs
+                )
+                token = context.attach(set_span_in_context(span))
+                try:
+                    with span:
+                        return await function(*args, **kwargs)
+                finally:
+                    context.detach(token)
+
+            return coroutine_wrapper
+
+        if inspect.isgeneratorfunction(function):
+
+            @functools.wraps(function)
+            def generator_wrapper(*args, **kwargs):
+                span = start_span(
+                    tracer, span_name, kind, attributes, record_exception, args, kwargs
+                )
+                span_context = set_span_in_context(span)
+                with span:
+                    try:
+                        return (
+                            yield from run_generator(
+                                function(*args, **kwargs), span_context
+                            )
+                        )
+                    except GeneratorExit:
+                        # Closing the generator before it is exhausted is not an error
+                        return None
+
+            return generator_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            span = start_span(
+                tracer, span_name, kind, attributes, record_exception, args, kwargs
+            )
+            token = context.attach(set_span_in_context(span))
+            try:
+                with span:
+                    return function(*args, **kwargs)
+            finally:
+                context.detach(token)
+
+        return wrapper
+
+    return decorator
+
+
+def run_generator(generator, span_context):
+    """Run the generator with the span context attached only while the generator runs"""
+    method, argument = generator.send, None
+    while True:
+        token = context.attach(span_context)
+        try:
+            item = method(argument)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            context.detach(token)
+        try:
+            argument = yield item
+            method = generator.send
+        except GeneratorExit:
+            generator.close()
+            raise
+        except BaseException as error:  # pylint: disable=broad-exception-caught
+            # The exceptions thrown into the wrapper are thrown into the generator
+            method, argument = generator.throw, error
+
+
+class TracedSpan:
+    """
+    Sync and async context manager that runs its block in a span.
+    The span is started when the block is entered, not when the context manager is created.
+    """
+
+    def __init__(self, tracer, name, kind, attributes, record_exception):
+        """Constructor of the traced span"""
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.record_exception = record_exception
+        self.span = None
+        self.token = None
+
+    def __enter__(self):
+        """Start the span, start the block in it, and return the span"""
+        self.span = self.tracer.start_span(
+            self.name,
+            kind=self.kind,
+            attributes=self.attributes,
+            record_exception=self.record_exception,
+            set_status_on_exception=self.record_exception,
+        )
+        self.token = context.attach(set_span_in_context(self.span))
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """End the span, recording the exception of the block if it is enabled"""
+        context.detach(self.token)
+        self.span.__exit__(exc_type, exc_value, traceback)
+
+    async def __aenter__(self):
+        """Start the block in the span, and return the span"""
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """End the span, recording the exception of the block if it is enabled"""
+        self.__exit__(exc_type, exc_value, traceback)
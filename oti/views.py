@@ -0,0 +1,236 @@
+"""
+Metric views and cardinality limits
+
+The attribute allow-lists and the dropped instruments of the `MetricViewsConfig` are turned into OTEL SDK views.
+The SDK keeps a separate series for every distinct attribute set of an instrument, without any limit, so the
+`CardinalityLimiter` caps the number of series per instrument in front of the SDK. The measurements with new
+attribute sets above the limit are recorded into a single overflow series with the `otel.metric.overflow=true`
+attribute, so neither the memory of the SDK nor the size of the exported metrics can grow without bound.
+
+The limit counts the attribute sets over the lifetime of the process, whatever the temporality of the readers is:
+the SDK keeps the aggregation of every attribute set it has seen even after the DELTA collections, so forgetting
+the series at the collections would let its memory grow without bound again.
+The limiter checks one dict and one set per measurement, and takes a lock only when a new series is created.
+The measurements of the observable instruments are passed to the SDK by their callbacks directly,
+so only the allow-lists and the drop rules apply to them.
+
+The temporality and the histogram aggregation of the `MetricAggregationConfig` are set as the preferences
+of the periodically exported metric exporters, that the `PeriodicExportingMetricReader` takes over.
+"""
+
+import dataclasses
+import logging
+import threading
+from fnmatch import fnmatchcase
+from opentelemetry.sdk.metrics import (
+    Counter,
+    Histogram,
+    ObservableCounter,
+    ObservableGauge,
+    ObservableUpDownCounter,
+    UpDownCounter,
+    _Gauge,
+)
+from opentelemetry.sdk.metrics.export import AggregationTemporality
+from opentelemetry.sdk.metrics.view import (
+    DropAggregation,
+    ExponentialBucketHistogramAggregation,
+    View,
+)
+from .config import OTIConfigError
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_ATTRIBUTES = {"otel.metric.overflow": True}
+INSTRUMENT_KINDS = {
+    "COUNTER": Counter,
+    "UP_DOWN_COUNTER": UpDownCounter,
+    "HISTOGRAM": Histogram,
+    "GAUGE": _Gauge,
+    "OBSERVABLE_COUNTER": ObservableCounter,
+    "OBSERVABLE_UP_DOWN_COUNTER": ObservableUpDownCounter,
+    "OBSERVABLE_GAUGE": ObservableGauge,
+}
+
+
+def create_views(views_config):
+    """Create the OTEL SDK views of the allow-lists and the dropped instruments"""
+    views = [
+        View(instrument_name=instrument_name, aggregation=DropAggregation())
+        for instrument_name in views_config.drop_instruments
+    ]
+    views.extend(
+        View(instrument_name=instrument_name, attribute_keys=set(attribute_keys))
+        for instrument_name, attribute_keys in views_config.attribute_allowlist.items()
+    )
+    return views
+
+
+def match_instrument_name(patterns, instrument_name):
+    """Get the first of the `patterns` that matches the instrument name, or `None`"""
+    for pattern in patterns:
+        if fnmatchcase(instrument_name, pattern):
+            return pattern
+    return None
+
+
+class InstrumentSeries:  # pylint: disable=too-few-public-methods
+    """The attribute sets of the series of an instrument"""
+
+    def __init__(self, instrument_name, attribute_keys, max_series):
+        """Constructor of the instrument series"""
+        self.instrument_name = instrument_name
+        self.attribute_keys = attribute_keys
+        # One series is kept for the overflow series
+        self.max_series = max_series - 1 if max_series else None
+        self.series = set()
+        self.overflowed = 0
+        self.lock = threading.Lock()
+
+    def limit(self, attributes):
+        """Get the attributes the measurement is recorded with"""
+        if attributes and self.attribute_keys is not None:
+            attributes = {
+                key: value
+                for key, value in attributes.items()
+                if key in self.attribute_keys
+            }
+        if self.max_series is None:
+            return attributes
+        series = frozenset(attributes.items()) if attributes else frozenset()
+        if series in self.series:
+            return attributes
+        with self.lock:
+            if len(self.series) < self.max_series:
+                self.series.add(series)
+                return attributes
+            if series in self.series:
+                return attributes
+            if not self.overflowed:
+                logger.warning(
+                    "The instrument %s reached its limit of %d series, the new attribute sets are recorded"
+                    " into the overflow series",
+                    self.instrument_name,
+                    self.max_series + 1,
+                )
+            self.overflowed += 1
+        return OVERFLOW_ATTRIBUTES
+
+
+class CardinalityLimiter:
+    """
+    Measurement consumer proxy of the meter provider that applies the cardinality limits
+
+    The measurements of the dropped instruments are not passed to the SDK at all.
+    """
+
+    def __init__(self, consumer, views_config):
+        """Constructor of the cardinality limiter"""
+        self.consumer = consumer
+        self.views_config = views_config
+        self.instruments = {}
+        self.lock = threading.Lock()
+
+    def get_instrument_series(self, instrument):
+        """Get the series of the instrument, or `None` if the instrument is dropped"""
+        with self.lock:
+            if instrument in self.instruments:
+                return self.instruments[instrument]
+            instrument_series = None
+            views_config = self.views_config
+            if (
+                match_instrument_name(views_config.drop_instruments, instrument.name)
+                is None
+            ):
+                pattern = match_instrument_name(
+                    views_config.attribute_allowlist, instrument.name
+                )
+                instrument_series = InstrumentSeries(
+                    instrument.name,
+                    (
+                        None
+                        if pattern is None
+                        else frozenset(views_config.attribute_allowlist[pattern])
+                    ),
+                    views_config.max_series_per_instrument,
+                )
+            self.instruments[instrument] = instrument_series
+            return instrument_series
+
+    def consume_measurement(self, measurement):
+        """Pass the measurement to the SDK with its attributes limited"""
+        instrument = measurement.instrument
+        try:
+            instrument_series = self.instruments[instrument]
+        except KeyError:
+            instrument_series = self.get_instrument_series(instrument)
+        if instrument_series is None:
+            return
+        attributes = instrument_series.limit(measurement.attributes)
+        if attributes is not measurement.attributes:
+            measurement = dataclasses.replace(measurement, attributes=attributes)
+        self.consumer.consume_measurement(measurement)
+
+    def __getattr__(self, name):
+        """Delegate the rest of the measurement consumer interface to the SDK consumer"""
+        return getattr(self.consumer, name)
+
+
+def limit_cardinality(meter_provider, views_config):
+    """
+    Install the cardinality limiter into the meter provider.
+    It must be called before the first meter is created, because the meters keep the consumer of the provider.
+    """
+    # pylint: disable=protected-access
+    meter_provider._measurement_consumer = CardinalityLimiter(
+        meter_provider._measurement_consumer, views_config
+    )
+    return meter_provider._measurement_consumer
+
+
+def get_preferred_temporality(aggregation_config):
+    """Get the temporalities of the instrument kinds that are set by the aggregation config"""
+    preferred_temporality = {}
+    for kind, temporality in aggregation_config.temporality.items():
+        if kind.upper() not in INSTRUMENT_KINDS:
+            raise OTIConfigError(f'Unknown OTEL metric instrument kind: "{kind}"')
+        if temporality.upper() not in ("CUMULATIVE", "DELTA"):
+            raise OTIConfigError(f'Unknown OTEL metric temporality: "{temporality}"')
+        preferred_temporality[INSTRUMENT_KINDS[kind.upper()]] = AggregationTemporality[
+            temporality.upper()
+        ]
+    return preferred_temporality
+
+
+def get_preferred_aggregation(aggregation_config):
+    """Get the aggregations of the instrument kinds that are set by the aggregation config"""
+    histogram_aggregation = aggregation_config.histogram_aggregation.upper()
+    if histogram_aggregation == "EXPLICIT":
+        return {}
+    if histogram_aggregation == "EXPONENTIAL":
+        return {
+            Histogram: ExponentialBucketHistogramAggregation(
+                max_size=aggregation_config.exponential_histogram_max_size,
+                max_scale=aggregation_config.exponential_histogram_max_scale,
+            )
+        }
+    raise OTIConfigError(
+        f'Unknown OTEL metric histogram aggregation: "{aggregation_config.histogram_aggregation}"'
+    )
+
+
+def set_exporter_preferences(metric_exporter, aggregation_config):
+    """
+    Set the temporality and the aggregation of the aggregation config as the preferences of the metric exporter.
+    The preferences the config does not set are kept.
+    """
+    # pylint: disable=protected-access
+    metric_exporter._preferred_temporality = {
+        **(metric_exporter._preferred_temporality or {}),
+        **get_preferred_temporality(aggregation_config),
+    }
+    metric_exporter._preferred_aggregation = {
+        **(metric_exporter._preferred_aggregation or {}),
+        **get_preferred_aggregation(aggregation_config),
+    }
+    return metric_exporter
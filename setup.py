@@ -30,6 +30,11 @@ REQUIRED = [
     "opentelemetry-exporter-prometheus == 0.51b0",
 ]
 
+# Optional dependencies of the OTLPHTTP_ASYNC exporter type
+ASYNC_REQUIREMENTS = [
+    "httpx",
+]
+
 DEV_REQUIREMENTS = [
     "build",
     "coverage",
@@ -53,12 +58,12 @@ setup(
     python_requires=REQUIRES_PYTHON,
     url=URL,
     license=LICENSE,
-    packages=find_packages(exclude=("tests", "docs")),
+    packages=find_packages(exclude=("tests", "docs", "benchmarks", "benchmarks.*")),
     include_package_data=True,
     install_requires=REQUIRED,
-    extras_require={"dev": DEV_REQUIREMENTS},
+    extras_require={"dev": DEV_REQUIREMENTS, "async": ASYNC_REQUIREMENTS},
     entry_points={
-        "console_scripts": [],
+        "console_scripts": ["oti-replay = oti.replay:main"],
     },
     classifiers=[
         "Programming Language :: Python",